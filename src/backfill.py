@@ -0,0 +1,127 @@
+import json
+from decimal import Decimal
+from database import get_connection, get_sync_state, save_sync_state, get_logged_order_ids, insert_transactions, \
+    iso_to_epoch_ms
+from logger import Logger
+from models import Fill, loads
+from paginators import iter_fill_pages, MAX_PAGE_SIZE
+
+logger = Logger()
+
+SYNC_NAME = 'fills'
+TRANSACTION_TYPE = 'backfill'
+
+
+def _fill_to_json(fill):
+    return {name: str(value) if isinstance(value, Decimal) else value
+            for name, value in ((name, getattr(fill, name)) for name in Fill.__slots__)}
+
+
+def _fill_from_json(data):
+    return Fill(data['entry_id'], data['trade_id'], data['order_id'], data['product_id'], data['side'],
+                Decimal(data['price']), Decimal(data['size']),
+                Decimal(data['commission']) if data['commission'] is not None else None, data['trade_time'])
+
+
+def group_fills(fills, carried=None):
+    """
+    Group fills by order. The fills of orders placed close together can interleave, so an order's fills are
+    gathered from the whole page rather than only from consecutive fills.
+
+    The order of the last fill on a page may continue on the next page, so its group is returned separately
+    to be passed back in as carried with the next page.
+
+    Parameters:
+    fills (list): Fills as returned by the exchange, newest first.
+    carried (list, optional): The open group returned for the previous page.
+
+    Returns:
+    tuple: (groups, open_group) with the complete groups as lists of fills and the last, possibly incomplete one.
+    """
+    fills = list(carried or []) + list(fills)
+    groups = {}
+    for fill in fills:
+        groups.setdefault(fill.order_id, []).append(fill)
+    open_group = groups.pop(fills[-1].order_id) if fills else []
+    return list(groups.values()), open_group
+
+
+def transaction_row(fills):
+    """
+    Turn the fills of one buy order into a transactions row: the quote spent including fees, the base bought,
+    the volume-weighted price and the time of the first fill. Trade times come with varying fractional
+    digits, so they are compared as instants rather than as strings.
+    """
+    bitcoin_purchased = sum(fill.size for fill in fills)
+    filled_value = sum(fill.price * fill.size for fill in fills)
+    fees = sum(fill.commission or 0 for fill in fills)
+    return (fills[0].order_id, filled_value + fees, bitcoin_purchased, filled_value / bitcoin_purchased,
+            min(fills, key=lambda fill: iso_to_epoch_ms(fill.trade_time)).trade_time, TRANSACTION_TYPE)
+
+
+def backfill_fills(api_key, private_key, product_id, page_size=MAX_PAGE_SIZE, full=False):
+    """
+    Stream the buy fills of a product from the exchange into the transactions table, one order per row,
+    skipping orders that are already logged.
+
+    Every page is written in one transaction together with the cursor of the next page, so an interrupted run
+    resumes where it stopped. A completed run stores the time of the newest fill as watermark, and later runs
+    only ask for fills from the watermark on.
+
+    Parameters:
+    api_key (str): API key for Coinbase Advanced Trading API.
+    private_key (str): Private key for generating the JWT.
+    product_id (str): The product whose fills to backfill (e.g., 'BTC-EUR').
+    page_size (int): Fills requested per page.
+    full (bool): Ignore the watermark and any interrupted run, and walk the whole history again.
+
+    Returns:
+    tuple: (inserted, skipped) numbers of orders.
+    """
+    conn = get_connection()
+    state = get_sync_state(SYNC_NAME) or {}
+    cursor, watermark, run_watermark = state.get('cursor'), state.get('watermark'), state.get('run_watermark')
+    carried = [_fill_from_json(data) for data in loads(state['pending'])] if state.get('pending') else []
+    if full:
+        if cursor:
+            logger.info(f"Discarding the stored cursor of the interrupted fills backfill of {product_id}, "
+                        f"starting over for the whole history.")
+        cursor = watermark = run_watermark = None
+        carried = []
+    if cursor:
+        logger.info(f"Resuming the fills backfill of {product_id} from a stored cursor.")
+    else:
+        logger.info(f"Backfilling the fills of {product_id} since {watermark or 'the beginning'}.")
+
+    inserted = skipped = 0
+    for fills, next_cursor in iter_fill_pages(api_key, private_key, product_id=product_id, start=watermark,
+                                              page_size=page_size, cursor=cursor):
+        if run_watermark is None and fills:
+            # Newest first, so the first fill of the run becomes the next watermark
+            run_watermark = fills[0].trade_time
+        groups, carried = group_fills([fill for fill in fills if fill.side == 'BUY'], carried)
+        if next_cursor is None and carried:
+            groups.append(carried)
+            carried = []
+
+        rows = {}
+        for group in groups:
+            row = transaction_row(group)
+            rows.setdefault(row[0], row)
+        with conn:
+            # Take the write lock before looking for logged orders, so a concurrent writer cannot slip one in
+            conn.execute('BEGIN IMMEDIATE')
+            logged = get_logged_order_ids(conn, rows)
+            new_rows = [row for order_id, row in rows.items() if order_id not in logged]
+            insert_transactions(conn, new_rows)
+            if next_cursor is None:
+                save_sync_state(conn, SYNC_NAME, None, run_watermark or watermark)
+            else:
+                save_sync_state(conn, SYNC_NAME, next_cursor, watermark, run_watermark,
+                                json.dumps([_fill_to_json(fill) for fill in carried]))
+        inserted += len(new_rows)
+        skipped += len(rows) - len(new_rows)
+        logger.debug(f"Backfilled {len(new_rows)} of {len(rows)} orders from a page of {len(fills)} fills.")
+
+    logger.info(f"Fills backfill of {product_id} done: {inserted} orders added, {skipped} already logged.")
+    return inserted, skipped
@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SingleFlightCache:
+    def __init__(self):
+        """
+        Initialize an in-memory cache where concurrent lookups of a missing key share one load.
+
+        Values are kept until their time to live runs out; a ttl of None keeps them forever.
+        A loader result of None is treated as a failure and is only cached when a failure_ttl is given.
+        """
+        self._lock = threading.Lock()
+        self._values = {}
+        self._in_flight = {}
+
+    def get(self, key, loader, ttl=None, failure_ttl=None, max_age=None):
+        """
+        Return the cached value for key, calling loader() to produce it when it is missing or expired.
+        Parameters:
+        key (hashable): The cache key.
+        loader (callable): Zero-argument callable returning the value.
+        ttl (float, optional): Seconds the loaded value stays valid, None to keep it forever.
+        failure_ttl (float, optional): Seconds a None result is returned without calling loader again.
+        max_age (float, optional): Seconds a cached value may be old to be returned, instead of its ttl.
+        Returns:
+        The cached or freshly loaded value.
+        """
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None:
+                value, loaded_at, lifetime = entry
+                if value is not None and max_age is not None:
+                    lifetime = max_age
+                if lifetime is None or time.monotonic() - loaded_at < lifetime:
+                    return value
+            future = self._in_flight.get(key)
+            is_loader = future is None
+            if is_loader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not is_loader:
+            return future.result()
+
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            if value is not None:
+                self._values[key] = (value, time.monotonic(), ttl)
+            elif failure_ttl is not None:
+                self._values[key] = (None, time.monotonic(), failure_ttl)
+            del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drop the cached value for key, or every cached value when no key is given.
+        """
+        with self._lock:
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
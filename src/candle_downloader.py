@@ -0,0 +1,147 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import http_client
+from candle_store import CandleStore
+from logger import Logger
+from models import Candle, decode_json
+from rate_limiter import PUBLIC, PRIORITY_DISPLAY
+
+try:
+    from config.config import CANDLE_DOWNLOAD_WORKERS
+except ImportError:
+    CANDLE_DOWNLOAD_WORKERS = 8
+
+logger = Logger()
+
+CANDLES_URL = 'https://api.coinbase.com/api/v3/brokerage/market/products/{product_id}/candles'
+
+# The candles endpoint returns at most this many candles per request
+MAX_CANDLES_PER_REQUEST = 350
+
+GRANULARITY_SECONDS = {
+    'ONE_MINUTE': 60,
+    'FIVE_MINUTE': 300,
+    'FIFTEEN_MINUTE': 900,
+    'THIRTY_MINUTE': 1800,
+    'ONE_HOUR': 3600,
+    'TWO_HOUR': 7200,
+    'SIX_HOUR': 21600,
+    'ONE_DAY': 86400,
+}
+
+
+def split_windows(start, end, granularity):
+    """
+    Split the time range into consecutive windows small enough for a single candles request.
+
+    Parameters:
+    start (int): Range start as epoch seconds, inclusive.
+    end (int): Range end as epoch seconds, exclusive.
+    granularity (str): The candle granularity (e.g., 'ONE_MINUTE').
+
+    Returns:
+    list: (window_start, window_end) tuples. Each window ends where the next one starts, so the
+    boundary candle can be returned twice; download_candles drops the duplicate.
+    """
+    step = GRANULARITY_SECONDS[granularity]
+    start = start - start % step
+    span = step * (MAX_CANDLES_PER_REQUEST - 1)
+    return [(window_start, min(window_start + span, end)) for window_start in range(start, end, span)]
+
+
+def fetch_candle_window(product_id, granularity, window):
+    """
+    Fetch the candles of one window from the public candles endpoint.
+
+    Returns:
+    list: (time, open, high, low, close, volume) tuples sorted by time.
+    """
+    window_start, window_end = window
+    params = {"start": str(window_start), "end": str(window_end), "granularity": granularity,
+              "limit": MAX_CANDLES_PER_REQUEST}
+    response = http_client.get(CANDLES_URL.format(product_id=product_id), params=params, rate_limit=PUBLIC,
+                               priority=PRIORITY_DISPLAY, caller='fetch_candle_window')
+    response.raise_for_status()
+    candles = [Candle.from_json(candle).as_tuple() for candle in decode_json(response).get('candles', [])]
+    candles.sort()
+    return candles
+
+
+def download_candles(product_id, start, end, granularity='ONE_HOUR', max_workers=CANDLE_DOWNLOAD_WORKERS):
+    """
+    Download the candles of a time range, fetching its windows concurrently within the public rate budget.
+
+    Windows are yielded in chronological order as soon as they and all windows before them are complete,
+    so a failed window never leaves a gap in what the caller has received.
+
+    Parameters:
+    product_id (str): The product to download (e.g., 'BTC-EUR').
+    start (int): Range start as epoch seconds, inclusive.
+    end (int): Range end as epoch seconds, exclusive.
+    granularity (str): The candle granularity (e.g., 'ONE_MINUTE').
+    max_workers (int): Number of windows fetched in parallel.
+
+    Yields:
+    list: The candles of one window as (time, open, high, low, close, volume) tuples.
+    """
+    windows = split_windows(start, end, granularity)
+    logger.info(f"Downloading {product_id} {granularity} candles in {len(windows)} windows.")
+    remaining = iter(windows)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='candles') as executor:
+        # Keep a bounded number of windows in flight so memory does not grow with the length of the range
+        pending = deque(executor.submit(fetch_candle_window, product_id, granularity, window)
+                        for window in islice(remaining, max_workers * 2))
+        last_time = None
+        try:
+            while pending:
+                candles = pending.popleft().result()
+                for window in islice(remaining, 1):
+                    pending.append(executor.submit(fetch_candle_window, product_id, granularity, window))
+                # The exchange also returns the candle starting at a window's end
+                candles = [candle for candle in candles
+                           if candle[0] < end and (last_time is None or candle[0] > last_time)]
+                if candles:
+                    last_time = candles[-1][0]
+                yield candles
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def sync_candles(product_id, granularity, store=None, start=None, max_workers=CANDLE_DOWNLOAD_WORKERS):
+    """
+    Bring a candle store up to date, downloading only the closed candles after the newest stored one.
+
+    Parameters:
+    product_id (str): The product to sync (e.g., 'BTC-EUR').
+    granularity (str): The candle granularity (e.g., 'ONE_MINUTE').
+    store (optional): Store with last_timestamp() and append(candles); defaults to the product's CandleStore.
+    start (int, optional): Epoch seconds to start from when the store is empty.
+    max_workers (int): Number of windows fetched in parallel.
+
+    Returns:
+    int: Number of candles added to the store.
+    """
+    store = store if store is not None else CandleStore(product_id, granularity)
+    step = GRANULARITY_SECONDS[granularity]
+    last = store.last_timestamp()
+    if last is not None:
+        start = last + step
+    elif start is None:
+        raise ValueError("start is required when the candle store is empty")
+
+    # Only candles whose period has ended are final
+    end = int(time.time()) // step * step
+    if start >= end:
+        return 0
+
+    added = 0
+    for candles in download_candles(product_id, start, end, granularity, max_workers):
+        candles = [candle for candle in candles if start <= candle[0] < end]
+        if candles:
+            store.append(candles)
+            added += len(candles)
+    logger.info(f"Synced {added} {product_id} {granularity} candles.")
+    return added
@@ -0,0 +1,127 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+from logger import Logger
+
+try:
+    from config.config import CANDLE_STORE_DIR
+except ImportError:
+    CANDLE_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'data', 'candles')
+
+logger = Logger()
+
+COLUMNS = (
+    ('time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.float64),
+)
+
+
+class CandleStore:
+    def __init__(self, product_id, granularity, root=CANDLE_STORE_DIR):
+        """
+        Append-only on-disk candle store for one (product, granularity), kept as one fixed-width binary
+        file per column. Reads memory-map the files, so slices are views into the page cache rather than copies,
+        and the sorted time column serves as the index for binary-searched range lookups.
+
+        Parameters:
+        product_id (str): The product the candles belong to (e.g., 'BTC-EUR').
+        granularity (str): The candle granularity (e.g., 'ONE_MINUTE').
+        root (str): Directory under which the stores are kept.
+        """
+        self.product_id = product_id
+        self.granularity = granularity
+        self.path = os.path.join(root, product_id, granularity)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._mapped_length = None
+        self._mapped = None
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f'{name}.bin')
+
+    def __len__(self):
+        # The time column is written last, so its length is the number of complete candles
+        path = self._column_path('time')
+        return os.path.getsize(path) // np.dtype(np.int64).itemsize if os.path.exists(path) else 0
+
+    def columns(self):
+        """
+        Return all columns as read-only arrays mapped from disk, remapping only when the store has grown.
+        """
+        with self._lock:
+            length = len(self)
+            if length != self._mapped_length:
+                self._mapped = {
+                    name: np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(length,))
+                    if length else np.empty(0, dtype=dtype)
+                    for name, dtype in COLUMNS
+                }
+                self._mapped_length = length
+            return self._mapped
+
+    def last_timestamp(self):
+        times = self.columns()['time']
+        return int(times[-1]) if len(times) else None
+
+    def append(self, candles):
+        """
+        Append candles given as (time, open, high, low, close, volume) tuples sorted by time.
+        Candles not newer than the last stored one are skipped.
+        """
+        with self._lock:
+            length = len(self)
+            last = self._read_last_time(length)
+            candles = [candle for candle in candles if last is None or candle[0] > last]
+            if not candles:
+                return 0
+
+            values = list(zip(*candles))
+            # Data columns first and time last: an interrupted append leaves the time column authoritative
+            for index, (name, dtype) in reversed(list(enumerate(COLUMNS))):
+                path = self._column_path(name)
+                with open(path, 'ab') as column_file:
+                    # Drop the tail left behind by an earlier interrupted append
+                    column_file.truncate(length * np.dtype(dtype).itemsize)
+                    column_file.write(np.asarray(values[index], dtype=dtype).tobytes())
+            return len(candles)
+
+    def _read_last_time(self, length):
+        if not length:
+            return None
+        with open(self._column_path('time'), 'rb') as time_file:
+            time_file.seek((length - 1) * np.dtype(np.int64).itemsize)
+            return int(np.frombuffer(time_file.read(np.dtype(np.int64).itemsize), dtype=np.int64)[0])
+
+    def range(self, start, end):
+        """
+        Return the candles with start time in [start, end) as a dict of column views.
+        Parameters:
+        start (int): Range start as epoch seconds, inclusive.
+        end (int): Range end as epoch seconds, exclusive.
+        Returns:
+        dict: Column name to a numpy array view.
+        """
+        columns = self.columns()
+        first, last = np.searchsorted(columns['time'], [start, end], side='left')
+        return {name: column[first:last] for name, column in columns.items()}
+
+    def tail(self, count):
+        """
+        Return the newest `count` candles as a dict of column views.
+        """
+        columns = self.columns()
+        return {name: column[max(len(column) - count, 0):] for name, column in columns.items()}
+
+    def frame(self, start, end):
+        """
+        Return the candles with start time in [start, end) as a DataFrame over the mapped columns,
+        with a 'price' column holding the close as expected by the market indicators.
+        """
+        candles = self.range(start, end)
+        candles['price'] = candles['close']
+        return pd.DataFrame(candles, copy=False)
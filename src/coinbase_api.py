@@ -1,65 +1,143 @@
 import datetime
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import jwt
 import time
-import requests
+import http_client
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from logger import Logger
+from cache import SingleFlightCache
+from database import get_daily_close, save_daily_close
+from models import Order, OrderResult, Candle, decode_json
+from rate_limiter import PRIVATE, PRIORITY_ORDER, PRIORITY_DEFAULT
+from retry import call_with_retry, ORDER_RETRY, READ_RETRY
+from server_clock import server_time
+
+try:
+    from config.config import JWT_REUSE_MARGIN
+except ImportError:
+    JWT_REUSE_MARGIN = 15
 
 logger = Logger()
 
+JWT_LIFETIME = 60
+
+TERMINAL_ORDER_STATUSES = ('FILLED', 'CANCELLED', 'EXPIRED', 'FAILED')
+
 
 class CoinbaseAdvancedAuth:
-    def __init__(self, key_name, private_key):
+    # Shared by every instance so that the PEM key is parsed and each JWT is signed once per process
+    _signing_keys = {}
+    _jwt_cache = {}
+    _lock = threading.Lock()
+
+    def __init__(self, key_name, private_key, reuse_margin=JWT_REUSE_MARGIN):
+        """
+        Initialize the CoinbaseAdvancedAuth class for signing Coinbase Advanced Trading API requests.
+        Parameters:
+        key_name (str): The API key name, used as the JWT subject and key id.
+        private_key (str): The PEM encoded EC private key.
+        reuse_margin (int): Seconds before expiry after which a cached JWT is no longer handed out.
+        """
         self.key_name = key_name
         self.private_key = private_key
+        self.reuse_margin = reuse_margin
         logger.info("CoinbaseAdvancedAuth initialized.")
 
+    def get_signing_key(self):
+        """
+        Return the parsed private key, loading it from PEM only the first time it is needed.
+        """
+        with self._lock:
+            signing_key = self._signing_keys.get(self.private_key)
+            if signing_key is None:
+                logger.info("Loading private key for Coinbase Advanced Trading API.")
+                signing_key = serialization.load_pem_private_key(self.private_key.encode('utf-8'), password=None,
+                                                                 backend=default_backend())
+                self._signing_keys[self.private_key] = signing_key
+            return signing_key
+
     def generate_jwt(self, request_method, request_host, request_path, service_name):
+        """
+        Return a JWT for the given request, reusing a previously signed token until it is
+        within reuse_margin seconds of its expiry.
+        """
+        cache_key = (self.key_name, request_method, request_host, request_path, service_name)
+        claims = {
+            'aud': [service_name],
+            'uri': f"{request_method} {request_host}{request_path}",
+        }
+        return self._signed_jwt(cache_key, claims)
+
+    def generate_websocket_jwt(self):
+        """
+        Return a JWT for authenticating WebSocket subscriptions, which are not bound to a request uri.
+        """
+        return self._signed_jwt((self.key_name, 'websocket'), {})
+
+    def _signed_jwt(self, cache_key, claims):
+        cached = self._jwt_cache.get(cache_key)
+        if cached is not None and server_time() < cached[1] - self.reuse_margin:
+            return cached[0]
+
         try:
             logger.info("Generating JWT for Coinbase Advanced Trading API.")
-            uri = f"{request_method} {request_host}{request_path}"
-            private_key_bytes = self.private_key.encode('utf-8')
-            private_key = serialization.load_pem_private_key(private_key_bytes, password=None,
-                                                             backend=default_backend())
+            private_key = self.get_signing_key()
+            # Stamp with the exchange clock so a drifting local clock does not make the token not yet valid
+            now = int(server_time())
             jwt_payload = {
                 'sub': self.key_name,
                 'iss': "coinbase-cloud",
-                'nbf': int(time.time()),
-                'exp': int(time.time()) + 60,
-                'aud': [service_name],
-                'uri': uri,
+                'nbf': now,
+                'exp': now + JWT_LIFETIME,
+                **claims,
             }
             jwt_token = jwt.encode(
                 jwt_payload,
                 private_key,
                 algorithm='ES256',
-                headers={'kid': self.key_name, 'nonce': str(int(time.time()))},
+                headers={'kid': self.key_name, 'nonce': str(now)},
             )
+            self._jwt_cache[cache_key] = (jwt_token, jwt_payload['exp'])
             return jwt_token
         except Exception as e:
             logger.error(f"Error generating JWT: {e}")
             return None
 
 
+_auth_instances = {}
+
+
+def get_auth(api_key, private_key):
+    """
+    Return the CoinbaseAdvancedAuth instance for the given credentials, creating it on first use.
+    """
+    auth = _auth_instances.get((api_key, private_key))
+    if auth is None:
+        auth = CoinbaseAdvancedAuth(api_key, private_key)
+        _auth_instances[(api_key, private_key)] = auth
+    return auth
+
+
 def get_order_details(api_key, private_key, order_id):
     try:
         logger.info(f"Fetching order details for order_id: {order_id}")
-        auth = CoinbaseAdvancedAuth(api_key, private_key)
-        jwt_token = auth.generate_jwt('GET', 'api.coinbase.com', f'/api/v3/brokerage/orders/historical/{order_id}',
-                                      'retail_rest_api_proxy')
-        headers = {"Authorization": f"Bearer {jwt_token}"}
-        response = requests.get(f'https://api.coinbase.com/api/v3/brokerage/orders/historical/{order_id}',
-                                headers=headers)
+        auth = get_auth(api_key, private_key)
+
+        def send():
+            jwt_token = auth.generate_jwt('GET', 'api.coinbase.com', f'/api/v3/brokerage/orders/historical/{order_id}',
+                                          'retail_rest_api_proxy')
+            headers = {"Authorization": f"Bearer {jwt_token}"}
+            return http_client.get(f'https://api.coinbase.com/api/v3/brokerage/orders/historical/{order_id}',
+                                   headers=headers, rate_limit=PRIVATE, priority=PRIORITY_ORDER,
+                                   caller='get_order_details')
+
+        response = call_with_retry(send, READ_RETRY, 'get_order_details')
         if response.status_code == 200:
-            order_details = response.json()['order']
-            logger.info(f"Order details retrieved: {order_details}")
-            return {
-                'average_filled_price': order_details.get('average_filled_price'),
-                'filled_size': order_details.get('filled_size'),
-                'created_time': order_details.get('created_time'),
-                'status': order_details.get('status')
-            }
+            order = Order.from_json(decode_json(response)['order'])
+            logger.info(f"Order details retrieved: {order}")
+            return order
         else:
             logger.warning(f"Failed to get order details for {order_id}. Response code: {response.status_code}")
             return None
@@ -68,33 +146,106 @@ def get_order_details(api_key, private_key, order_id):
         return None
 
 
-def wait_for_order_completion(api_key, private_key, order_id, timeout=30, interval=5):
+def _order_is_terminal(api_key, private_key, order_id):
+    """
+    Fetch the order details over REST and return True if the order reached a terminal status.
+    """
+    try:
+        order = get_order_details(api_key, private_key, order_id)
+        if order is not None:
+            logger.info(f"Checking order status: {order.status}")
+            return order.status in TERMINAL_ORDER_STATUSES
+        logger.warning("Order details not received, retrying...")
+    except Exception as e:
+        logger.error(f"Error during order status check: {e}")
+    return False
+
+
+def wait_for_order_completion(api_key, private_key, order_id, timeout=30, interval=5, order_stream=None):
+    """
+    Wait until the order reaches a terminal status.
+
+    When an OrderUpdateStream is given and connected, the order is resolved as soon as the exchange pushes
+    its terminal status. Whenever the stream is not connected, the order details are polled over REST instead,
+    and they are checked once more before giving up, since a status pushed while the stream was reconnecting
+    is not sent again.
+
+    Parameters:
+    api_key (str): API key for Coinbase Advanced Trading API.
+    private_key (str): Private key for generating the JWT.
+    order_id (str): The order to wait for.
+    timeout (int): Maximum number of seconds to wait.
+    interval (int): Seconds between REST polls, and between stream connection checks.
+    order_stream (OrderUpdateStream, optional): Stream of user channel order updates.
+
+    Returns:
+    bool: True if the order reached a terminal status, False if the timeout was reached.
+    """
     logger.info(f"Waiting for order completion: {order_id}")
     start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            order_details = get_order_details(api_key, private_key, order_id)
-            if order_details:
-                status = order_details.get('status')
-                logger.info(f"Checking order status: {status}")
-                if status in ['FILLED', 'CANCELLED', 'EXPIRED', 'FAILED']:
+    order_update = order_stream.watch(order_id) if order_stream is not None else None
+    try:
+        while time.time() - start_time < timeout:
+            remaining = timeout - (time.time() - start_time)
+            if order_update is not None and order_stream.connected.is_set():
+                try:
+                    status = order_update.result(timeout=min(interval, remaining))
+                    logger.info(f"Order status pushed by stream: {status}")
                     return True
-            else:
-                logger.warning("Order details not received, retrying...")
-        except Exception as e:
-            logger.error(f"Error during order status check: {e}")
-        time.sleep(interval)
-    logger.warning("Timeout reached, order may not have completed.")
-    return False
+                except FutureTimeoutError:
+                    continue
+
+            if _order_is_terminal(api_key, private_key, order_id):
+                return True
+            time.sleep(min(interval, max(remaining, 0)))
+        if order_update is not None and _order_is_terminal(api_key, private_key, order_id):
+            return True
+        logger.warning("Timeout reached, order may not have completed.")
+        return False
+    finally:
+        if order_update is not None:
+            order_stream.unwatch(order_id)
+
+
+def _order_result(response):
+    """
+    Parse the response of a create order request into an OrderResult.
+    """
+    if response.status_code == 200:
+        result = OrderResult.from_json(decode_json(response))
+        if result.success:
+            logger.info(f"Order successfully created: {result.order_id}")
+        else:
+            logger.warning(f"Order failure: {result.reason}")
+        return result
+    logger.error(f"Unexpected error response: {response.text}")
+    error_data = decode_json(response)
+    return OrderResult("error", reason=error_data.get('error'), message=error_data.get('message'),
+                       details=error_data.get('details', 'No additional details provided.'))
 
 
-def buy_bitcoin(api_key, private_key, client_order_id, product_id, amount, order_type='market_market_ioc'):
-    try:
-        logger.info(f"Placing a buy order for Bitcoin. Order type: {order_type}")
-        auth = CoinbaseAdvancedAuth(api_key, private_key)
+def _submit_order(api_key, private_key, data, caller):
+    """
+    POST an order, retrying network errors and retryable statuses under ORDER_RETRY.
+
+    Every attempt carries the same client_order_id, so when an earlier attempt did reach the exchange the retry
+    returns that order instead of placing a second one. The JWT is generated per attempt so a long retry sequence
+    never sends an expired token.
+    """
+    auth = get_auth(api_key, private_key)
+
+    def send():
         jwt_token = auth.generate_jwt('POST', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
         headers = {"Authorization": f"Bearer {jwt_token}"}
+        return http_client.post('https://api.coinbase.com/api/v3/brokerage/orders', headers=headers, json=data,
+                                rate_limit=PRIVATE, priority=PRIORITY_ORDER, caller=caller)
+
+    return call_with_retry(send, ORDER_RETRY, caller)
+
 
+def buy_bitcoin(api_key, private_key, client_order_id, product_id, amount, order_type='market_market_ioc'):
+    try:
+        logger.info(f"Placing a buy order for Bitcoin. Order type: {order_type}")
         order_configuration = {
             "market_market_ioc": {
                 "quote_size": str(amount)
@@ -108,52 +259,16 @@ def buy_bitcoin(api_key, private_key, client_order_id, product_id, amount, order
             "order_configuration": order_configuration
         }
 
-        response = requests.post('https://api.coinbase.com/api/v3/brokerage/orders', headers=headers, json=data)
-        if response.status_code == 200:
-            response_data = response.json()
-            if response_data.get('success'):
-                logger.info(f"Order successfully created: {response_data['success_response']['order_id']}")
-                order_id = response_data['success_response']['order_id']
-
-                return {
-                    "status": "success",
-                    "order_id": order_id,
-                    "details": "Order successfully created."
-                }
-            else:
-                logger.warning(f"Order failure: {response_data.get('failure_reason')}")
-                return {
-                    "status": "failure",
-                    "reason": response_data.get('failure_reason'),
-                    "details": response_data.get('error_response', {}).get('error_details',
-                                                                           'No additional details provided.')
-                }
-        else:
-            logger.error(f"Unexpected error response: {response.text}")
-            error_data = response.json()
-            return {
-                "status": "error",
-                "error": error_data.get('error'),
-                "code": error_data.get('code'),
-                "message": error_data.get('message'),
-                "details": error_data.get('details', 'No additional details provided.')
-            }
+        return _order_result(_submit_order(api_key, private_key, data, 'buy_bitcoin'))
     except Exception as err:
         logger.error(f"Exception during buy order request: {err}")
-        return {
-            "status": "exception",
-            "message": str(err),
-            "details": "An exception occurred while sending the buy order request."
-        }
+        return OrderResult("exception", message=str(err),
+                           details="An exception occurred while sending the buy order request.")
 
 
 def sell_bitcoin(api_key, private_key, client_order_id, product_id, amount, order_type='market_market_ioc'):
     try:
         logger.info(f"Placing a sell order for Bitcoin. Order type: {order_type}")
-        auth = CoinbaseAdvancedAuth(api_key, private_key)
-        jwt_token = auth.generate_jwt('POST', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
-        headers = {"Authorization": f"Bearer {jwt_token}"}
-
         if order_type == 'market_market_ioc':
             order_configuration = {
                 "market_market_ioc": {
@@ -171,66 +286,65 @@ def sell_bitcoin(api_key, private_key, client_order_id, product_id, amount, orde
             "order_configuration": order_configuration
         }
 
-        response = requests.post('https://api.coinbase.com/api/v3/brokerage/orders', headers=headers, json=data)
-        if response.status_code == 200:
-            response_data = response.json()
-            if response_data.get('success'):
-                logger.info(f"Order successfully created: {response_data['success_response']['order_id']}")
-                order_id = response_data['success_response']['order_id']
-
-                return {
-                    "status": "success",
-                    "order_id": order_id,
-                    "details": "Order successfully created."
-                }
-            else:
-                logger.warning(f"Order failure: {response_data.get('failure_reason')}")
-                return {
-                    "status": "failure",
-                    "reason": response_data.get('failure_reason'),
-                    "details": response_data.get('error_response', {}).get('error_details',
-                                                                           'No additional details provided.')
-                }
-        else:
-            logger.error(f"Unexpected error response: {response.text}")
-            error_data = response.json()
-            return {
-                "status": "error",
-                "error": error_data.get('error'),
-                "code": error_data.get('code'),
-                "message": error_data.get('message'),
-                "details": error_data.get('details', 'No additional details provided.')
-            }
+        return _order_result(_submit_order(api_key, private_key, data, 'sell_bitcoin'))
     except Exception as err:
         logger.error(f"Exception during sell order request: {err}")
-        return {
-            "status": "exception",
-            "message": str(err),
-            "details": "An exception occurred while sending the sell order request."
-        }
+        return OrderResult("exception", message=str(err),
+                           details="An exception occurred while sending the sell order request.")
 
 
-def get_previous_day_bitcoin_price(api_key, private_key, product_id):
+# Previous day closes keyed by (product_id, day); a new day is a new key, so entries never need to expire
+_previous_day_closes = SingleFlightCache()
+
+# Seconds a failed previous day close lookup is remembered, so per-tick callers do not retry it on every price
+PREVIOUS_DAY_CLOSE_RETRY_DELAY = 60
+
+
+def get_previous_day_bitcoin_price(api_key, private_key, product_id, priority=PRIORITY_DEFAULT):
     """
     Retrieve the closing Bitcoin price from the previous day using the Coinbase Advanced Trading API.
 
+    The close only changes once per day, so it is memoized per product until the next day boundary
+    and stored in the database so that restarts do not fetch it again.
+
     Parameters:
     api_key (str): API key for Coinbase Advanced Trading API.
     private_key (str): Private key for generating the JWT.
     trading_pair (str): The trading pair to use (e.g., 'BTC-USD').
+    priority (int): Rate limiter priority of the request.
 
     Returns:
     float: The closing Bitcoin price from the previous day, or None if the request fails.
     """
-    previous_day_start = (datetime.datetime.now() - datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0,
-                                                                                        microsecond=0)
+    # Daily candles start at midnight UTC, so the previous day is the previous UTC day
+    previous_day_start = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    day = previous_day_start.strftime('%Y-%m-%d')
+    return _previous_day_closes.get((product_id, day), lambda: _load_previous_day_close(
+        api_key, private_key, product_id, previous_day_start, priority), failure_ttl=PREVIOUS_DAY_CLOSE_RETRY_DELAY)
+
+
+def _load_previous_day_close(api_key, private_key, product_id, previous_day_start, priority):
+    day = previous_day_start.strftime('%Y-%m-%d')
+    close_price = get_daily_close(product_id, day)
+    if close_price is not None:
+        logger.info(f"Previous day Bitcoin closing price (stored): {close_price}")
+        return close_price
+
+    close_price = _fetch_previous_day_close(api_key, private_key, product_id, previous_day_start, priority)
+    if close_price is not None:
+        save_daily_close(product_id, day, close_price)
+    return close_price
+
+
+def _fetch_previous_day_close(api_key, private_key, product_id, previous_day_start, priority):
     previous_day_end = previous_day_start + datetime.timedelta(days=1)
 
     # Convert start and end times to UNIX timestamp and then to string
     start_timestamp = str(int(previous_day_start.timestamp()))
     end_timestamp = str(int(previous_day_end.timestamp()))
 
-    auth = CoinbaseAdvancedAuth(api_key, private_key)
+    auth = get_auth(api_key, private_key)
     jwt_token = auth.generate_jwt('GET', 'api.coinbase.com', f'/api/v3/brokerage/products/{product_id}/candles',
                                   'retail_rest_api_proxy')
 
@@ -248,14 +362,14 @@ def get_previous_day_bitcoin_price(api_key, private_key, product_id):
     }
 
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = http_client.get(url, headers=headers, params=params, rate_limit=PRIVATE, priority=priority,
+                                   caller='get_previous_day_bitcoin_price')
         response.raise_for_status()
 
         # Extracting data from the response
-        data = response.json()
-        candles = data.get('candles', [])
+        candles = decode_json(response).get('candles', [])
         if candles and len(candles) > 0:
-            close_price = float(candles[0]['close'])  # Extracting the close price from the first candle
+            close_price = Candle.from_json(candles[0]).close  # Extracting the close price from the first candle
             logger.info(f"Previous day Bitcoin closing price: {close_price}")
             return close_price
         else:
@@ -292,14 +406,10 @@ def create_stop_order(api_key, private_key, client_order_id, product_id, base_si
                                 'gtc' (Good Till Canceled) orders remain open on the book until canceled.
 
     Returns:
-    dict: A dictionary with the response data from the API, including order details or error messages.
+    OrderResult: The order id of the created order, or the failure reason and error details.
     """
     try:
         logger.info(f"Creating stop order for {product_id}. Stop price: {stop_price}, Limit price: {limit_price}")
-        auth = CoinbaseAdvancedAuth(api_key, private_key)
-        jwt_token = auth.generate_jwt('POST', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
-        headers = {"Authorization": f"Bearer {jwt_token}"}
-
         order_configuration = {
             order_type: {
                 "base_size": str(base_size),
@@ -315,18 +425,7 @@ def create_stop_order(api_key, private_key, client_order_id, product_id, base_si
             "order_configuration": order_configuration
         }
 
-        response = requests.post('https://api.coinbase.com/api/v3/brokerage/orders', headers=headers, json=data)
-        if response.status_code == 200:
-            response_data = response.json()
-            if response_data.get('success'):
-                logger.info(f"Stop order successfully created: {response_data['success_response']['order_id']}")
-                return response_data['success_response']
-            else:
-                logger.warning(f"Failed to create stop order: {response_data.get('failure_reason')}")
-                return {"status": "failure", "reason": response_data.get('failure_reason')}
-        else:
-            logger.error(f"Unexpected error response: {response.text}")
-            return {"status": "error", "error": response.text}
+        return _order_result(_submit_order(api_key, private_key, data, 'create_stop_order'))
     except Exception as e:
         logger.error(f"Exception during stop order request: {e}")
-        return {"status": "exception", "message": str(e)}
+        return OrderResult("exception", message=str(e))
@@ -1,15 +1,37 @@
 import datetime
+from decimal import Decimal
 import hmac
 import hashlib
+import threading
 import time
 import requests
+import http_client
 import pandas as pd
 from requests.auth import AuthBase
 from config.config import TRADING_PAIR
 from logger import Logger
+from cache import SingleFlightCache
+from models import Account, decode_json
+from price_oracle import get_price_oracle
+from retry import call_with_retry, READ_RETRY
+from server_clock import server_time
+from candle_downloader import download_candles
+from rate_limiter import PUBLIC, PRIVATE, PRIORITY_DEFAULT, PRIORITY_DISPLAY
+
+try:
+    from config.config import ACCOUNTS_CACHE_TTL
+except ImportError:
+    ACCOUNTS_CACHE_TTL = 15
+
+try:
+    from config.config import PRICE_CACHE_TTL
+except ImportError:
+    PRICE_CACHE_TTL = 10
 
 logger = Logger()
 
+_price_cache = SingleFlightCache()
+
 
 class CoinbaseWalletAuth(AuthBase):
     def __init__(self, api_key, api_secret):
@@ -32,7 +54,7 @@ class CoinbaseWalletAuth(AuthBase):
         The modified request object with authentication details.
         """
         logger.info("Authenticating request to Coinbase API v2.")
-        timestamp = str(int(time.time()))
+        timestamp = str(int(server_time()))
         message = timestamp + request.method + request.path_url + (request.body or '')
         hmac_key = hmac.new(self.api_secret.encode(), message.encode(), hashlib.sha256)
         signature = hmac_key.hexdigest()
@@ -46,27 +68,110 @@ class CoinbaseWalletAuth(AuthBase):
         return request
 
 
-def get_euro_balance(auth):
+class AccountsSnapshot:
+    def __init__(self, accounts, fetched_at):
+        """
+        Initialize the AccountsSnapshot with every account of the user, indexed by currency code.
+        Parameters:
+        accounts (list): Account objects parsed from the /v2/accounts endpoint.
+        fetched_at (float): time.monotonic() value at which the accounts were fetched.
+        """
+        self.accounts = accounts
+        self.fetched_at = fetched_at
+        self._by_currency = {}
+        for account in accounts:
+            self._by_currency.setdefault(account.currency, []).append(account)
+
+    @classmethod
+    def fetch(cls, auth, page_size=100):
+        """
+        Fetch all accounts, following the pagination until the last page.
+        Parameters:
+        auth (CoinbaseWalletAuth): Authentication object for Coinbase API requests.
+        page_size (int): Number of accounts requested per page.
+        Returns:
+        AccountsSnapshot: The snapshot of all accounts.
+        """
+        accounts = []
+        url = f'https://api.coinbase.com/v2/accounts?limit={page_size}'
+        while url:
+            response = call_with_retry(lambda: http_client.get(url, auth=auth, rate_limit=PRIVATE,
+                                                               caller='AccountsSnapshot.fetch'),
+                                       READ_RETRY, 'AccountsSnapshot.fetch')
+            response.raise_for_status()
+            page = decode_json(response)
+            accounts.extend(Account.from_json(account) for account in page['data'])
+            next_uri = (page.get('pagination') or {}).get('next_uri')
+            url = f'https://api.coinbase.com{next_uri}' if next_uri else None
+        logger.info(f"Fetched {len(accounts)} accounts.")
+        return cls(accounts, time.monotonic())
+
+    def get(self, currency_code, account_type=None):
+        """
+        Return the first account in the given currency (and of the given type, e.g. 'fiat'), or None.
+        """
+        for account in self._by_currency.get(currency_code, []):
+            if account_type is None or account.type == account_type:
+                return account
+        return None
+
+    def balance(self, currency_code, account_type=None):
+        """
+        Return the balance of the account in the given currency as a Decimal, or None if there is none.
+        """
+        account = self.get(currency_code, account_type)
+        return account.balance if account is not None else None
+
+
+_accounts_snapshots = {}
+_accounts_snapshots_lock = threading.Lock()
+
+
+def get_accounts_snapshot(auth, max_age=ACCOUNTS_CACHE_TTL):
+    """
+    Return the cached AccountsSnapshot for the API key, fetching a new one if it is older than max_age seconds.
+    Concurrent callers wait for a single fetch instead of each requesting the accounts.
+
+    Parameters:
+    auth (CoinbaseWalletAuth): Authentication object for Coinbase API requests.
+    max_age (float): Maximum age of the cached snapshot in seconds.
+
+    Returns:
+    AccountsSnapshot: The snapshot of all accounts.
+    """
+    with _accounts_snapshots_lock:
+        snapshot = _accounts_snapshots.get(auth.api_key)
+        if snapshot is None or time.monotonic() - snapshot.fetched_at > max_age:
+            snapshot = AccountsSnapshot.fetch(auth)
+            _accounts_snapshots[auth.api_key] = snapshot
+        return snapshot
+
+
+def invalidate_accounts_snapshot():
+    """
+    Drop the cached account snapshots, e.g. after an order fill changed the balances.
+    """
+    with _accounts_snapshots_lock:
+        _accounts_snapshots.clear()
+
+
+def get_euro_balance(auth, max_age=ACCOUNTS_CACHE_TTL):
     """
     Retrieve the Euro balance from the Coinbase account.
 
     Parameters:
     auth (CoinbaseWalletAuth): Authentication object for Coinbase API requests.
+    max_age (float): Maximum age in seconds of a cached account snapshot that may be used.
 
     Returns:
-    str: The Euro balance as a string, or None if the request fails.
+    Decimal: The Euro balance, or None if the request fails.
     """
-    url = 'https://api.coinbase.com/v2/accounts'
     try:
         logger.info("Retrieving Euro balance.")
-        response = requests.get(url, auth=auth)
-        response.raise_for_status()
-        accounts = response.json()
-        for account in accounts['data']:
-            if account.get('type') == 'fiat' and account.get('currency', {}).get('code') == 'EUR':
-                balance = account['balance']['amount']
-                logger.info(f"Euro balance: {balance}")
-                return balance
+        balance = get_accounts_snapshot(auth, max_age).balance('EUR', account_type='fiat')
+        if balance is not None:
+            logger.info(f"Euro balance: {balance}")
+        return balance
     except Exception as err:
         logger.error(f"Error retrieving Euro balance: {err}")
         return None
@@ -80,48 +185,54 @@ def get_bitcoin_balance(auth):
     auth (CoinbaseWalletAuth): Authentication object for Coinbase API requests.
 
     Returns:
-    str: The Bitcoin balance as a string, or None if the request fails.
+    Decimal: The Bitcoin balance, or None if the request fails.
     """
-    url = 'https://api.coinbase.com/v2/accounts'
     try:
         logger.info("Retrieving Bitcoin balance.")
-        response = requests.get(url, auth=auth)
-        response.raise_for_status()
-        accounts = response.json()
-        for account in accounts['data']:
-            if account['currency']['code'] == 'BTC':
-                balance = account['balance']['amount']
-                logger.info(f"Bitcoin balance: {balance}")
-                return balance
-        return "0.0"
+        balance = get_accounts_snapshot(auth).balance('BTC')
+        if balance is None:
+            return Decimal(0)
+        logger.info(f"Bitcoin balance: {balance}")
+        return balance
     except Exception as err:
         logger.error(f"Error retrieving Bitcoin balance: {err}")
         return None
 
 
-def get_bitcoin_price(one_week_ago=False, trading_pair=TRADING_PAIR):
+def get_bitcoin_price(one_week_ago=False, trading_pair=TRADING_PAIR, priority=PRIORITY_DEFAULT, max_age=None):
     """
     Retrieve the current or historical price of Bitcoin.
 
+    Concurrent lookups of the same (pair, date) share one request. Spot prices come from the price oracle and
+    are cached for PRICE_CACHE_TTL seconds; historical prices never change and are cached for the lifetime of
+    the process.
+
     Parameters:
     one_week_ago (bool): Whether to fetch the price from one week ago.
     trading_pair (str): The trading pair to use (e.g., 'BTC-USD').
+    priority (int): Rate limiter priority of the request.
+    max_age (float, optional): Maximum age in seconds of a cached spot price that may be used, instead of
+    PRICE_CACHE_TTL.
 
     Returns:
     float: The Bitcoin price, or None if the request fails.
     """
+    if one_week_ago:
+        historical_date = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime('%Y-%m-%d')
+        return _price_cache.get((trading_pair, historical_date),
+                                lambda: _fetch_bitcoin_price(trading_pair, historical_date, priority))
+    return _price_cache.get((trading_pair, None), lambda: get_price_oracle().get_price(trading_pair, priority),
+                            ttl=PRICE_CACHE_TTL, max_age=max_age)
+
+
+def _fetch_bitcoin_price(trading_pair, historical_date, priority):
     try:
-        if one_week_ago:
-            historical_date = (datetime.datetime.now() - datetime.timedelta(days=7)).strftime('%Y-%m-%d')
-            price_url = f'https://api.coinbase.com/v2/prices/{trading_pair}/spot?date={historical_date}'
-            logger.info(f"Fetching historical Bitcoin price for {historical_date}.")
-        else:
-            price_url = f'https://api.coinbase.com/v2/prices/{trading_pair}/spot'
-            logger.info("Fetching current Bitcoin price.")
+        price_url = f'https://api.coinbase.com/v2/prices/{trading_pair}/spot?date={historical_date}'
+        logger.info(f"Fetching historical Bitcoin price for {historical_date}.")
 
-        response = requests.get(price_url)
+        response = http_client.get(price_url, rate_limit=PUBLIC, priority=priority, caller='get_bitcoin_price')
         if response.status_code == 200:
-            data = response.json()
+            data = decode_json(response)
             price = float(data['data']['amount'])
             logger.info(f"Bitcoin price: {price}")
             return price
@@ -133,18 +244,19 @@ def get_bitcoin_price(one_week_ago=False, trading_pair=TRADING_PAIR):
         return None
 
 
-def get_bitcoin_price_change_week(trading_pair=TRADING_PAIR):
+def get_bitcoin_price_change_week(trading_pair=TRADING_PAIR, max_age=None):
     """
     Calculate the percentage change in Bitcoin price over the past week.
 
     Parameters:
     trading_pair (str): The trading pair to use (e.g., 'BTC-USD').
+    max_age (float, optional): Maximum age in seconds of a cached current price that may be used.
 
     Returns:
     float: The percentage change in Bitcoin price, or None if the request fails.
     """
     logger.info("Calculating Bitcoin price change.")
-    current_price = get_bitcoin_price(False, trading_pair)
+    current_price = get_bitcoin_price(False, trading_pair, max_age=max_age)
     past_price = get_bitcoin_price(True, trading_pair)
     if current_price is not None and past_price is not None:
         price_change = ((current_price - past_price) / past_price) * 100
@@ -177,17 +289,20 @@ class CoinbaseMarketData:
         Returns:
         DataFrame: A DataFrame with historical data (date, price, volume), or None if the request fails.
         """
-        url = f'https://api.pro.coinbase.com/products/{symbol}/candles?start={start_date}&end={end_date}&granularity=86400'
+        # Daily candles start at midnight UTC; end_date is inclusive, so the range ends at the following midnight
+        start_timestamp = int(datetime.datetime.strptime(start_date, '%Y-%m-%d')
+                              .replace(tzinfo=datetime.timezone.utc).timestamp())
+        end_timestamp = int((datetime.datetime.strptime(end_date, '%Y-%m-%d')
+                             .replace(tzinfo=datetime.timezone.utc) + datetime.timedelta(days=1)).timestamp())
 
         try:
-            response = requests.get(url, auth=self.auth)
-            response.raise_for_status()
-            data = response.json()
+            candles = [candle for window in download_candles(symbol, start_timestamp, end_timestamp, 'ONE_DAY')
+                       for candle in window]
 
-            logger.debug(data)
+            logger.debug(candles)
 
             # Transforming data to DataFrame
-            df = pd.DataFrame(data, columns=['time', 'low', 'high', 'open', 'close', 'volume'])
+            df = pd.DataFrame(candles, columns=['time', 'open', 'high', 'low', 'close', 'volume'])
             df['date'] = pd.to_datetime(df['time'], unit='s')
             df = df[['date', 'open', 'high', 'low', 'close', 'volume']]
             return df
@@ -208,12 +323,13 @@ class CoinbaseMarketData:
         start_date_iso = start_date.isoformat()
         end_date_iso = end_date.isoformat()
         url = f"{self.base_url}prices/{currency_pair}/historic?start={start_date_iso}&end={end_date_iso}"
-        response = requests.get(url, auth=self.auth)
+        response = http_client.get(url, auth=self.auth, rate_limit=PRIVATE, priority=PRIORITY_DISPLAY,
+                                   caller='get_historical_data')
 
         logger.debug(response.text)
 
         if response.status_code == 200:
-            data = response.json()
+            data = decode_json(response)
             df = pd.DataFrame(data['data']['prices'])
             return df
         else:
@@ -230,12 +346,13 @@ class CoinbaseMarketData:
         """
 
         url = f"{self.base_url}prices/{currency_pair}/spot"
-        response = requests.get(url, auth=self.auth)
+        response = http_client.get(url, auth=self.auth, rate_limit=PRIVATE, priority=PRIORITY_DISPLAY,
+                                   caller='get_real_time_data')
 
         logger.debug(response.text)
 
         if response.status_code == 200:
-            data = response.json()
+            data = decode_json(response)
             price = float(data['data']['amount'])  # Convert price to float
             # Create a DataFrame with the price data
             price_df = pd.DataFrame({'price': [price]})
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from logger import Logger
+
+try:
+    from config.config import FETCH_WORKERS
+except ImportError:
+    FETCH_WORKERS = 6
+
+logger = Logger()
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='fetch')
+
+
+def fetch_concurrently(sources, deadline):
+    """
+    Run independent data sources concurrently and collect whatever finished within a shared deadline.
+
+    Parameters:
+    sources (dict): Mapping of a name to a zero-argument callable returning the value for that name.
+    deadline (float): Seconds to wait for all sources together.
+
+    Returns:
+    dict: Mapping of each name to its result, or None if that source raised or did not finish in time.
+    """
+    futures = {name: _executor.submit(source) for name, source in sources.items()}
+    done, _ = wait(futures.values(), timeout=deadline)
+
+    results = {}
+    for name, future in futures.items():
+        if future not in done:
+            future.cancel()
+            logger.warning(f"{name} did not finish within {deadline}s, continuing without it.")
+            results[name] = None
+        elif future.exception() is not None:
+            logger.error(f"Error fetching {name}: {future.exception()}")
+            results[name] = None
+        else:
+            results[name] = future.result()
+    return results
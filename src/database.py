@@ -1,12 +1,227 @@
+import os
+import re
 import sqlite3
 import datetime
+import threading
+import weakref
+from decimal import Decimal
 from logger import Logger
 
+try:
+    from config.config import DATABASE_PATH
+except ImportError:
+    DATABASE_PATH = 'trading_app.db'
+
 logger = Logger()
 
+# Order amounts are parsed into Decimals; store them in the REAL columns like any other number
+sqlite3.register_adapter(Decimal, float)
+
+# Number of prepared statements each connection keeps compiled
+CACHED_STATEMENTS = 256
+
+PRAGMAS = (
+    # Readers do not block the writer and the writer does not block readers
+    'PRAGMA journal_mode=WAL',
+    # In WAL mode NORMAL stays consistent after a crash and only syncs at checkpoints
+    'PRAGMA synchronous=NORMAL',
+    # Page cache size in KiB (negative values are KiB rather than pages)
+    'PRAGMA cache_size=-8192',
+    'PRAGMA temp_store=MEMORY',
+    # Wait for a competing writer instead of failing with "database is locked"
+    'PRAGMA busy_timeout=5000',
+)
+
+
+def _close_connections(connections):
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
+
+
+class _ThreadConnections:
+    """
+    The connections of one thread. The thread-local drops it when the thread exits, and its finalizer then
+    closes the connections.
+    """
+
+    def __init__(self):
+        self.connections = {}
+        self.close = weakref.finalize(self, _close_connections, self.connections)
+
+
+class ConnectionManager:
+    def __init__(self, path=DATABASE_PATH, cached_statements=CACHED_STATEMENTS):
+        """
+        Hand out one long-lived connection per thread, opened on first use with the WAL and cache pragmas.
+        A thread's connections are closed when the thread exits.
+
+        Connections are keyed by the absolute database path, so a relative path keeps following the working
+        directory the way sqlite3.connect does.
+
+        Parameters:
+        path (str): Path of the SQLite database file.
+        cached_statements (int): Number of prepared statements kept per connection.
+        """
+        self.path = path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = weakref.WeakSet()
+
+    def connection(self):
+        """
+        Return the calling thread's connection to the database, opening it if needed.
+        """
+        path = os.path.abspath(self.path)
+        thread_connections = getattr(self._local, 'thread_connections', None)
+        if thread_connections is None:
+            thread_connections = self._local.thread_connections = _ThreadConnections()
+            with self._lock:
+                self._threads.add(thread_connections)
+        conn = thread_connections.connections.get(path)
+        if conn is None:
+            # Each connection is only used by its own thread, but close_all may close it from another one
+            conn = sqlite3.connect(path, cached_statements=self.cached_statements, check_same_thread=False)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            thread_connections.connections[path] = conn
+        return conn
+
+    def close_all(self):
+        """
+        Close every open connection, e.g. on shutdown.
+        """
+        with self._lock:
+            threads, self._threads = list(self._threads), weakref.WeakSet()
+        for thread_connections in threads:
+            thread_connections.close()
+        self._local = threading.local()
+
+
+_connection_manager = ConnectionManager()
+
+
+def get_connection():
+    """
+    Return the calling thread's connection from the process-wide ConnectionManager.
+    """
+    return _connection_manager.connection()
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def iso_to_epoch_ms(timestamp):
+    """
+    Convert an ISO 8601 timestamp as sent by the exchange (e.g., '2024-01-05T01:11:00.123456Z') to epoch
+    milliseconds. Timestamps without an offset are taken as UTC.
+    Returns:
+    int: The epoch milliseconds, or None if the timestamp is missing or cannot be parsed.
+    """
+    if not timestamp:
+        return None
+    try:
+        # fromisoformat takes at most six fractional digits, the exchange sometimes sends nanoseconds
+        moment = datetime.datetime.fromisoformat(re.sub(r'(\.\d{6})\d+', r'\1', timestamp.replace('Z', '+00:00')))
+    except (AttributeError, ValueError):
+        logger.warning(f"Cannot convert timestamp {timestamp!r} to epoch milliseconds.")
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return (moment - EPOCH) // datetime.timedelta(milliseconds=1)
+
+
+def _add_indexes_and_epoch_times(conn):
+    """Unique order ids, indexes for the lookups and epoch millisecond purchase times."""
+    # Each order is logged once. Duplicates logged before the unique index are moved to the
+    # duplicate_transactions table, keeping the first row of each order.
+    duplicate_rows = '''
+        FROM transactions
+        WHERE order_id IS NOT NULL
+          AND id NOT IN (SELECT MIN(id) FROM transactions WHERE order_id IS NOT NULL GROUP BY order_id)
+    '''
+    duplicates = conn.execute(f'SELECT id, order_id, invested_amount, purchase_time {duplicate_rows}').fetchall()
+    if duplicates:
+        conn.execute(f'CREATE TABLE duplicate_transactions AS SELECT * {duplicate_rows}')
+        conn.execute(f'DELETE {duplicate_rows}')
+        for row_id, order_id, invested_amount, purchase_time in duplicates:
+            logger.warning(f"Moved duplicate transaction {row_id} of order {order_id} ({invested_amount} at "
+                           f"{purchase_time}) to duplicate_transactions.")
+        logger.warning(f"Moved {len(duplicates)} duplicate transactions to the duplicate_transactions table.")
+        # create_database rebuilds the aggregates from the remaining rows
+        conn.execute('DELETE FROM purchase_aggregates')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_order_id ON transactions (order_id)')
+
+    conn.execute('ALTER TABLE transactions ADD COLUMN purchase_time_ms INTEGER')
+    rows = conn.execute('SELECT id, purchase_time FROM transactions').fetchall()
+    conn.executemany('UPDATE transactions SET purchase_time_ms = ? WHERE id = ?',
+                     [(iso_to_epoch_ms(purchase_time), row_id) for row_id, purchase_time in rows])
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_transactions_purchase_time_ms ON transactions (purchase_time_ms)')
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uninvested_balances_month_year ON uninvested_balances (month_year)
+    ''')
+
+
+def _add_write_behind_state(conn):
+    """Sequence number of the last applied write-behind journal entry."""
+    conn.execute('''
+        CREATE TABLE write_behind_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_applied_seq INTEGER NOT NULL
+        )
+    ''')
+
+
+def _add_sync_state(conn):
+    """Resume cursors and watermarks of the exchange synchronisations."""
+    conn.execute('''
+        CREATE TABLE sync_state (
+            name TEXT PRIMARY KEY,
+            cursor TEXT,
+            watermark TEXT,
+            run_watermark TEXT,
+            pending TEXT
+        )
+    ''')
+
+
+# Schema changes applied on top of the tables created by create_database, in order. The database's
+# user_version is the number of migrations it has been through, so append new migrations, never reorder them.
+MIGRATIONS = [
+    _add_indexes_and_epoch_times,
+    _add_write_behind_state,
+    _add_sync_state,
+]
+
+
+def migrate(conn):
+    """
+    Apply the migrations the database has not been through yet, each in its own transaction together with
+    the user_version bump that records it.
+    Returns:
+    int: The schema version of the database afterwards.
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.commit()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Database migration {number} failed: {e}")
+            raise
+        logger.info(f"Migrated database to schema version {number}: {migration.__doc__}")
+        version = number
+    return version
+
 
 def create_database():
-    conn = sqlite3.connect('trading_app.db')
+    conn = get_connection()
     cursor = conn.cursor()
 
     # Existing table for transactions
@@ -40,44 +255,217 @@ def create_database():
         )
     ''')
 
-    conn.commit()
-    conn.close()
+    # Daily closing prices, kept so the previous day's close survives restarts
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_close_prices (
+            product_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            close_price REAL NOT NULL,
+            PRIMARY KEY (product_id, day)
+        )
+    ''')
 
+    # Fear & Greed index history, one row per published value
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fear_greed_index (
+            timestamp INTEGER PRIMARY KEY,
+            value INTEGER NOT NULL,
+            classification TEXT
+        )
+    ''')
 
-def log_transaction(order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type):
-    conn = sqlite3.connect('trading_app.db')
-    cursor = conn.cursor()
+    # Running totals over the transactions table, updated together with every logged transaction
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS purchase_aggregates (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_bitcoin REAL NOT NULL,
+            total_cost REAL NOT NULL,
+            total_invested REAL NOT NULL,
+            purchase_count INTEGER NOT NULL,
+            first_purchase_time TEXT,
+            last_purchase_time TEXT
+        )
+    ''')
 
-    # Inserting the new data into the transactions table
+    # Latest Fear & Greed reading together with the time the provider publishes the next one
     cursor.execute('''
-        INSERT INTO transactions (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type))
+        CREATE TABLE IF NOT EXISTS fear_greed_latest (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL,
+            classification TEXT,
+            timestamp INTEGER NOT NULL,
+            next_update REAL NOT NULL
+        )
+    ''')
 
     conn.commit()
-    conn.close()
+    migrate(conn)
+
+    # Databases created before the aggregates existed start from their full history
+    if cursor.execute('SELECT 1 FROM purchase_aggregates WHERE id = 1').fetchone() is None:
+        rebuild_purchase_aggregates()
+
+
+def log_transaction(order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type):
+    conn = get_connection()
+
+    with conn:
+        insert_transaction(conn, order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+                           transaction_type)
+
+
+def insert_transaction(conn, order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+                       transaction_type):
+    """
+    Insert a transaction and fold it into the aggregates on the caller's connection, without committing.
+    Returns:
+    bool: False if a transaction for the order was already logged.
+    """
+    inserted = conn.execute('''
+        INSERT INTO transactions (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+                                  purchase_time_ms, transaction_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (order_id) DO NOTHING
+    ''', (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+          iso_to_epoch_ms(purchase_time), transaction_type)).rowcount
+    if not inserted:
+        logger.warning(f"Transaction for order {order_id} is already logged.")
+        return False
+    add_to_purchase_aggregates(conn, [(invested_amount, bitcoin_purchased, purchase_price)])
+    return True
+
+
+def insert_transactions(conn, rows):
+    """
+    Insert many transactions with one executemany and fold them into the aggregates, on the caller's connection
+    and without committing. Rows are (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+    transaction_type) tuples for orders that are not logged yet, see get_logged_order_ids.
+    """
+    conn.executemany('''
+        INSERT INTO transactions (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+                                  purchase_time_ms, transaction_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+          iso_to_epoch_ms(purchase_time), transaction_type)
+         for order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type in rows])
+    add_to_purchase_aggregates(conn, [(invested_amount, bitcoin_purchased, purchase_price)
+                                      for _, invested_amount, bitcoin_purchased, purchase_price, _, _ in rows])
+
+
+def get_logged_order_ids(conn, order_ids):
+    """
+    Return the subset of order_ids that already have a transaction.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return set()
+    placeholders = ', '.join('?' * len(order_ids))
+    return {row[0] for row in conn.execute(f'SELECT order_id FROM transactions WHERE order_id IN ({placeholders})',
+                                            order_ids)}
+
+
+# ISO timestamps with and without fractional seconds do not sort as text, so purchases are ordered by epoch time
+FIRST_PURCHASE_TIME = '''(SELECT purchase_time FROM transactions WHERE purchase_time_ms IS NOT NULL
+                        ORDER BY purchase_time_ms LIMIT 1)'''
+LAST_PURCHASE_TIME = '''(SELECT purchase_time FROM transactions WHERE purchase_time_ms IS NOT NULL
+                       ORDER BY purchase_time_ms DESC LIMIT 1)'''
+
+
+def add_to_purchase_aggregates(conn, purchases):
+    """
+    Add purchases given as (invested_amount, bitcoin_purchased, purchase_price) tuples to the running aggregates.
+    Runs on the caller's connection after the caller has inserted the transactions, so it commits or rolls back
+    with them; the first and last purchase times are read back from the inserted rows.
+    """
+    conn.executemany(f'''
+        INSERT INTO purchase_aggregates (id, total_bitcoin, total_cost, total_invested, purchase_count,
+                                         first_purchase_time, last_purchase_time)
+        VALUES (1, COALESCE(?2, 0), COALESCE(?2 * ?3, 0), COALESCE(?1, 0), 1, {FIRST_PURCHASE_TIME},
+                {LAST_PURCHASE_TIME})
+        ON CONFLICT (id) DO UPDATE SET
+            total_bitcoin = total_bitcoin + excluded.total_bitcoin,
+            total_cost = total_cost + excluded.total_cost,
+            total_invested = total_invested + excluded.total_invested,
+            purchase_count = purchase_count + 1,
+            first_purchase_time = excluded.first_purchase_time,
+            last_purchase_time = excluded.last_purchase_time
+    ''', purchases)
+
+
+def rebuild_purchase_aggregates():
+    """
+    Recompute the running aggregates from the whole transactions table, e.g. after editing transactions by hand.
+    Returns:
+    int: Number of transactions aggregated.
+    """
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM purchase_aggregates')
+        conn.execute(f'''
+            INSERT INTO purchase_aggregates (id, total_bitcoin, total_cost, total_invested, purchase_count,
+                                             first_purchase_time, last_purchase_time)
+            SELECT 1, COALESCE(SUM(bitcoin_purchased), 0), COALESCE(SUM(bitcoin_purchased * purchase_price), 0),
+                   COALESCE(SUM(invested_amount), 0), COUNT(*), {FIRST_PURCHASE_TIME}, {LAST_PURCHASE_TIME}
+            FROM transactions
+        ''')
+        count = conn.execute('SELECT purchase_count FROM purchase_aggregates WHERE id = 1').fetchone()[0]
+    logger.info(f"Rebuilt purchase aggregates from {count} transactions.")
+    return count
+
+
+def get_purchase_totals():
+    """Returns the running aggregates as a dict, or None if they have not been built yet."""
+    conn = get_connection()
+    result = conn.execute('''
+        SELECT total_bitcoin, total_cost, total_invested, purchase_count, first_purchase_time, last_purchase_time
+        FROM purchase_aggregates WHERE id = 1
+    ''').fetchone()
+    if result is None:
+        return None
+    return {'total_bitcoin': result[0], 'total_cost': result[1], 'total_invested': result[2],
+            'purchase_count': result[3], 'first_purchase_time': result[4], 'last_purchase_time': result[5]}
+
+
+def get_transactions(start_ms=None, end_ms=None):
+    """
+    Return the transactions with a purchase time in [start_ms, end_ms), oldest first.
+    Parameters:
+    start_ms (int, optional): Start of the range in epoch milliseconds.
+    end_ms (int, optional): End of the range in epoch milliseconds.
+    Returns:
+    list: (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type) tuples.
+    """
+    conn = get_connection()
+    # Open ends are replaced by the widest bounds so the range stays an index seek on purchase_time_ms
+    return conn.execute('''
+        SELECT order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time, transaction_type
+        FROM transactions
+        WHERE purchase_time_ms >= ? AND purchase_time_ms < ?
+        ORDER BY purchase_time_ms
+    ''', (start_ms if start_ms is not None else -2 ** 63,
+          end_ms if end_ms is not None else 2 ** 63 - 1)).fetchall()
 
 
 def log_uninvested_balance(month_year, investment_date, uninvested_amount):
-    conn = sqlite3.connect('trading_app.db')
+    conn = get_connection()
     try:
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            INSERT INTO uninvested_balances (month_year, investment_date, uninvested_amount)
-            VALUES (?, ?, ?)
-        ''', (month_year, investment_date, uninvested_amount))
+        insert_uninvested_balance(conn, month_year, investment_date, uninvested_amount)
 
         conn.commit()
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         conn.rollback()
-    finally:
-        conn.close()
+
+
+def insert_uninvested_balance(conn, month_year, investment_date, uninvested_amount):
+    conn.execute('''
+        INSERT INTO uninvested_balances (month_year, investment_date, uninvested_amount)
+        VALUES (?, ?, ?)
+    ''', (month_year, investment_date, uninvested_amount))
 
 
 def get_uninvested_balances(month_year=None):
-    conn = sqlite3.connect('trading_app.db')
+    conn = get_connection()
     try:
         cursor = conn.cursor()
 
@@ -96,45 +484,87 @@ def get_uninvested_balances(month_year=None):
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         return None
-    finally:
-        conn.close()
 
 
 # New functions to manage the last purchase date
 def get_last_purchase_date():
-    conn = sqlite3.connect('trading_app.db')
+    conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('SELECT last_purchase_date FROM last_purchase ORDER BY id DESC LIMIT 1')
     result = cursor.fetchone()
-    conn.close()
 
     return result[0] if result else None
 
 
 def update_last_purchase_date(date):
-    conn = sqlite3.connect('trading_app.db')
-    cursor = conn.cursor()
+    conn = get_connection()
+
+    with conn:
+        insert_last_purchase_date(conn, date)
 
-    cursor.execute('INSERT INTO last_purchase (last_purchase_date) VALUES (?)', (date,))
-    conn.commit()
-    conn.close()
+
+def insert_last_purchase_date(conn, date):
+    conn.execute('INSERT INTO last_purchase (last_purchase_date) VALUES (?)', (date,))
+
+
+def get_sync_state(name):
+    """
+    Return the state of an exchange synchronisation as a dict with cursor, watermark, run_watermark and pending,
+    or None if it never ran.
+    """
+    conn = get_connection()
+    result = conn.execute('''
+        SELECT cursor, watermark, run_watermark, pending FROM sync_state WHERE name = ?
+    ''', (name,)).fetchone()
+    if result is None:
+        return None
+    return {'cursor': result[0], 'watermark': result[1], 'run_watermark': result[2], 'pending': result[3]}
+
+
+def save_sync_state(conn, name, cursor, watermark, run_watermark=None, pending=None):
+    """
+    Store the state of an exchange synchronisation on the caller's connection, without committing, so it
+    commits together with the rows it describes.
+    """
+    conn.execute('''
+        INSERT INTO sync_state (name, cursor, watermark, run_watermark, pending) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET cursor = excluded.cursor, watermark = excluded.watermark,
+                                         run_watermark = excluded.run_watermark, pending = excluded.pending
+    ''', (name, cursor, watermark, run_watermark, pending))
+
+
+def get_last_applied_seq(conn):
+    """
+    Return the sequence number of the last write-behind journal entry applied to the database.
+    """
+    result = conn.execute('SELECT last_applied_seq FROM write_behind_state WHERE id = 1').fetchone()
+    return result[0] if result else 0
+
+
+def set_last_applied_seq(conn, seq):
+    """
+    Record the last applied write-behind journal entry on the caller's connection, without committing.
+    """
+    conn.execute('''
+        INSERT INTO write_behind_state (id, last_applied_seq) VALUES (1, ?)
+        ON CONFLICT (id) DO UPDATE SET last_applied_seq = excluded.last_applied_seq
+    ''', (seq,))
 
 
 def get_average_buy_price():
     # Connect to the database
-    conn = sqlite3.connect('trading_app.db')
+    conn = get_connection()
     cursor = conn.cursor()
 
-    # Execute a query to calculate the weighted average
+    # Read the weighted average from the running aggregates
     cursor.execute('''
-        SELECT SUM(bitcoin_purchased * purchase_price) / SUM(bitcoin_purchased)
-        FROM transactions
+        SELECT total_cost / total_bitcoin FROM purchase_aggregates WHERE id = 1 AND total_bitcoin > 0
     ''')
 
-    # Fetch the result and close the connection
-    weighted_average_price = cursor.fetchone()[0]
-    conn.close()
+    # Fetch the result
+    result = cursor.fetchone()
+    weighted_average_price = result[0] if result else None
 
     # Format the result to two decimal places
     if weighted_average_price is not None:
@@ -145,16 +575,15 @@ def get_average_buy_price():
 
 def get_last_transaction_date():
     """Retrieves the date of the most recent transaction from the database."""
-    conn = sqlite3.connect('trading_app.db')
+    conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute('''
-        SELECT purchase_time FROM transactions ORDER BY purchase_time DESC LIMIT 1
+        SELECT last_purchase_time FROM purchase_aggregates WHERE id = 1
     ''')
     last_transaction_time = cursor.fetchone()
-    conn.close()
 
-    if last_transaction_time is None:
+    if last_transaction_time is None or last_transaction_time[0] is None:
         return None
 
     # Odstránenie 'Z' a prevod na datetime objekt
@@ -164,3 +593,81 @@ def get_last_transaction_date():
 
     return formatted_date
 
+
+def get_daily_close(product_id, day):
+    """Returns the stored closing price of the product for the day ('YYYY-MM-DD'), or None if unknown."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT close_price FROM daily_close_prices WHERE product_id = ? AND day = ?
+        ''', (product_id, day))
+        result = cursor.fetchone()
+        return result[0] if result else None
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        return None
+
+
+def save_daily_close(product_id, day, close_price):
+    """Stores the closing price of the product for the day ('YYYY-MM-DD')."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO daily_close_prices (product_id, day, close_price)
+            VALUES (?, ?, ?)
+        ''', (product_id, day, close_price))
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        conn.rollback()
+
+
+def get_latest_fear_greed():
+    """Returns the stored latest Fear & Greed reading as a dict, or None if there is none."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT value, classification, timestamp, next_update FROM fear_greed_latest WHERE id = 1')
+        result = cursor.fetchone()
+        if result is None:
+            return None
+        return {'value': result[0], 'classification': result[1], 'timestamp': result[2], 'next_update': result[3]}
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        return None
+
+
+def save_latest_fear_greed(value, classification, timestamp, next_update):
+    """Stores the latest Fear & Greed reading and also records it in the history table."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO fear_greed_latest (id, value, classification, timestamp, next_update)
+            VALUES (1, ?, ?, ?, ?)
+        ''', (value, classification, timestamp, next_update))
+        cursor.execute('''
+            INSERT OR REPLACE INTO fear_greed_index (timestamp, value, classification)
+            VALUES (?, ?, ?)
+        ''', (timestamp, value, classification))
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        conn.rollback()
+
+
+def save_fear_greed_history(rows):
+    """Stores Fear & Greed history rows given as (timestamp, value, classification) tuples."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT OR REPLACE INTO fear_greed_index (timestamp, value, classification)
+            VALUES (?, ?, ?)
+        ''', rows)
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        conn.rollback()
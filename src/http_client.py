@@ -0,0 +1,119 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from logger import Logger
+from rate_limiter import get_rate_limiter, PRIORITY_DEFAULT
+
+try:
+    from config.config import HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+except ImportError:
+    HTTP_POOL_SIZE = 10
+    HTTP_CONNECT_TIMEOUT = 3.05
+    HTTP_READ_TIMEOUT = 10
+
+logger = Logger()
+
+
+class HttpClient:
+    def __init__(self, pool_size=HTTP_POOL_SIZE, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT):
+        """
+        Initialize the HttpClient with a keep-alive session shared by all outgoing requests.
+        Parameters:
+        pool_size (int): Number of kept-alive connections per host (and number of hosts kept pooled).
+        connect_timeout (float): Default seconds to wait for a connection to be established.
+        read_timeout (float): Default seconds to wait for the server to send a response.
+        """
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        logger.info(f"HttpClient initialized with pool size {pool_size}.")
+
+    def request(self, method, url, rate_limit=None, priority=PRIORITY_DEFAULT, caller=None, **kwargs):
+        """
+        Send a request through the pooled session, applying the default timeouts unless given.
+        Parameters:
+        method (str): HTTP method, e.g. 'GET'.
+        url (str): The URL to request.
+        rate_limit (str, optional): Exchange budget (rate_limiter.PUBLIC or PRIVATE) the request counts against.
+        priority (int): Queue priority within the budget, see rate_limiter.
+        caller (str, optional): Name used for the rate limiter wait time counters.
+        kwargs: Any keyword argument accepted by requests.Session.request.
+        Returns:
+        Response: The requests response object.
+        """
+        if rate_limit is not None:
+            get_rate_limiter().acquire(rate_limit, priority, caller)
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code == 429:
+            logger.warning(f"Rate limited on {method} {url} (caller: {caller}), "
+                           f"Retry-After: {response.headers.get('Retry-After')}")
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def warm(self, urls):
+        """
+        Open keep-alive connections ahead of time by requesting a cheap URL on each host, so that DNS, TCP and
+        TLS setup are already done when a latency sensitive request goes out.
+        Parameters:
+        urls (list): One URL per host to warm.
+        Returns:
+        int: Number of hosts that answered.
+        """
+        warmed = 0
+        for url in urls:
+            try:
+                self.session.get(url, timeout=self.timeout).close()
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm connection to {url}: {e}")
+        return warmed
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the process-wide HttpClient, creating it on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+
+def configure(pool_size=HTTP_POOL_SIZE, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT):
+    """
+    Replace the process-wide HttpClient with one using the given pool size and timeouts.
+    """
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HttpClient(pool_size, connect_timeout, read_timeout)
+        return _client
+
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_client().post(url, **kwargs)
+
+
+def warm(urls):
+    return get_client().warm(urls)
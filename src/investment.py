@@ -1,3 +1,4 @@
+import threading
 import time
 import uuid
 from datetime import datetime
@@ -7,23 +8,160 @@ from config.config import API_KEY, MONTHLY_LIMIT, FREQUENCY, TRADING_PAIR, PRIVA
 from config.config import DROP_THRESHOLD
 
 from logger import Logger
-from src.coinbase_api import CoinbaseAdvancedAuth, buy_bitcoin, get_order_details, wait_for_order_completion, get_previous_day_bitcoin_price
-from src.coinbase_api_v2 import CoinbaseWalletAuth, get_euro_balance, get_bitcoin_price_change_week, get_bitcoin_price
-from src.database import log_transaction, log_uninvested_balance, get_last_purchase_date, update_last_purchase_date
-from src.investment_logic import get_fear_and_greed_index, adaptive_average_cost, \
+import http_client
+from coinbase_api import CoinbaseAdvancedAuth, buy_bitcoin, get_order_details, wait_for_order_completion, get_previous_day_bitcoin_price
+from coinbase_api_v2 import CoinbaseWalletAuth, get_euro_balance, get_bitcoin_price_change_week, \
+    invalidate_accounts_snapshot, get_accounts_snapshot
+from database import get_last_purchase_date
+from investment_logic import get_fear_and_greed_index, adaptive_average_cost, \
     adaptive_cost_average_with_market_timing
+from market_bus import TOPIC_TICKER, get_market_bus
+from order_book import OrderBookFeed
+from order_updates import OrderUpdateStream
+from rate_limiter import PRIORITY_DEFAULT
+from server_clock import server_time
+from ticker_feed import TickerFeed, RestPricePoller, current_price
+from write_behind import get_database_writer
+
+try:
+    from config.config import ORDER_UPDATES_WEBSOCKET
+except ImportError:
+    ORDER_UPDATES_WEBSOCKET = False
+
+try:
+    from config.config import PRICE_DROP_TICKER_FEED
+except ImportError:
+    PRICE_DROP_TICKER_FEED = False
+
+try:
+    from config.config import ORDER_BOOK_FEED
+except ImportError:
+    ORDER_BOOK_FEED = False
+
+try:
+    from config.config import PREWARM_LEAD_MINUTES
+except ImportError:
+    PREWARM_LEAD_MINUTES = 1
+
+try:
+    from config.config import MARKET_POLL_INTERVAL
+except ImportError:
+    MARKET_POLL_INTERVAL = None
+
+try:
+    from config.config import MARKET_PRICE_MAX_AGE
+except ImportError:
+    MARKET_PRICE_MAX_AGE = 30
+
+try:
+    from config.config import WRITE_BEHIND_FLUSH_TIMEOUT
+except ImportError:
+    WRITE_BEHIND_FLUSH_TIMEOUT = 30
 
 logger = Logger()
 
+# Hosts on the investment path, warmed before a scheduled run
+PREWARM_URLS = [
+    'https://api.coinbase.com/api/v3/brokerage/time',
+    'https://api.alternative.me/fng/?limit=1',
+]
+
+# A balance snapshot and spot price taken by the prewarm stay usable until the run they were taken for
+PREWARMED_BALANCE_MAX_AGE = (PREWARM_LEAD_MINUTES + 1) * 60
+PREWARMED_PRICE_MAX_AGE = (PREWARM_LEAD_MINUTES + 1) * 60
+
+# Transactions are logged off the order path by the write-behind writer
+database_writer = get_database_writer()
+
+market_bus = get_market_bus()
+_price_subscription = market_bus.subscribe(TOPIC_TICKER, capacity=1)
+
+# Pushes order status changes so fills are noticed without polling; started from main.py when enabled
+order_stream = OrderUpdateStream(API_KEY, PRIVATE_KEY, TRADING_PAIR) if ORDER_UPDATES_WEBSOCKET else None
+
+# Streams the price so that drops are caught as they happen; started from main.py when enabled
+ticker_feed = TickerFeed(TRADING_PAIR, bus=market_bus) if PRICE_DROP_TICKER_FEED else None
+
+# Keeps the level-2 book so the expected fill of a market order is known before placing it; started from main.py
+order_book_feed = OrderBookFeed(TRADING_PAIR) if ORDER_BOOK_FEED else None
+
+# Without a ticker feed, prices are fetched when a consumer finds the bus stale and shared through it; a poller
+# publishing at a fixed interval is only run when MARKET_POLL_INTERVAL is configured. Started from main.py
+price_poller = RestPricePoller(TRADING_PAIR, market_bus, MARKET_POLL_INTERVAL) \
+    if ticker_feed is None and MARKET_POLL_INTERVAL else None
+
+_price_drop_lock = threading.Lock()
+_price_drop_triggered_on = None
+
+# The scheduler, the periodic price drop check and the ticker feed can all start a purchase; they run one at a
+# time, and a day is claimed before its order is placed so a run starting meanwhile does not buy again
+_investment_lock = threading.Lock()
+_purchase_claimed_on = None
+
+# Streamed prices older than this many seconds do not trigger a purchase
+TICK_MAX_AGE = 5
+
+
+def get_current_price(max_age=MARKET_PRICE_MAX_AGE, priority=PRIORITY_DEFAULT):
+    """
+    Return the latest Bitcoin price published on the market bus, falling back to a REST request
+    when nothing has been published within max_age seconds.
+    """
+    return current_price(_price_subscription, market_bus, TRADING_PAIR, max_age, priority)
+
+
+def log_expected_fill(investment_amount):
+    """
+    Log the expected average fill price and slippage of a market buy from the level-2 book, when it is followed.
+    """
+    if order_book_feed is None or not order_book_feed.book.ready:
+        return
+    book = order_book_feed.book
+    expected_price = book.expected_fill_price(investment_amount)
+    mid_price = book.mid_price()
+    if expected_price is None or mid_price is None:
+        logger.warning(f"Order book depth does not cover a €{investment_amount} market buy.")
+        return
+    slippage = (expected_price - mid_price) / mid_price * 100
+    logger.info(f"Expected fill price: €{expected_price:.2f} ({slippage:.3f}% from mid €{mid_price:.2f}).")
+
+
+def prewarm_investment():
+    """
+    Warm the order path shortly before a scheduled investment: open keep-alive connections, load the signing
+    key, and fetch the balances and index values the investment decision needs, so that placing the buy order
+    is the only network round trip left once the amount is decided.
+    """
+    logger.info("Prewarming the investment path.")
+    start = time.perf_counter()
+    try:
+        http_client.warm(PREWARM_URLS)
+        CoinbaseAdvancedAuth(API_KEY, PRIVATE_KEY).get_signing_key()
+        get_accounts_snapshot(CoinbaseWalletAuth(API_KEY_V2, API_SECRET_V2), max_age=0)
+        get_fear_and_greed_index()
+        get_bitcoin_price_change_week()
+    except Exception as e:
+        logger.error(f"Error prewarming the investment path: {e}")
+    logger.info(f"Investment path prewarmed in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
 
 def execute_investment(transaction_type='regular'):
+    with _investment_lock:
+        _execute_investment(transaction_type)
+
+
+def _execute_investment(transaction_type):
+    global _purchase_claimed_on
     logger.info("Starting execute_investment function.")
 
-    # Check the last purchase date before executing the investment
+    # Check the last purchase date before executing the investment, including a purchase still being written
+    if not database_writer.flush(timeout=WRITE_BEHIND_FLUSH_TIMEOUT):
+        logger.error("Earlier purchases are not written to the database yet. Skipping the purchase.")
+        return
     last_purchase_date = get_last_purchase_date()
     today_date = datetime.now().strftime("%Y-%m-%d")
 
-    if last_purchase_date == today_date:
+    if today_date in (last_purchase_date, _purchase_claimed_on):
         logger.info("Bitcoin already purchased today. Skipping the purchase.")
         return
 
@@ -32,7 +170,7 @@ def execute_investment(transaction_type='regular'):
     auth_v2 = CoinbaseWalletAuth(API_KEY_V2, API_SECRET_V2)
 
     index_value = get_fear_and_greed_index()
-    btc_price_change = get_bitcoin_price_change_week()
+    btc_price_change = get_bitcoin_price_change_week(max_age=PREWARMED_PRICE_MAX_AGE)
 
     if INVESTMENT_STRATEGY == 'adaptive_cost_average_with_market_timing':
         investment_amount = adaptive_cost_average_with_market_timing(index_value, btc_price_change, MONTHLY_LIMIT,
@@ -40,50 +178,60 @@ def execute_investment(transaction_type='regular'):
     else:
         investment_amount = adaptive_average_cost(index_value, MONTHLY_LIMIT, FREQUENCY)
 
-    euro_balance = get_euro_balance(auth_v2)
+    euro_balance = get_euro_balance(auth_v2, max_age=PREWARMED_BALANCE_MAX_AGE)
 
-    if euro_balance is None or float(euro_balance) < investment_amount:
+    if euro_balance is None or euro_balance < investment_amount:
         logger.warning(f"Not enough funds. Available balance: €{euro_balance}, Required: €{investment_amount}")
         return
 
     logger.info(f"Available balance: €{euro_balance}")
+    log_expected_fill(investment_amount)
 
     client_order_id = str(uuid.uuid4())
+    previous_claim, _purchase_claimed_on = _purchase_claimed_on, today_date
+    decided_at = time.perf_counter()
     response = buy_bitcoin(API_KEY, private_key, client_order_id, TRADING_PAIR, investment_amount)
+    logger.info(f"Buy order answered {(time.perf_counter() - decided_at) * 1000:.0f} ms after the decision.")
 
-    if response and response.get('status') == 'success':
-        order_id = response['order_id']
+    if response.success:
+        order_id = response.order_id
 
-        if wait_for_order_completion(API_KEY, private_key, order_id):  # Waiting for order completion
-            order_details = get_order_details(API_KEY, private_key, order_id)  # Fetching additional order details
+        if wait_for_order_completion(API_KEY, private_key, order_id,
+                                     order_stream=order_stream):  # Waiting for order completion
+            invalidate_accounts_snapshot()  # Balances changed with the fill
+            order = get_order_details(API_KEY, private_key, order_id)  # Fetching additional order details
 
-            if order_details:
-                log_transaction(
+            if order is not None:
+                database_writer.submit(
+                    'log_transaction',
                     order_id=order_id,
                     invested_amount=investment_amount,
-                    bitcoin_purchased=order_details['filled_size'],
-                    purchase_price=order_details['average_filled_price'],
-                    purchase_time=order_details['created_time'],
+                    bitcoin_purchased=order.filled_size,
+                    purchase_price=order.average_filled_price,
+                    purchase_time=order.created_time,
                     transaction_type=transaction_type
                 )
 
                 # Update the last purchase date after a successful purchase
-                update_last_purchase_date(today_date)
+                database_writer.submit('update_last_purchase_date', date=today_date)
 
-                logger.info(f"Transaction logged: {order_details}")
-                logger.debug(f"Order details: {order_details}")
+                logger.info(f"Transaction logged: {order}")
+                logger.debug(f"Order details: {order}")
 
                 if investment_amount < (MONTHLY_LIMIT/FREQUENCY):
                     uninvested_amount = (MONTHLY_LIMIT/FREQUENCY) - investment_amount
                     current_date = time.strftime("%Y-%m-%d")
                     month_year = time.strftime("%m-%Y")
-                    log_uninvested_balance(month_year, current_date, uninvested_amount)
+                    database_writer.submit('log_uninvested_balance', month_year=month_year,
+                                           investment_date=current_date, uninvested_amount=uninvested_amount)
                     logger.info(f"Uninvested balance {uninvested_amount} logged for {current_date}")
             else:
                 logger.error("Failed to fetch order details for logging.")
         else:
             logger.error("Order was not completed in the expected time frame.")
     else:
+        # No order was placed, so a later run may still buy today
+        _purchase_claimed_on = previous_claim
         logger.error("Buy bitcoin operation failed or incomplete response.")
 
     logger.info("execute_investment function completed.")
@@ -99,7 +247,7 @@ def check_price_drop_and_buy():
     """
     try:
         # Retrieve the current Bitcoin price
-        current_price = get_bitcoin_price()
+        current_price = get_current_price()
         if current_price is None:
             logger.error("Failed to retrieve the current Bitcoin price.")
             return
@@ -126,6 +274,37 @@ def check_price_drop_and_buy():
         logger.error(f"Error in check_price_drop_and_buy: {e}")
 
 
+def check_price_drop_on_tick(current_price, timestamp=None):
+    """
+    Evaluate the price drop condition for a streamed price and start an extraordinary investment
+    the first time per day the drop reaches DROP_THRESHOLD.
+
+    This runs on the ticker feed thread for every price, so it only uses the memoized previous day close
+    and hands the investment itself to a separate thread.
+    """
+    global _price_drop_triggered_on
+    # Tick timestamps come from the exchange clock
+    if timestamp is not None and server_time() - timestamp > TICK_MAX_AGE:
+        return
+    previous_price = get_previous_day_bitcoin_price(API_KEY, PRIVATE_KEY, TRADING_PAIR)
+    if previous_price is None:
+        return
+
+    price_drop = ((previous_price - current_price) / previous_price) * 100
+    if price_drop < DROP_THRESHOLD:
+        return
+
+    today_date = datetime.now().strftime("%Y-%m-%d")
+    with _price_drop_lock:
+        if _price_drop_triggered_on == today_date:
+            return
+        _price_drop_triggered_on = today_date
+
+    logger.info(f"Streamed Bitcoin price drop of {price_drop}% exceeds the threshold. Executing investment.")
+    threading.Thread(target=execute_investment, args=("extraordinary",), name='price-drop-investment',
+                     daemon=True).start()
+
+
 def schedule_price_drop_investment():
     """
     Schedule the price drop check function.
@@ -1,21 +1,109 @@
-import requests
+import threading
+import time
+import http_client
 
+from database import get_latest_fear_greed, save_latest_fear_greed, save_fear_greed_history
 from logger import Logger
+from models import decode_json
+
+try:
+    from config.config import FEAR_GREED_TIMEOUT
+except ImportError:
+    FEAR_GREED_TIMEOUT = 5
 
 logger = Logger()
 
+FEAR_GREED_URL = "https://api.alternative.me/fng/"
+
+# The provider publishes once a day; never trust a time_until_update shorter than this
+MIN_FEAR_GREED_REFRESH = 60
+
+_fear_greed_reading = None
+_fear_greed_lock = threading.Lock()
+
 
 def get_fear_and_greed_index():
-    url = "https://api.alternative.me/fng/"
-    response = requests.get(url)
-    data = response.json()
-    index_value = int(data['data'][0]['value'])
+    reading = get_fear_and_greed_reading()
+    index_value = reading['value']
 
-    logger.info(f"Fear index: {index_value}")
+    if reading['stale']:
+        published = time.strftime('%Y-%m-%d', time.gmtime(reading['timestamp']))
+        logger.warning(f"Fear index: {index_value} (stale, published {published})")
+    else:
+        logger.info(f"Fear index: {index_value}")
 
     return index_value
 
 
+def get_fear_and_greed_reading():
+    """
+    Return the current Fear & Greed reading.
+
+    The value is kept in memory and in the database until the provider's announced update time, so
+    refreshes and restarts do not call the API again. When the provider fails or is slow, the last
+    known value is returned with 'stale' set to True.
+
+    Returns:
+    dict: 'value' (int), 'classification' (str), 'timestamp' (int) and 'stale' (bool).
+    """
+    global _fear_greed_reading
+    with _fear_greed_lock:
+        if _fear_greed_reading is None:
+            _fear_greed_reading = get_latest_fear_greed()
+
+        if _fear_greed_reading is not None and time.time() < _fear_greed_reading['next_update']:
+            return _reading_result(_fear_greed_reading, stale=False)
+
+        try:
+            _fear_greed_reading = _fetch_fear_and_greed()
+            save_latest_fear_greed(_fear_greed_reading['value'], _fear_greed_reading['classification'],
+                                   _fear_greed_reading['timestamp'], _fear_greed_reading['next_update'])
+            return _reading_result(_fear_greed_reading, stale=False)
+        except Exception as e:
+            if _fear_greed_reading is None:
+                raise
+            logger.warning(f"Fear & Greed index unavailable ({e}), using last known value.")
+            return _reading_result(_fear_greed_reading, stale=True)
+
+
+def _reading_result(reading, stale):
+    return {'value': reading['value'], 'classification': reading['classification'],
+            'timestamp': reading['timestamp'], 'stale': stale}
+
+
+def _fetch_fear_and_greed():
+    response = http_client.get(FEAR_GREED_URL, timeout=FEAR_GREED_TIMEOUT)
+    response.raise_for_status()
+    entry = decode_json(response)['data'][0]
+    time_until_update = int(entry.get('time_until_update') or 0)
+    return {
+        'value': int(entry['value']),
+        'classification': entry.get('value_classification'),
+        'timestamp': int(entry['timestamp']),
+        'next_update': time.time() + max(time_until_update, MIN_FEAR_GREED_REFRESH),
+    }
+
+
+def load_fear_and_greed_history(limit=0):
+    """
+    Download the Fear & Greed index history into the fear_greed_index table.
+
+    Parameters:
+    limit (int): Number of most recent days to load, 0 loads the full history.
+
+    Returns:
+    int: Number of rows stored.
+    """
+    response = http_client.get(FEAR_GREED_URL, params={'limit': limit, 'format': 'json'},
+                               timeout=FEAR_GREED_TIMEOUT * 6)
+    response.raise_for_status()
+    rows = [(int(entry['timestamp']), int(entry['value']), entry.get('value_classification'))
+            for entry in decode_json(response)['data']]
+    save_fear_greed_history(rows)
+    logger.info(f"Loaded {len(rows)} Fear & Greed index values.")
+    return len(rows)
+
+
 def adaptive_average_cost(fear_greed_index, monthly_limit, frequency):
     base_amount = monthly_limit / frequency
 
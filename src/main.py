@@ -1,13 +1,25 @@
 import schedule
 import time
+from datetime import datetime, timedelta
 from config.config import INVESTMENT_DAY, CHECK_INTERVAL
-from investment import execute_investment, schedule_price_drop_investment, get_fear_and_greed_index
+from investment import execute_investment, schedule_price_drop_investment, order_stream, ticker_feed, \
+    price_poller, order_book_feed, check_price_drop_on_tick, get_current_price, prewarm_investment, \
+    PREWARM_LEAD_MINUTES
+from investment_logic import get_fear_and_greed_reading
 from logger import Logger
 from database import create_database, get_last_transaction_date, get_average_buy_price
-from coinbase_api_v2 import get_bitcoin_price
 from coinbase_api import get_previous_day_bitcoin_price
 from display.epaper import EPaperDisplayManager
 from config.config import API_KEY, PRIVATE_KEY, TRADING_PAIR
+from concurrent_fetch import fetch_concurrently
+from rate_limiter import PRIORITY_DISPLAY, log_wait_stats
+from server_clock import get_server_clock
+from write_behind import get_database_writer
+
+try:
+    from config.config import DISPLAY_FETCH_DEADLINE
+except ImportError:
+    DISPLAY_FETCH_DEADLINE = 20
 
 logger = Logger()
 
@@ -18,34 +30,57 @@ epaper_display = EPaperDisplayManager()
 def prepare_display_data():
     """
     Fetches and prepares data for display on the e-paper screen.
+    The sources are fetched concurrently; any source that fails or misses DISPLAY_FETCH_DEADLINE is shown as N/A.
     Returns a dictionary with the data for each quadrant.
     """
-    fear_greed_index = get_fear_and_greed_index()
-    bitcoin_price = get_bitcoin_price()
-    average_buy_price = get_average_buy_price()
-    last_transaction = get_last_transaction_date()
-
-    # Retrieve the previous day's Bitcoin price
-    previous_price = get_previous_day_bitcoin_price(API_KEY, PRIVATE_KEY, TRADING_PAIR)
-    if previous_price is None:
+    data = fetch_concurrently({
+        'fear_greed': get_fear_and_greed_reading,
+        'bitcoin_price': lambda: get_current_price(priority=PRIORITY_DISPLAY),
+        'average_buy_price': get_average_buy_price,
+        'last_transaction': get_last_transaction_date,
+        'previous_price': lambda: get_previous_day_bitcoin_price(API_KEY, PRIVATE_KEY, TRADING_PAIR,
+                                                                 priority=PRIORITY_DISPLAY),
+    }, DISPLAY_FETCH_DEADLINE)
+
+    bitcoin_price = data['bitcoin_price']
+    previous_price = data['previous_price']
+
+    if bitcoin_price is None:
+        bitcoin_price_content = [("N/A", "s", "black", "normal")]
+    elif previous_price is None:
         logger.error("Failed to retrieve the previous day's Bitcoin price.")
-        return
-
-    # Calculate the percentage price drop
-    bitcoin_change = ((bitcoin_price - previous_price) / previous_price) * 100
-
-    change_color = "red" if bitcoin_change < 0 else "black"
-    bitcoin_change = "{:.2f}".format(bitcoin_change)
-    bitcoin_price_format = "{:.2f}".format(bitcoin_price)
+        bitcoin_price_content = [("{:.2f}".format(bitcoin_price), "s", "black", "normal")]
+    else:
+        # Calculate the percentage price change
+        bitcoin_change = ((bitcoin_price - previous_price) / previous_price) * 100
+
+        change_color = "red" if bitcoin_change < 0 else "black"
+        bitcoin_change = "{:.2f}".format(bitcoin_change)
+        bitcoin_price_format = "{:.2f}".format(bitcoin_price)
+        bitcoin_price_content = [(f"{bitcoin_price_format}", "s", "black", "normal"),
+                                 (f"{bitcoin_change}%", "s", change_color, "small")]
+
+    fear_greed = data['fear_greed']
+    if fear_greed is None:
+        fear_greed_content = "N/A"
+    elif fear_greed['stale']:
+        # The provider could not be reached, so the value shown is the last known one
+        fear_greed_content = [(f"{fear_greed['value']}", "s", "black", "normal"), (" stale", "s", "red", "small")]
+    else:
+        fear_greed_content = fear_greed['value']
 
     return {
-        "Fear & Greed Index": fear_greed_index,
-        "Bitcoin Price (€)": [(f"{bitcoin_price_format}", "s", "black", "normal"), (f"{bitcoin_change}%", "s", change_color, "small")],
-        "Avg Buy Price (€)": average_buy_price,
-        "Last Transaction": last_transaction
+        "Fear & Greed Index": fear_greed_content,
+        "Bitcoin Price (€)": bitcoin_price_content,
+        "Avg Buy Price (€)": display_value(data['average_buy_price']),
+        "Last Transaction": display_value(data['last_transaction'])
     }
 
 
+def display_value(value):
+    return "N/A" if value is None else value
+
+
 def update_epaper_display():
     logger.info("Updating display.")
     display_data = prepare_display_data()
@@ -55,6 +90,29 @@ def update_epaper_display():
 create_database()
 logger.info("Database created.")
 
+get_database_writer().start()
+logger.info("Write-behind database writer started.")
+
+get_server_clock().start()
+logger.info("Exchange clock tracking started.")
+
+if order_stream is not None:
+    order_stream.start()
+    logger.info("Order update stream started.")
+
+if ticker_feed is not None:
+    ticker_feed.add_listener(check_price_drop_on_tick)
+    ticker_feed.start()
+    logger.info("Ticker feed started for real-time price drop checks.")
+
+if order_book_feed is not None:
+    order_book_feed.start()
+    logger.info("Order book feed started.")
+
+if price_poller is not None:
+    price_poller.start()
+    logger.info("Market data poller started.")
+
 # Check drop and update display
 schedule_price_drop_investment()
 update_epaper_display()
@@ -69,8 +127,13 @@ schedule_map = {
     'sunday': schedule.every().sunday
 }
 
+INVESTMENT_TIME = "01:11"
+
 if INVESTMENT_DAY.lower() in schedule_map:
-    schedule_map[INVESTMENT_DAY.lower()].at("01:11").do(execute_investment)
+    schedule_map[INVESTMENT_DAY.lower()].at(INVESTMENT_TIME).do(execute_investment)
+    prewarm_time = datetime.strptime(INVESTMENT_TIME, "%H:%M") - timedelta(minutes=PREWARM_LEAD_MINUTES)
+    # Each schedule_map entry is a single job, so the prewarm needs a job of its own
+    getattr(schedule.every(), INVESTMENT_DAY.lower()).at(prewarm_time.strftime("%H:%M")).do(prewarm_investment)
     logger.info(f"Investment scheduled on {INVESTMENT_DAY}.")
 else:
     logger.error("Invalid INVESTMENT_DAY. Please choose a day from 'Monday' to 'Sunday'.")
@@ -81,6 +144,9 @@ schedule.every(CHECK_INTERVAL).hours.do(schedule_price_drop_investment)
 # Schedule the e-paper display update function
 schedule.every(CHECK_INTERVAL).hours.do(update_epaper_display)
 
+# Report which callers are held back by the exchange rate limits
+schedule.every(CHECK_INTERVAL).hours.do(log_wait_stats)
+
 logger.info(f"Price drop investment check scheduled every {CHECK_INTERVAL} hour(s).")
 logger.info("E-paper display update scheduled every 2 hours.")
 
@@ -0,0 +1,56 @@
+import argparse
+from config.config import API_KEY, PRIVATE_KEY, TRADING_PAIR
+from backfill import backfill_fills
+from paginators import MAX_PAGE_SIZE
+from database import create_database, rebuild_purchase_aggregates, get_purchase_totals
+from logger import Logger
+
+logger = Logger()
+
+
+def rebuild_aggregates(args):
+    """
+    Recompute the purchase aggregates from the transactions table and print the result.
+    """
+    count = rebuild_purchase_aggregates()
+    totals = get_purchase_totals()
+    print(f"Aggregated {count} transactions: {totals['total_bitcoin']:.8f} BTC for "
+          f"{totals['total_invested']:.2f} invested.")
+
+
+def backfill(args):
+    """
+    Backfill the exchange fills of the product into the transactions table and print the result.
+    """
+    try:
+        inserted, skipped = backfill_fills(API_KEY, PRIVATE_KEY, args.product, page_size=args.page_size,
+                                           full=args.full)
+    except Exception as e:
+        logger.error(f"Fills backfill failed, the next run resumes from the last stored page: {e}")
+        return
+    print(f"Added {inserted} orders, {skipped} already logged.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintenance commands for the trading database.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rebuild = commands.add_parser('rebuild-aggregates',
+                                  help="Recompute the purchase aggregates from the transactions table.")
+    rebuild.set_defaults(handler=rebuild_aggregates)
+
+    fills = commands.add_parser('backfill-fills',
+                                help="Add the exchange fills missing from the transactions table.")
+    fills.add_argument('--product', default=TRADING_PAIR, help="Product to backfill (default: %(default)s).")
+    fills.add_argument('--page-size', type=int, default=MAX_PAGE_SIZE, help="Fills requested per page.")
+    fills.add_argument('--full', action='store_true',
+                       help="Reconcile the whole history instead of only fills newer than the last run.")
+    fills.set_defaults(handler=backfill)
+
+    args = parser.parse_args(argv)
+    create_database()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import threading
+import numpy as np
+
+# Ticks are published as (timestamp, price)
+TOPIC_TICKER = 'ticker'
+# Candles are published as (time, open, high, low, close, volume)
+TOPIC_CANDLE = 'candle'
+
+TOPIC_WIDTHS = {
+    TOPIC_TICKER: 2,
+    TOPIC_CANDLE: 6,
+}
+
+
+class RingBuffer:
+    def __init__(self, capacity, width):
+        """
+        Fixed-capacity buffer of float rows, preallocated once and overwritten oldest first.
+        Parameters:
+        capacity (int): Number of rows kept.
+        width (int): Number of values per row.
+        """
+        self.capacity = capacity
+        self.width = width
+        self._rows = np.zeros((capacity, width), dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, values):
+        with self._lock:
+            self._rows[self._next] = values
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def latest(self, out=None):
+        """
+        Return the newest row, copied into `out` when given, or None if the buffer is empty.
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            row = self._rows[self._next - 1]
+            if out is None:
+                return tuple(row)
+            out[:] = row
+            return out
+
+    def last(self, count, out):
+        """
+        Copy the newest `count` rows into the preallocated array `out` (shape at least (count, width)),
+        oldest first.
+        Returns:
+        int: Number of rows copied, which is less than count while the buffer is filling up.
+        """
+        with self._lock:
+            count = min(count, self._count)
+            start = (self._next - count) % self.capacity
+            first_part = min(count, self.capacity - start)
+            out[:first_part] = self._rows[start:start + first_part]
+            out[first_part:count] = self._rows[:count - first_part]
+            return count
+
+
+class Subscription:
+    def __init__(self, topic, capacity):
+        self.topic = topic
+        self.buffer = RingBuffer(capacity, TOPIC_WIDTHS[topic])
+
+    def latest(self, out=None):
+        return self.buffer.latest(out)
+
+    def last(self, count, out):
+        return self.buffer.last(count, out)
+
+
+class MarketDataBus:
+    def __init__(self):
+        """
+        In-process publish/subscribe bus for market data. One producer publishes each tick or candle once
+        and every subscriber receives it in its own bounded ring buffer, so the number of exchange calls
+        does not grow with the number of consumers.
+        """
+        self._subscriptions = {topic: [] for topic in TOPIC_WIDTHS}
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, capacity=1024):
+        """
+        Create a subscription for the topic. It starts with the most recently published value, if any.
+        Parameters:
+        topic (str): TOPIC_TICKER or TOPIC_CANDLE.
+        capacity (int): Number of values the subscription keeps.
+        Returns:
+        Subscription: The new subscription.
+        """
+        subscription = Subscription(topic, capacity)
+        with self._lock:
+            if topic in self._latest:
+                subscription.buffer.append(self._latest[topic])
+            self._subscriptions[topic] = self._subscriptions[topic] + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.topic] = [s for s in self._subscriptions[subscription.topic]
+                                                       if s is not subscription]
+
+    def has_subscribers(self, topic):
+        return bool(self._subscriptions[topic])
+
+    def publish(self, topic, values):
+        """
+        Publish one row of values to every subscriber of the topic.
+        """
+        with self._lock:
+            self._latest[topic] = values
+            subscriptions = self._subscriptions[topic]
+        for subscription in subscriptions:
+            subscription.buffer.append(values)
+
+
+_market_bus = MarketDataBus()
+
+
+def get_market_bus():
+    """
+    Return the process-wide MarketDataBus.
+    """
+    return _market_bus
@@ -0,0 +1,181 @@
+import json
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def decode_json(response):
+    """
+    Decode the JSON body of a response, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+def loads(text):
+    """
+    Decode a JSON document given as str or bytes, with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _decimal(value):
+    return Decimal(value) if value not in (None, '') else None
+
+
+class Order:
+    __slots__ = ('order_id', 'client_order_id', 'product_id', 'side', 'status', 'filled_size',
+                 'average_filled_price', 'filled_value', 'total_fees', 'created_time')
+
+    def __init__(self, order_id, client_order_id, product_id, side, status, filled_size, average_filled_price,
+                 filled_value, total_fees, created_time):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.product_id = product_id
+        self.side = side
+        self.status = status
+        self.filled_size = filled_size
+        self.average_filled_price = average_filled_price
+        self.filled_value = filled_value
+        self.total_fees = total_fees
+        self.created_time = created_time
+
+    @classmethod
+    def from_json(cls, order):
+        """
+        Build an Order from an order object of the Advanced Trade API, parsing its amounts into Decimals.
+        """
+        return cls(order.get('order_id'), order.get('client_order_id'), order.get('product_id'), order.get('side'),
+                   order.get('status'), _decimal(order.get('filled_size')),
+                   _decimal(order.get('average_filled_price')), _decimal(order.get('filled_value')),
+                   _decimal(order.get('total_fees')), order.get('created_time'))
+
+    def __repr__(self):
+        return (f"Order(order_id={self.order_id!r}, status={self.status!r}, filled_size={self.filled_size}, "
+                f"average_filled_price={self.average_filled_price})")
+
+
+class Fill:
+    __slots__ = ('entry_id', 'trade_id', 'order_id', 'product_id', 'side', 'price', 'size', 'commission',
+                 'trade_time')
+
+    def __init__(self, entry_id, trade_id, order_id, product_id, side, price, size, commission, trade_time):
+        self.entry_id = entry_id
+        self.trade_id = trade_id
+        self.order_id = order_id
+        self.product_id = product_id
+        self.side = side
+        self.price = price
+        self.size = size
+        self.commission = commission
+        self.trade_time = trade_time
+
+    @classmethod
+    def from_json(cls, fill):
+        """
+        Build a Fill from a fill object of the Advanced Trade API, parsing its amounts into Decimals.
+        """
+        return cls(fill.get('entry_id'), fill.get('trade_id'), fill.get('order_id'), fill.get('product_id'),
+                   fill.get('side'), _decimal(fill.get('price')), _decimal(fill.get('size')),
+                   _decimal(fill.get('commission')), fill.get('trade_time'))
+
+    def __repr__(self):
+        return f"Fill(order_id={self.order_id!r}, price={self.price}, size={self.size})"
+
+
+class Candle:
+    __slots__ = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, time, open, high, low, close, volume):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_json(cls, candle):
+        """
+        Build a Candle from a candle object of the Advanced Trade API, with its prices parsed into floats.
+        """
+        return cls(int(candle['start']), float(candle['open']), float(candle['high']), float(candle['low']),
+                   float(candle['close']), float(candle['volume']))
+
+    def as_tuple(self):
+        """
+        Return the candle as a (time, open, high, low, close, volume) tuple, as kept by the candle stores.
+        """
+        return self.time, self.open, self.high, self.low, self.close, self.volume
+
+    def __repr__(self):
+        return f"Candle(time={self.time}, close={self.close})"
+
+
+class Account:
+    __slots__ = ('uuid', 'name', 'type', 'currency', 'balance')
+
+    def __init__(self, uuid, name, type, currency, balance):
+        self.uuid = uuid
+        self.name = name
+        self.type = type
+        self.currency = currency
+        self.balance = balance
+
+    @classmethod
+    def from_json(cls, account):
+        """
+        Build an Account from an account object of the /v2/accounts endpoint, with its balance as a Decimal.
+        """
+        return cls(account.get('id'), account.get('name'), account.get('type'),
+                   (account.get('currency') or {}).get('code'),
+                   _decimal((account.get('balance') or {}).get('amount')))
+
+    def __repr__(self):
+        return f"Account(currency={self.currency!r}, type={self.type!r}, balance={self.balance})"
+
+
+class OrderResult:
+    __slots__ = ('status', 'order_id', 'reason', 'message', 'details')
+
+    def __init__(self, status, order_id=None, reason=None, message=None, details=None):
+        """
+        Outcome of an order request.
+        Parameters:
+        status (str): 'success', 'failure' (rejected by the exchange), 'error' (HTTP error) or 'exception'.
+        order_id (str, optional): The id of the created order.
+        reason (str, optional): The failure reason or error code reported by the exchange.
+        message (str, optional): The error message.
+        details (str, optional): Additional details about the outcome.
+        """
+        self.status = status
+        self.order_id = order_id
+        self.reason = reason
+        self.message = message
+        self.details = details
+
+    @property
+    def success(self):
+        return self.status == 'success'
+
+    @classmethod
+    def from_json(cls, response_data):
+        """
+        Build an OrderResult from the body of a create order response.
+        """
+        if response_data.get('success'):
+            return cls('success', order_id=response_data['success_response']['order_id'],
+                       details="Order successfully created.")
+        return cls('failure', reason=response_data.get('failure_reason'),
+                   details=response_data.get('error_response', {}).get('error_details',
+                                                                        'No additional details provided.'))
+
+    def __repr__(self):
+        return (f"OrderResult(status={self.status!r}, order_id={self.order_id!r}, reason={self.reason!r}, "
+                f"details={self.details!r})")
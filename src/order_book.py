@@ -0,0 +1,223 @@
+import threading
+from bisect import bisect_left, bisect_right
+from websocket_feed import WebSocketFeed
+from logger import Logger
+
+try:
+    from config.config import ORDER_BOOK_MAX_LEVELS
+except ImportError:
+    ORDER_BOOK_MAX_LEVELS = 1000
+
+try:
+    from config.config import ORDER_BOOK_MAX_DISTANCE
+except ImportError:
+    ORDER_BOOK_MAX_DISTANCE = 0.05
+
+logger = Logger()
+
+MARKET_DATA_URL = 'wss://advanced-trade-ws.coinbase.com'
+
+BID = 'bid'
+ASK = 'ask'
+
+
+class BookSide:
+    def __init__(self, side):
+        """
+        One side of the book as two parallel lists kept sorted best level first.
+        Bid prices are stored negated so both sides sort ascending from the best level.
+        """
+        self.sign = -1.0 if side == BID else 1.0
+        self.keys = []
+        self.sizes = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+
+    def set(self, price, size):
+        """
+        Set the size resting at a price level; a size of zero removes the level.
+        """
+        key = self.sign * price
+        index = bisect_left(self.keys, key)
+        found = index < len(self.keys) and self.keys[index] == key
+        if size > 0:
+            if found:
+                self.sizes[index] = size
+            else:
+                self.keys.insert(index, key)
+                self.sizes.insert(index, size)
+        elif found:
+            del self.keys[index]
+            del self.sizes[index]
+
+    def best(self):
+        return self.sign * self.keys[0] if self.keys else None
+
+    def level(self, index):
+        return self.sign * self.keys[index], self.sizes[index]
+
+    def truncate(self, worst_price, max_levels):
+        """
+        Drop the levels beyond worst_price and keep at most max_levels.
+        """
+        cut = min(bisect_right(self.keys, self.sign * worst_price), max_levels)
+        del self.keys[cut:]
+        del self.sizes[cut:]
+
+
+class OrderBook:
+    def __init__(self, product_id, max_levels=ORDER_BOOK_MAX_LEVELS, max_distance=ORDER_BOOK_MAX_DISTANCE):
+        """
+        In-memory level-2 order book for one product.
+
+        Parameters:
+        product_id (str): The product of the book (e.g., 'BTC-EUR').
+        max_levels (int): Maximum number of price levels kept per side.
+        max_distance (float): Levels further than this fraction from the mid price are dropped.
+        """
+        self.product_id = product_id
+        self.max_levels = max_levels
+        self.max_distance = max_distance
+        self.bids = BookSide(BID)
+        self.asks = BookSide(ASK)
+        self.ready = False
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            self.ready = False
+
+    def apply(self, updates, snapshot=False):
+        """
+        Apply a batch of level changes given as (side, price, size) tuples.
+        A snapshot replaces the whole book.
+        """
+        with self._lock:
+            if snapshot:
+                self.bids.clear()
+                self.asks.clear()
+            for side, price, size in updates:
+                (self.bids if side == BID else self.asks).set(price, size)
+            self._truncate()
+            if snapshot:
+                self.ready = True
+
+    def _truncate(self):
+        best_bid, best_ask = self.bids.best(), self.asks.best()
+        if best_bid is None or best_ask is None:
+            return
+        mid = (best_bid + best_ask) / 2
+        self.bids.truncate(mid * (1 - self.max_distance), self.max_levels)
+        self.asks.truncate(mid * (1 + self.max_distance), self.max_levels)
+
+    def best_bid(self):
+        with self._lock:
+            return self.bids.best()
+
+    def best_ask(self):
+        with self._lock:
+            return self.asks.best()
+
+    def mid_price(self):
+        with self._lock:
+            best_bid, best_ask = self.bids.best(), self.asks.best()
+        if best_bid is None or best_ask is None:
+            return None
+        return (best_bid + best_ask) / 2
+
+    def depth_to_size(self, side, base_size):
+        """
+        Walk one side of the book until base_size is covered.
+
+        Parameters:
+        side (str): BID to sell into the bids, ASK to buy from the asks.
+        base_size (float): Amount of base currency to fill.
+
+        Returns:
+        tuple: (worst_price, average_price) of the fill, or None if the kept depth does not cover base_size.
+        """
+        with self._lock:
+            book_side = self.bids if side == BID else self.asks
+            remaining = base_size
+            quote = 0.0
+            for index in range(len(book_side)):
+                price, size = book_side.level(index)
+                filled = min(size, remaining)
+                quote += filled * price
+                remaining -= filled
+                if remaining <= 0:
+                    return price, quote / base_size
+        return None
+
+    def expected_fill_price(self, quote_amount):
+        """
+        Estimate the average price of a market buy spending quote_amount, as placed by buy_bitcoin.
+
+        Returns:
+        float: The expected average fill price, or None if the kept depth does not cover quote_amount.
+        """
+        with self._lock:
+            remaining = quote_amount
+            base = 0.0
+            for index in range(len(self.asks)):
+                price, size = self.asks.level(index)
+                spent = min(size * price, remaining)
+                base += spent / price
+                remaining -= spent
+                if remaining <= 0:
+                    return quote_amount / base
+        return None
+
+
+class OrderBookFeed(WebSocketFeed):
+    def __init__(self, product_id, url=MARKET_DATA_URL, book=None, **kwargs):
+        """
+        Keep an OrderBook up to date from the Advanced Trade level2 channel: the snapshot sent on subscribe
+        followed by incremental updates. A gap in the message sequence drops the connection, so the book is
+        rebuilt from a fresh snapshot instead of drifting.
+
+        Parameters:
+        product_id (str): The product to follow (e.g., 'BTC-EUR').
+        url (str): The market data WebSocket URL.
+        book (OrderBook, optional): The book to maintain; a new one is created if omitted.
+        """
+        super().__init__(url, **kwargs)
+        self.product_id = product_id
+        self.book = book if book is not None else OrderBook(product_id)
+        self._sequence = None
+
+    def subscribe_messages(self):
+        return [
+            {"type": "subscribe", "channel": "level2", "product_ids": [self.product_id]},
+            {"type": "subscribe", "channel": "heartbeats"},
+        ]
+
+    def on_disconnected(self):
+        self._sequence = None
+        self.book.reset()
+
+    def handle_message(self, message):
+        sequence = message.get('sequence_num')
+        if sequence is not None:
+            if self._sequence is not None and sequence != self._sequence + 1:
+                logger.warning(f"Order book sequence gap ({self._sequence} -> {sequence}), resubscribing.")
+                self._ws.close()
+                return
+            self._sequence = sequence
+
+        if message.get('channel') != 'l2_data':
+            return
+        for event in message.get('events', []):
+            if event.get('product_id') != self.product_id:
+                continue
+            updates = [(BID if update['side'] == 'bid' else ASK, float(update['price_level']),
+                        float(update['new_quantity']))
+                       for update in event.get('updates', [])]
+            self.book.apply(updates, snapshot=event.get('type') == 'snapshot')
@@ -0,0 +1,87 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from coinbase_api import get_auth, TERMINAL_ORDER_STATUSES
+from websocket_feed import WebSocketFeed
+from logger import Logger
+
+logger = Logger()
+
+USER_CHANNEL_URL = 'wss://advanced-trade-ws-user.coinbase.com'
+
+# Number of terminal order statuses remembered for orders nobody is watching yet
+TERMINAL_HISTORY_SIZE = 256
+
+
+class OrderUpdateStream(WebSocketFeed):
+    # Until the user channel subscription is confirmed, order waits poll REST instead of relying on the stream
+    awaits_subscription_confirmation = True
+
+    def __init__(self, api_key, private_key, product_id, url=USER_CHANNEL_URL, **kwargs):
+        """
+        Subscribe to the Advanced Trade user channel and resolve a future per order once the exchange
+        reports a terminal status for it.
+
+        Parameters:
+        api_key (str): API key for Coinbase Advanced Trading API.
+        private_key (str): Private key for generating the JWT.
+        product_id (str): The product whose orders are followed (e.g., 'BTC-EUR').
+        url (str): The user channel WebSocket URL.
+        """
+        super().__init__(url, **kwargs)
+        self.auth = get_auth(api_key, private_key)
+        self.product_id = product_id
+        self._lock = threading.Lock()
+        self._watched = {}
+        self._terminal = OrderedDict()
+
+    def subscribe_messages(self):
+        jwt_token = self.auth.generate_websocket_jwt()
+        return [
+            {"type": "subscribe", "channel": "user", "product_ids": [self.product_id], "jwt": jwt_token},
+            {"type": "subscribe", "channel": "heartbeats", "jwt": jwt_token},
+        ]
+
+    def watch(self, order_id):
+        """
+        Return a Future that resolves to the terminal status of the order.
+        """
+        with self._lock:
+            future = self._watched.get(order_id)
+            if future is None:
+                future = Future()
+                self._watched[order_id] = future
+                if order_id in self._terminal:
+                    future.set_result(self._terminal[order_id])
+            return future
+
+    def unwatch(self, order_id):
+        with self._lock:
+            self._watched.pop(order_id, None)
+
+    def handle_message(self, message):
+        if message.get('type') == 'error':
+            logger.error(f"User channel error: {message.get('message')}")
+            return
+        if message.get('channel') == 'subscriptions':
+            if any('user' in event.get('subscriptions', {}) for event in message.get('events', [])):
+                logger.info("User channel subscription confirmed.")
+                self.mark_connected()
+            return
+        if message.get('channel') != 'user':
+            return
+        for event in message.get('events', []):
+            for order in event.get('orders', []):
+                status = order.get('status')
+                if status in TERMINAL_ORDER_STATUSES:
+                    self._resolve(order['order_id'], status)
+
+    def _resolve(self, order_id, status):
+        with self._lock:
+            self._terminal[order_id] = status
+            if len(self._terminal) > TERMINAL_HISTORY_SIZE:
+                self._terminal.popitem(last=False)
+            future = self._watched.get(order_id)
+        if future is not None and not future.done():
+            logger.info(f"Order {order_id} reached status {status}.")
+            future.set_result(status)
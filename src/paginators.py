@@ -0,0 +1,168 @@
+import queue
+import threading
+import http_client
+from coinbase_api import get_auth
+from logger import Logger
+from models import Order, Fill, decode_json
+from rate_limiter import PRIVATE, PRIORITY_DEFAULT
+from retry import call_with_retry, READ_RETRY
+
+logger = Logger()
+
+BROKERAGE_URL = 'https://api.coinbase.com'
+ORDERS_PATH = '/api/v3/brokerage/orders/historical/batch'
+FILLS_PATH = '/api/v3/brokerage/orders/historical/fills'
+
+# Largest page the list endpoints accept
+MAX_PAGE_SIZE = 1000
+
+
+def iter_pages(api_key, private_key, path, rows_key, params, page_size=MAX_PAGE_SIZE, cursor=None,
+               priority=PRIORITY_DEFAULT):
+    """
+    Follow the cursor of a brokerage list endpoint lazily, requesting a page only when the previous one
+    has been consumed.
+
+    Parameters:
+    api_key (str): API key for Coinbase Advanced Trading API.
+    private_key (str): Private key for generating the JWT.
+    path (str): The endpoint path, e.g. FILLS_PATH.
+    rows_key (str): Key of the row list in the response, e.g. 'fills'.
+    params (dict): Query parameters other than limit and cursor.
+    page_size (int): Rows requested per page.
+    cursor (str, optional): Cursor to resume from, as yielded with an earlier page.
+    priority (int): Rate limiter priority of the requests.
+
+    Yields:
+    tuple: (rows, next_cursor) with the raw rows of one page and the cursor of the page after it,
+    or None after the last page.
+    """
+    auth = get_auth(api_key, private_key)
+    while True:
+        page_params = dict(params, limit=page_size)
+        if cursor:
+            page_params['cursor'] = cursor
+
+        def send():
+            jwt_token = auth.generate_jwt('GET', 'api.coinbase.com', path, 'retail_rest_api_proxy')
+            return http_client.get(BROKERAGE_URL + path, headers={"Authorization": f"Bearer {jwt_token}"},
+                                   params=page_params, rate_limit=PRIVATE, priority=priority, caller=rows_key)
+
+        response = call_with_retry(send, READ_RETRY, f'list {rows_key}')
+        response.raise_for_status()
+        page = decode_json(response)
+        # The orders endpoint says has_next explicitly; the fills endpoint ends with an empty cursor
+        cursor = page.get('cursor') or None
+        if page.get('has_next') is False:
+            cursor = None
+        yield page.get(rows_key, []), cursor
+        if cursor is None:
+            return
+
+
+def iter_order_pages(api_key, private_key, product_id=None, order_status=None, start_date=None, end_date=None,
+                     page_size=MAX_PAGE_SIZE, cursor=None):
+    """
+    Yield the historical orders page by page as (orders, next_cursor), newest first.
+
+    Parameters:
+    product_id (str, optional): Only orders of this product (e.g., 'BTC-EUR').
+    order_status (list, optional): Only orders with these statuses, e.g. ['FILLED'].
+    start_date (str, optional): RFC3339 start of the order creation time range.
+    end_date (str, optional): RFC3339 end of the order creation time range.
+    """
+    params = {'product_ids': product_id, 'order_status': order_status, 'start_date': start_date,
+              'end_date': end_date}
+    for rows, next_cursor in iter_pages(api_key, private_key, ORDERS_PATH, 'orders',
+                                        {key: value for key, value in params.items() if value is not None},
+                                        page_size, cursor):
+        yield [Order.from_json(row) for row in rows], next_cursor
+
+
+def iter_fill_pages(api_key, private_key, product_id=None, order_ids=None, start=None, end=None,
+                    page_size=MAX_PAGE_SIZE, cursor=None):
+    """
+    Yield the historical fills page by page as (fills, next_cursor), newest first.
+
+    Parameters:
+    product_id (str, optional): Only fills of this product (e.g., 'BTC-EUR').
+    order_ids (list, optional): Only fills of these orders.
+    start (str, optional): RFC3339 start of the fill time range.
+    end (str, optional): RFC3339 end of the fill time range.
+    """
+    params = {'product_ids': product_id, 'order_ids': order_ids, 'start_sequence_timestamp': start,
+              'end_sequence_timestamp': end}
+    for rows, next_cursor in iter_pages(api_key, private_key, FILLS_PATH, 'fills',
+                                        {key: value for key, value in params.items() if value is not None},
+                                        page_size, cursor):
+        yield [Fill.from_json(row) for row in rows], next_cursor
+
+
+def list_orders(api_key, private_key, **kwargs):
+    """
+    Yield every historical Order matching the filters of iter_order_pages, one page in memory at a time.
+    """
+    for orders, _ in iter_order_pages(api_key, private_key, **kwargs):
+        yield from orders
+
+
+def list_fills(api_key, private_key, **kwargs):
+    """
+    Yield every historical Fill matching the filters of iter_fill_pages, one page in memory at a time.
+    """
+    for fills, _ in iter_fill_pages(api_key, private_key, **kwargs):
+        yield from fills
+
+
+_DONE = object()
+
+
+def stream_concurrently(iterators, buffer_size=2):
+    """
+    Drain several iterators (e.g. paginators over different products or time ranges) on their own threads
+    and yield their items as they arrive. Each iterator runs at most buffer_size items ahead of the consumer,
+    so memory stays bounded however long the cursors are.
+
+    Parameters:
+    iterators (list): The iterators to drain.
+    buffer_size (int): Items each iterator may produce ahead of the consumer.
+
+    Yields:
+    The items of all iterators, interleaved in arrival order.
+
+    Raises:
+    Exception: The first error raised by any of the iterators.
+    """
+    items = queue.Queue()
+    slots = [threading.Semaphore(buffer_size) for _ in iterators]
+    stopped = threading.Event()
+
+    def drain(index, iterator):
+        try:
+            for item in iterator:
+                while not slots[index].acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                items.put((index, item, None))
+            items.put((index, _DONE, None))
+        except Exception as e:
+            items.put((index, _DONE, e))
+
+    threads = [threading.Thread(target=drain, args=(index, iterator), name=f'paginator-{index}', daemon=True)
+               for index, iterator in enumerate(iterators)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        running = len(threads)
+        while running:
+            index, item, error = items.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                running -= 1
+                continue
+            slots[index].release()
+            yield item
+    finally:
+        stopped.set()
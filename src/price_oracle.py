@@ -0,0 +1,255 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import http_client
+from logger import Logger
+from models import decode_json
+from rate_limiter import PUBLIC, PRIORITY_DEFAULT
+
+try:
+    from config.config import PRICE_ORACLE_SOURCES
+except ImportError:
+    PRICE_ORACLE_SOURCES = ['coinbase_spot', 'coinbase_best_bid_ask', 'coingecko']
+
+try:
+    from config.config import PRICE_ORACLE_LOCAL_URL
+except ImportError:
+    PRICE_ORACLE_LOCAL_URL = None
+
+try:
+    from config.config import PRICE_ORACLE_DEADLINE
+except ImportError:
+    PRICE_ORACLE_DEADLINE = 10
+
+logger = Logger()
+
+# Weight of the newest observation in the latency and error averages
+EWMA_ALPHA = 0.2
+# Sources whose error average is above this are only tried after the healthy ones
+MAX_ERROR_RATE = 0.5
+# Hedge delay used until a source has enough latency samples for a p90
+DEFAULT_HEDGE_DELAY = 1.0
+MIN_LATENCY_SAMPLES = 5
+LATENCY_WINDOW = 50
+
+COINGECKO_IDS = {'BTC': 'bitcoin', 'ETH': 'ethereum'}
+
+
+class PriceSource(ABC):
+    def __init__(self, name):
+        """
+        A spot price source with running latency and error statistics.
+        Subclasses implement fetch(product_id, priority) returning the price as a float.
+        """
+        self.name = name
+        self.latency = None
+        self.error_rate = 0.0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._started = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def fetch(self, product_id, priority):
+        """
+        Return the spot price of the product as a float, raising on failure.
+        """
+
+    def begin(self):
+        """
+        Claim the source for a request.
+        Returns:
+        bool: False if its previous request is still outstanding.
+        """
+        with self._lock:
+            if self._started is not None:
+                return False
+            self._started = time.monotonic()
+            return True
+
+    def record(self, latency, failed):
+        """
+        Fold the outcome of a request into the statistics and release the source for the next one. Failed and
+        timed-out requests count towards the latency average too, so a source that hangs is ranked last.
+        """
+        with self._lock:
+            self._started = None
+            self.error_rate += EWMA_ALPHA * ((1.0 if failed else 0.0) - self.error_rate)
+            self.latency = latency if self.latency is None else \
+                self.latency + EWMA_ALPHA * (latency - self.latency)
+            if not failed:
+                self._latencies.append(latency)
+
+    def expected_latency(self):
+        """
+        Return the latency average, or the age of the outstanding request if that is longer.
+        """
+        with self._lock:
+            latency = self.latency or 0
+            if self._started is not None:
+                latency = max(latency, time.monotonic() - self._started)
+            return latency
+
+    def p90_latency(self):
+        """
+        Return the 90th percentile of the recent successful latencies, or None without enough samples.
+        """
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[math.ceil(len(latencies) * 0.9) - 1]
+
+    def healthy(self):
+        return self.error_rate <= MAX_ERROR_RATE
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, latency={self.latency}, error_rate={self.error_rate:.2f})"
+
+
+class SpotPriceSource(PriceSource):
+    def __init__(self, name, base_url='https://api.coinbase.com', rate_limit=PUBLIC):
+        """
+        Coinbase v2 spot price endpoint, or a stand-in serving the same response format under base_url.
+        """
+        super().__init__(name)
+        self.base_url = base_url
+        self.rate_limit = rate_limit
+
+    def fetch(self, product_id, priority):
+        response = http_client.get(f'{self.base_url}/v2/prices/{product_id}/spot', rate_limit=self.rate_limit,
+                                   priority=priority, caller=f'price_oracle.{self.name}')
+        response.raise_for_status()
+        return float(decode_json(response)['data']['amount'])
+
+
+class BestBidAskSource(PriceSource):
+    def fetch(self, product_id, priority):
+        """
+        Mid of the best bid and ask from the public Advanced Trade product ticker.
+        """
+        response = http_client.get(f'https://api.coinbase.com/api/v3/brokerage/market/products/{product_id}/ticker',
+                                   params={'limit': 1}, rate_limit=PUBLIC, priority=priority,
+                                   caller=f'price_oracle.{self.name}')
+        response.raise_for_status()
+        data = decode_json(response)
+        return (float(data['best_bid']) + float(data['best_ask'])) / 2
+
+
+class CoinGeckoSource(PriceSource):
+    def fetch(self, product_id, priority):
+        base, quote = product_id.split('-')
+        coin = COINGECKO_IDS[base]
+        response = http_client.get('https://api.coingecko.com/api/v3/simple/price',
+                                   params={'ids': coin, 'vs_currencies': quote.lower()})
+        response.raise_for_status()
+        return float(decode_json(response)[coin][quote.lower()])
+
+
+def default_sources():
+    """
+    Build the sources named in PRICE_ORACLE_SOURCES, plus the local stand-in when PRICE_ORACLE_LOCAL_URL is set.
+    """
+    factories = {
+        'coinbase_spot': lambda: SpotPriceSource('coinbase_spot'),
+        'coinbase_best_bid_ask': lambda: BestBidAskSource('coinbase_best_bid_ask'),
+        'coingecko': lambda: CoinGeckoSource('coingecko'),
+    }
+    sources = [factories[name]() for name in PRICE_ORACLE_SOURCES]
+    if PRICE_ORACLE_LOCAL_URL:
+        sources.append(SpotPriceSource('local', base_url=PRICE_ORACLE_LOCAL_URL, rate_limit=None))
+    return sources
+
+
+class PriceOracle:
+    def __init__(self, sources, deadline=PRICE_ORACLE_DEADLINE):
+        """
+        Spot price from several sources with hedged requests.
+
+        The preferred source is asked first. If it has not answered within its observed p90 latency, the next
+        source is asked as well, and the first good answer wins. A failed request immediately moves on to the
+        next source. Sources are preferred healthy first, then by their latency average.
+
+        Parameters:
+        sources (list): PriceSource instances to query.
+        deadline (float): Seconds after which get_price gives up.
+        """
+        self.sources = sources
+        self.deadline = deadline
+        # A source is only asked again once its previous request has finished, so one worker per source is
+        # enough even while abandoned requests are still running
+        self._executor = ThreadPoolExecutor(max_workers=max(len(sources), 1), thread_name_prefix='price')
+
+    def ranked_sources(self):
+        return sorted(self.sources, key=lambda source: (not source.healthy(), source.expected_latency()))
+
+    def _timed_fetch(self, source, product_id, priority):
+        start = time.monotonic()
+        try:
+            price = source.fetch(product_id, priority)
+        except Exception:
+            source.record(time.monotonic() - start, failed=True)
+            raise
+        source.record(time.monotonic() - start, failed=False)
+        return price
+
+    def get_price(self, product_id, priority=PRIORITY_DEFAULT):
+        """
+        Return the first good spot price for the product.
+
+        Parameters:
+        product_id (str): The product to price (e.g., 'BTC-EUR').
+        priority (int): Rate limiter priority of the exchange requests.
+
+        Returns:
+        float: The price, or None if no source answered within the deadline.
+        """
+        remaining = iter(self.ranked_sources())
+        pending = {}
+        give_up_at = time.monotonic() + self.deadline
+
+        def launch():
+            for source in remaining:
+                # A source still busy with a request abandoned by an earlier call is skipped
+                if source.begin():
+                    pending[self._executor.submit(self._timed_fetch, source, product_id, priority)] = source
+                    return source
+            return None
+
+        source = launch()
+        while pending:
+            timeout = give_up_at - time.monotonic()
+            if timeout <= 0:
+                break
+            if source is not None:
+                # Hedge once the newest request is slower than nine in ten of its source's recent answers
+                timeout = min(source.p90_latency() or DEFAULT_HEDGE_DELAY, timeout)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                answered = pending.pop(future)
+                if future.exception() is None:
+                    logger.debug(f"Price from {answered.name}: {future.result()}")
+                    return future.result()
+                logger.warning(f"Price source {answered.name} failed: {future.exception()}")
+            # Either a source failed or the newest one is slower than usual: ask the next one too
+            source = launch()
+
+        logger.error(f"No price source answered for {product_id}.")
+        return None
+
+
+_price_oracle = None
+_price_oracle_lock = threading.Lock()
+
+
+def get_price_oracle():
+    """
+    Return the process-wide PriceOracle over the configured sources.
+    """
+    global _price_oracle
+    with _price_oracle_lock:
+        if _price_oracle is None:
+            _price_oracle = PriceOracle(default_sources())
+        return _price_oracle
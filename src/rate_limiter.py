@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import threading
+import time
+from logger import Logger
+
+try:
+    from config.config import PUBLIC_RATE_LIMIT, PRIVATE_RATE_LIMIT
+except ImportError:
+    # Coinbase Advanced Trade allows 10 requests/s per IP on public and 30 requests/s per key on private endpoints
+    PUBLIC_RATE_LIMIT = 10
+    PRIVATE_RATE_LIMIT = 30
+
+logger = Logger()
+
+PUBLIC = 'public'
+PRIVATE = 'private'
+
+# Lower value is served first
+PRIORITY_ORDER = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_DISPLAY = 2
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize a token bucket refilled continuously at `rate` tokens per second.
+        Parameters:
+        rate (float): Tokens added per second.
+        capacity (float, optional): Maximum burst size, defaults to one second worth of tokens.
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def consume(self):
+        """
+        Take one token if available.
+        Returns:
+        float: 0 if a token was taken, otherwise the seconds until the next token becomes available.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, budgets):
+        """
+        Initialize the RateLimiter with one token bucket per budget.
+
+        Callers waiting on the same budget are served strictly by priority, then in arrival order.
+
+        Parameters:
+        budgets (dict): Mapping of budget name to its rate in requests per second.
+        """
+        self._buckets = {name: TokenBucket(rate) for name, rate in budgets.items()}
+        self._queues = {name: [] for name in budgets}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._wait_stats = {}
+
+    def acquire(self, budget, priority=PRIORITY_DEFAULT, caller=None):
+        """
+        Block until a request may be sent on the given budget.
+        Parameters:
+        budget (str): Budget name, e.g. PUBLIC or PRIVATE.
+        priority (int): Queue priority, PRIORITY_ORDER is served before PRIORITY_DISPLAY.
+        caller (str, optional): Name under which the wait time is counted.
+        Returns:
+        float: Seconds spent waiting.
+        """
+        start = time.monotonic()
+        entry = (priority, next(self._sequence))
+        with self._condition:
+            queue = self._queues[budget]
+            bucket = self._buckets[budget]
+            heapq.heappush(queue, entry)
+            while True:
+                if queue[0] is entry:
+                    delay = bucket.consume()
+                    if delay == 0:
+                        heapq.heappop(queue)
+                        self._condition.notify_all()
+                        break
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+
+        waited = time.monotonic() - start
+        self._record_wait(caller or budget, waited)
+        return waited
+
+    def _record_wait(self, caller, waited):
+        with self._stats_lock:
+            stats = self._wait_stats.setdefault(caller, {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+            stats['requests'] += 1
+            stats['total_wait'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+
+    def wait_stats(self):
+        """
+        Return per-caller counters of the number of requests and the time they spent queued.
+        """
+        with self._stats_lock:
+            return {caller: dict(stats) for caller, stats in self._wait_stats.items()}
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Return the process-wide RateLimiter for exchange calls, creating it on first use.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter({PUBLIC: PUBLIC_RATE_LIMIT, PRIVATE: PRIVATE_RATE_LIMIT})
+        return _rate_limiter
+
+
+def log_wait_stats():
+    """
+    Log how many requests each caller sent and how long they queued for the rate limit, longest total wait first.
+    """
+    stats = get_rate_limiter().wait_stats()
+    for caller, counters in sorted(stats.items(), key=lambda item: item[1]['total_wait'], reverse=True):
+        logger.info(f"Rate limit waits of {caller}: {counters['requests']} requests, "
+                    f"{counters['total_wait']:.2f}s in total, {counters['max_wait']:.2f}s at most.")
@@ -0,0 +1,103 @@
+import random
+import time
+import requests
+from logger import Logger
+
+logger = Logger()
+
+# Statuses worth another attempt: the request was not processed or the server was temporarily unable to
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Network failures where the request may simply not have arrived
+RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts, base_delay, max_delay, deadline):
+        """
+        Exponential backoff with full jitter, bounded by a number of attempts and an overall deadline.
+        Parameters:
+        max_attempts (int): Maximum number of attempts, including the first one.
+        base_delay (float): Upper bound in seconds of the delay before the first retry, doubling for each retry.
+        max_delay (float): Upper bound in seconds of any single delay.
+        deadline (float): Seconds after the first attempt after which no new attempt is started.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Return the seconds to wait after the given (1-based) failed attempt, honouring a Retry-After hint.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+# Reads are cheap to repeat later and their callers are waiting, so give up quickly
+READ_RETRY = RetryPolicy(max_attempts=2, base_delay=0.25, max_delay=1, deadline=3)
+
+# A missed order waits until the next scheduled run, so orders try much harder
+ORDER_RETRY = RetryPolicy(max_attempts=6, base_delay=0.5, max_delay=8, deadline=45)
+
+
+def is_retryable(response):
+    return response.status_code in RETRYABLE_STATUS_CODES
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(send, policy, caller=None, sleep=time.sleep):
+    """
+    Call send() until it returns a response that is not retryable, retrying network errors and retryable
+    statuses according to the policy.
+
+    send is called again for every attempt, so it should build anything that expires, such as a JWT, itself.
+    Order requests must send the same client_order_id on every attempt, which makes a retry of an order the
+    exchange already accepted return that order instead of placing a second one.
+
+    Parameters:
+    send (callable): Zero-argument callable performing the request and returning the response.
+    policy (RetryPolicy): The retry policy.
+    caller (str, optional): Name used in the log messages.
+    sleep (callable): Function used to wait between attempts.
+
+    Returns:
+    Response: The first non-retryable response, or the last response once the policy is exhausted.
+
+    Raises:
+    Exception: The last network error if the final attempt raised one; other exceptions are not retried.
+    """
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        retry_after = None
+        try:
+            response = send()
+            if not is_retryable(response):
+                return response
+            retry_after = _retry_after(response)
+            failure = f"status {response.status_code}"
+        except RETRYABLE_EXCEPTIONS as e:
+            response = None
+            failure = f"{type(e).__name__}: {e}"
+            error = e
+
+        delay = policy.delay(attempt, retry_after)
+        if attempt >= policy.max_attempts or time.monotonic() - start + delay > policy.deadline:
+            logger.error(f"{caller or 'Request'} failed after {attempt} attempt(s): {failure}")
+            if response is None:
+                raise error
+            return response
+
+        logger.warning(f"{caller or 'Request'} attempt {attempt} failed ({failure}), retrying in {delay:.2f}s.")
+        sleep(delay)
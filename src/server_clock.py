@@ -0,0 +1,138 @@
+import threading
+import time
+import http_client
+from logger import Logger
+from models import decode_json
+from rate_limiter import PUBLIC, PRIORITY_DISPLAY
+
+try:
+    from config.config import SERVER_CLOCK_INTERVAL
+except ImportError:
+    SERVER_CLOCK_INTERVAL = 300
+
+logger = Logger()
+
+TIME_URL = 'https://api.coinbase.com/api/v3/brokerage/time'
+
+# Weight of the newest sample in the smoothed offset and round trip
+EWMA_ALPHA = 0.3
+# Samples whose round trip is this many times the smoothed one say little about the offset and are skipped
+MAX_RTT_FACTOR = 3
+# Round trips below this are all equally good, so jitter among them never causes a skip
+MIN_RTT = 0.05
+# After this many skips in a row the round trip has changed for good, and the next sample is used as the new one
+MAX_SKIPPED_SAMPLES = 3
+# Offsets beyond this many seconds are logged as a warning
+OFFSET_WARNING = 5
+
+
+class ServerClock:
+    def __init__(self, url=TIME_URL, interval=SERVER_CLOCK_INTERVAL):
+        """
+        Estimate the offset between the local clock and the exchange clock by periodically sampling the exchange
+        time endpoint, so that signed requests carry timestamps the exchange accepts even when the local clock
+        drifts.
+
+        Parameters:
+        url (str): The exchange time endpoint.
+        interval (float): Seconds between samples.
+        """
+        self.url = url
+        self.interval = interval
+        self.offset = 0.0
+        self.rtt = None
+        self.samples = 0
+        self.skipped = 0
+        self.last_sample_time = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def now(self):
+        """
+        Return the current exchange time as epoch seconds.
+        """
+        return time.time() + self.offset
+
+    def sample(self):
+        """
+        Take one sample of the exchange clock and fold it into the smoothed offset and round trip.
+        Returns:
+        bool: True if the sample was used.
+        """
+        sent = time.time()
+        response = http_client.get(self.url, rate_limit=PUBLIC, priority=PRIORITY_DISPLAY, caller='ServerClock')
+        received = time.time()
+        response.raise_for_status()
+        server_time = int(decode_json(response)['epochMillis']) / 1000
+
+        rtt = received - sent
+        # The server read its clock about halfway through the round trip
+        offset = server_time - (sent + rtt / 2)
+        with self._lock:
+            if self.rtt is not None and rtt > max(self.rtt, MIN_RTT) * MAX_RTT_FACTOR:
+                if self.skipped < MAX_SKIPPED_SAMPLES:
+                    self.skipped += 1
+                    logger.debug(f"Skipping clock sample with round trip {rtt:.3f}s.")
+                    return False
+                logger.info(f"Round trip to the exchange rose from {self.rtt:.3f}s to {rtt:.3f}s.")
+                self.rtt = rtt
+            self.skipped = 0
+            if self.samples == 0:
+                self.offset, self.rtt = offset, rtt
+            else:
+                self.offset += EWMA_ALPHA * (offset - self.offset)
+                self.rtt += EWMA_ALPHA * (rtt - self.rtt)
+            self.samples += 1
+            self.last_sample_time = received
+
+        if abs(self.offset) > OFFSET_WARNING:
+            logger.warning(f"Local clock is {self.offset:.3f}s off the exchange clock.")
+        else:
+            logger.debug(f"Exchange clock offset {self.offset:.3f}s, round trip {self.rtt:.3f}s.")
+        return True
+
+    def metrics(self):
+        """
+        Return the current estimate as a dict with offset, rtt (seconds), samples and last_sample_time.
+        """
+        with self._lock:
+            return {'offset': self.offset, 'rtt': self.rtt, 'samples': self.samples,
+                    'last_sample_time': self.last_sample_time}
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='ServerClock', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error sampling the exchange clock: {e}")
+            self._stopped.wait(self.interval)
+
+
+_server_clock = ServerClock()
+
+
+def get_server_clock():
+    """
+    Return the process-wide ServerClock.
+    """
+    return _server_clock
+
+
+def server_time():
+    """
+    Return the current exchange time as epoch seconds, as estimated by the process-wide ServerClock.
+    """
+    return _server_clock.now()
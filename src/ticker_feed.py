@@ -0,0 +1,172 @@
+import threading
+import time
+from candle_downloader import download_candles, fetch_candle_window
+from coinbase_api_v2 import get_bitcoin_price
+from database import iso_to_epoch_ms
+from market_bus import TOPIC_TICKER, TOPIC_CANDLE
+from rate_limiter import PRIORITY_DEFAULT
+from websocket_feed import WebSocketFeed
+from logger import Logger
+
+logger = Logger()
+
+MARKET_DATA_URL = 'wss://advanced-trade-ws.coinbase.com'
+
+
+class TickerFeed(WebSocketFeed):
+    def __init__(self, product_id, url=MARKET_DATA_URL, bus=None, **kwargs):
+        """
+        Consume the Advanced Trade ticker channel for one product and keep its latest price in memory.
+
+        Every live price is passed to the registered listeners. After a reconnect, the one-minute candles
+        covering the disconnected period are fetched over REST and published on the bus as history; they
+        are not passed to the listeners, which act on the current price.
+
+        Parameters:
+        product_id (str): The product to follow (e.g., 'BTC-EUR').
+        url (str): The market data WebSocket URL.
+        bus (MarketDataBus, optional): Bus on which ticks and backfilled candles are published.
+        """
+        super().__init__(url, **kwargs)
+        self.product_id = product_id
+        self.bus = bus
+        self.latest_price = None
+        self.latest_time = None
+        self._listeners = []
+        self._disconnected_at = None
+
+    def add_listener(self, listener):
+        """
+        Register a callable invoked as listener(price, timestamp) for every received price, with the epoch seconds
+        at which the exchange sent it. Listeners run on the feed thread and should return quickly.
+        """
+        self._listeners.append(listener)
+
+    def subscribe_messages(self):
+        return [
+            {"type": "subscribe", "channel": "ticker", "product_ids": [self.product_id]},
+            {"type": "subscribe", "channel": "heartbeats"},
+        ]
+
+    def handle_message(self, message):
+        if message.get('channel') != 'ticker':
+            return
+        # Stamped with the exchange's send time, so a price delivered late is recognisable as old
+        sent_at = iso_to_epoch_ms(message.get('timestamp'))
+        timestamp = sent_at / 1000 if sent_at is not None else time.time()
+        for event in message.get('events', []):
+            for ticker in event.get('tickers', []):
+                if ticker.get('product_id') == self.product_id:
+                    self._publish(float(ticker['price']), timestamp)
+
+    def on_connected(self):
+        if self._disconnected_at is not None:
+            gap_start, self._disconnected_at = self._disconnected_at, None
+            threading.Thread(target=self.backfill, args=(gap_start, time.time()), daemon=True).start()
+
+    def on_disconnected(self):
+        self._disconnected_at = self.latest_time if self.latest_time is not None else time.time()
+
+    def backfill(self, start, end):
+        """
+        Publish the one-minute candles between start and end on the bus.
+        """
+        logger.info(f"Backfilling {self.product_id} prices for the {int(end - start)}s the ticker was disconnected.")
+        try:
+            for candles in download_candles(self.product_id, int(start), int(end) + 60, 'ONE_MINUTE', max_workers=2):
+                if self.bus is not None:
+                    for candle in candles:
+                        self.bus.publish(TOPIC_CANDLE, candle)
+        except Exception as e:
+            logger.error(f"Error backfilling ticker gap: {e}")
+
+    def _publish(self, price, timestamp):
+        self.latest_price = price
+        self.latest_time = timestamp
+        if self.bus is not None:
+            self.bus.publish(TOPIC_TICKER, (timestamp, price))
+        self._notify(price, timestamp)
+
+    def _notify(self, price, timestamp):
+        for listener in self._listeners:
+            try:
+                listener(price, timestamp)
+            except Exception as e:
+                logger.error(f"Ticker listener failed: {e}")
+
+
+def current_price(subscription, bus, product_id, max_age, priority=PRIORITY_DEFAULT):
+    """
+    Return the newest price of a TOPIC_TICKER subscription if it is at most max_age seconds old. Otherwise fetch
+    the spot price over REST once and publish it, so the other subscribers get it without a request of their own.
+
+    Parameters:
+    subscription (Subscription): The caller's TOPIC_TICKER subscription.
+    bus (MarketDataBus): The bus the subscription belongs to.
+    product_id (str): The product (e.g., 'BTC-EUR').
+    max_age (float): Seconds a published price stays usable.
+    priority (int): Rate limiter priority of the REST request.
+
+    Returns:
+    float: The price, or None if it could not be fetched.
+    """
+    latest = subscription.latest()
+    if latest is not None and time.time() - latest[0] <= max_age:
+        return latest[1]
+    price = get_bitcoin_price(trading_pair=product_id, priority=priority)
+    if price is not None:
+        bus.publish(TOPIC_TICKER, (time.time(), price))
+    return price
+
+
+class RestPricePoller:
+    def __init__(self, product_id, bus, interval=60):
+        """
+        Publish the spot price on the bus at a fixed interval, for when the WebSocket ticker feed is not used.
+        The newest closed one-minute candles are published as well while anything subscribes to TOPIC_CANDLE.
+
+        Parameters:
+        product_id (str): The product to poll (e.g., 'BTC-EUR').
+        bus (MarketDataBus): Bus on which ticks and candles are published.
+        interval (float): Seconds between polls.
+        """
+        self.product_id = product_id
+        self.bus = bus
+        self.interval = interval
+        self._last_candle_time = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='RestPricePoller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll(self):
+        price = get_bitcoin_price(trading_pair=self.product_id)
+        if price is not None:
+            self.bus.publish(TOPIC_TICKER, (time.time(), price))
+
+        if not self.bus.has_subscribers(TOPIC_CANDLE):
+            self._last_candle_time = None
+            return
+        now = int(time.time()) // 60 * 60
+        start = self._last_candle_time + 60 if self._last_candle_time is not None else now - 60
+        for candle in fetch_candle_window(self.product_id, 'ONE_MINUTE', (start, now)):
+            # The candle starting at `now` is still open
+            if candle[0] < now:
+                self.bus.publish(TOPIC_CANDLE, candle)
+                self._last_candle_time = candle[0]
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error polling market data: {e}")
+            self._stopped.wait(self.interval)
@@ -1,4 +1,4 @@
-import requests
+import http_client
 import numpy as np
 import pandas as pd
 
@@ -20,7 +20,7 @@ def fetch_price_data(coin, days):
     """
     try:
         url = f'https://api.coingecko.com/api/v3/coins/{coin}/market_chart?vs_currency=usd&days={days}'
-        response = requests.get(url)
+        response = http_client.get(url)
         response.raise_for_status()  # Check if the request was successful
         data = response.json()
         prices = [item[1] for item in data['prices']]
@@ -1,8 +1,12 @@
 # Import necessary modules
 import datetime
+import uuid
 
-from coinbase_api import CoinbaseAdvancedAuth, buy_bitcoin, sell_bitcoin, create_stop_order
-from coinbase_api_v2 import CoinbaseWalletAuth, CoinbaseMarketData, get_bitcoin_balance
+from coinbase_api import CoinbaseAdvancedAuth, buy_bitcoin, sell_bitcoin, create_stop_order, get_order_details, \
+    wait_for_order_completion
+from coinbase_api_v2 import CoinbaseWalletAuth, CoinbaseMarketData, get_bitcoin_balance, invalidate_accounts_snapshot
+from candle_downloader import sync_candles
+from candle_store import CandleStore
 from logger import Logger
 from risk_management import RiskManagement
 from trader.trend_signals import generate_signals
@@ -29,6 +33,7 @@ class TradingBot:
         self.auth_v2 = CoinbaseWalletAuth(API_KEY_V2, API_SECRET_V2)
         self.auth = CoinbaseAdvancedAuth(API_KEY, PRIVATE_KEY)
         self.market_data = CoinbaseMarketData(self.auth_v2)
+        self.candle_store = CandleStore(TRADING_PAIR, 'ONE_DAY')
         self.risk_management = RiskManagement(RISK_MANAGEMENT_SETTINGS['stop_loss_percentage'],
                                               RISK_MANAGEMENT_SETTINGS['take_profit_percentage'])
         self.balance = 0
@@ -43,7 +48,9 @@ class TradingBot:
     def execute_trades(self):
         end_date = datetime.datetime.now()
         start_date = end_date - datetime.timedelta(days=TREND_SIGNAL_SETTINGS['long_term_window'])
-        historical_data = self.market_data.get_historical_data(TRADING_PAIR, start_date, end_date)
+        start_timestamp = int(start_date.timestamp())
+        sync_candles(TRADING_PAIR, 'ONE_DAY', self.candle_store, start=start_timestamp)
+        historical_data = self.candle_store.frame(start_timestamp, int(end_date.timestamp()))
 
         signals = generate_signals(historical_data, **TREND_SIGNAL_SETTINGS)
 
@@ -74,11 +81,13 @@ class TradingBot:
 
     def place_buy_order(self):
         try:
-            order_id = 'unique_order_id'
+            order_id = str(uuid.uuid4())
             amount = self.calculate_order_amount('buy')
             response = buy_bitcoin(API_KEY, PRIVATE_KEY, order_id, TRADING_PAIR, amount)
-            if response['status'] == 'success':
-                self.last_purchase_price = float(response['price'])
+            if response.success and wait_for_order_completion(API_KEY, PRIVATE_KEY, response.order_id):
+                invalidate_accounts_snapshot()
+                self.last_purchase_price = float(get_order_details(API_KEY, PRIVATE_KEY,
+                                                                   response.order_id).average_filled_price)
                 # Create stop-loss and take-profit orders
                 stop_loss_price = self.risk_management.calculate_stop_loss(self.last_purchase_price)
                 take_profit_price = self.risk_management.calculate_take_profit(self.last_purchase_price)
@@ -102,7 +111,8 @@ class TradingBot:
         try:
             btc_balance = get_bitcoin_balance(self.auth_v2)
             if btc_balance > 0:
-                response = sell_bitcoin(API_KEY, PRIVATE_KEY, 'sell_all_order', TRADING_PAIR, btc_balance)
+                response = sell_bitcoin(API_KEY, PRIVATE_KEY, str(uuid.uuid4()), TRADING_PAIR, btc_balance)
+                invalidate_accounts_snapshot()
                 logger.info(f'Sold all holdings: {response}')
             else:
                 logger.info('No holdings to sell.')
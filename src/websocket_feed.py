@@ -0,0 +1,120 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+import websocket
+from logger import Logger
+from models import loads
+
+logger = Logger()
+
+
+class WebSocketFeed(ABC):
+    # Feeds whose subscriptions the exchange can reject set this and call mark_connected() once it confirms them
+    awaits_subscription_confirmation = False
+
+    def __init__(self, url, reconnect_delay=1, max_reconnect_delay=30, ping_interval=20):
+        """
+        Base class for a long-lived WebSocket consumer that runs on a background thread and reconnects
+        with exponential backoff whenever the connection drops.
+
+        Subclasses override subscribe_messages() and handle_message(), and may override on_connected()
+        and on_disconnected() to react to connection changes.
+
+        Parameters:
+        url (str): The WebSocket URL, e.g. 'wss://advanced-trade-ws.coinbase.com'.
+        reconnect_delay (float): Seconds to wait before the first reconnect attempt.
+        max_reconnect_delay (float): Upper bound for the reconnect backoff.
+        ping_interval (float): Seconds between keep-alive pings, or 0 to disable them.
+        """
+        self.url = url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.ping_interval = ping_interval
+        self.connected = threading.Event()
+        self._stopped = threading.Event()
+        self._current_delay = reconnect_delay
+        self._ws = None
+        self._thread = None
+
+    def start(self):
+        """
+        Start consuming the feed on a daemon thread.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Close the connection and stop reconnecting.
+        """
+        self._stopped.set()
+        if self._ws is not None:
+            self._ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def subscribe_messages(self):
+        """
+        Return the messages to send every time a connection is established.
+        """
+        return []
+
+    @abstractmethod
+    def handle_message(self, message):
+        """
+        Process one decoded message received from the feed.
+        """
+
+    def on_connected(self):
+        pass
+
+    def on_disconnected(self):
+        pass
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._ws = websocket.WebSocketApp(self.url, on_open=self._on_open, on_message=self._on_message,
+                                              on_error=self._on_error)
+            try:
+                self._ws.run_forever(ping_interval=self.ping_interval or 0)
+            except Exception as e:
+                logger.error(f"{type(self).__name__} connection error: {e}")
+
+            if self.connected.is_set():
+                self.connected.clear()
+                self.on_disconnected()
+
+            if self._stopped.is_set():
+                break
+            logger.warning(f"{type(self).__name__} disconnected, reconnecting in {self._current_delay}s.")
+            self._stopped.wait(self._current_delay)
+            self._current_delay = min(self._current_delay * 2, self.max_reconnect_delay)
+
+    def _on_open(self, ws):
+        for message in self.subscribe_messages():
+            ws.send(json.dumps(message))
+        self._current_delay = self.reconnect_delay
+        logger.info(f"{type(self).__name__} connected to {self.url}.")
+        if not self.awaits_subscription_confirmation:
+            self.mark_connected()
+
+    def mark_connected(self):
+        """
+        Flag the feed as live, i.e. connected with its subscriptions in place.
+        """
+        if self.connected.is_set():
+            return
+        self.connected.set()
+        self.on_connected()
+
+    def _on_message(self, ws, raw_message):
+        try:
+            self.handle_message(loads(raw_message))
+        except Exception as e:
+            logger.error(f"{type(self).__name__} failed to handle message: {e}")
+
+    def _on_error(self, ws, error):
+        logger.error(f"{type(self).__name__} error: {error}")
@@ -0,0 +1,280 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+from database import get_connection, insert_transaction, insert_uninvested_balance, insert_last_purchase_date, \
+    get_last_applied_seq, set_last_applied_seq
+from logger import Logger
+from models import loads
+
+try:
+    from config.config import WRITE_BEHIND_JOURNAL
+except ImportError:
+    WRITE_BEHIND_JOURNAL = 'trading_app.journal'
+
+logger = Logger()
+
+# Most journal entries applied in a single group commit
+MAX_BATCH_SIZE = 100
+# Backoff while the database is locked or otherwise temporarily unable to commit
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 5
+# Once this many entries are applied and nothing is pending, the journal is compacted
+COMPACT_AFTER_ENTRIES = 1000
+
+# Writes the journal can carry, by name, each applied as fn(conn, **args) without committing
+OPERATIONS = {
+    'log_transaction': insert_transaction,
+    'log_uninvested_balance': insert_uninvested_balance,
+    'update_last_purchase_date': insert_last_purchase_date,
+}
+
+_STOP = object()
+
+
+def _is_transient(error):
+    """
+    Tell whether a database error only means that another connection holds the lock, so a retry can succeed.
+    """
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        # Extended result codes keep the primary code in the low byte
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class WriteBehindWriter:
+    def __init__(self, journal_path=WRITE_BEHIND_JOURNAL, max_batch_size=MAX_BATCH_SIZE):
+        """
+        Take database writes off the caller's thread. submit appends the write to a journal file and queues
+        it; a writer thread applies whatever is queued in one transaction (a group commit) and records the
+        sequence number of the last applied entry in the same transaction. After a crash, start replays the
+        journal entries past that sequence number.
+
+        The journal is flushed to the operating system on submit, so a process crash loses nothing. The writer
+        thread fsyncs it once per group commit, so writes a flush() has returned for also survive a power loss.
+
+        Parameters:
+        journal_path (str): Path of the append-only JSON lines journal.
+        max_batch_size (int): Most entries applied in one transaction.
+        """
+        self.journal_path = journal_path
+        self.max_batch_size = max_batch_size
+        self.submitted_seq = 0
+        self.applied_seq = 0
+        self._journal = None
+        self._journal_entries = 0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._applied = threading.Condition()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Replay the journal entries the database has not applied yet, then start the writer thread.
+        """
+        if self.running():
+            return
+        with self._lock:
+            self._replay()
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='WriteBehindWriter', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """
+        Apply everything submitted so far, stop the writer thread and compact the journal.
+        """
+        if not self.running():
+            return
+        self._queue.put(_STOP)
+        # Writes still retrying by then stay in the journal and are replayed on the next start
+        self._stopping.set()
+        self._thread.join(timeout)
+        with self._lock:
+            self._compact()
+            self._journal.close()
+            self._journal = None
+
+    def submit(self, operation, **arguments):
+        """
+        Queue a write without waiting for the database.
+
+        Parameters:
+        operation (str): One of OPERATIONS, e.g. 'log_transaction'.
+        arguments: Keyword arguments of the operation. Decimals are journaled as floats, the way the
+        database stores them.
+
+        Returns:
+        int: The sequence number of the write, to pass to flush.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown write-behind operation {operation!r}.")
+        with self._lock:
+            self.submitted_seq += 1
+            entry = {'seq': self.submitted_seq, 'op': operation, 'args': arguments}
+            if self._journal is None:
+                # Not started: write through, as before the writer existed
+                self._apply([entry])
+                return entry['seq']
+            self._journal.write(json.dumps(entry, default=float) + '\n')
+            self._journal.flush()
+            self._journal_entries += 1
+            self._queue.put(entry)
+            return entry['seq']
+
+    def flush(self, seq=None, timeout=None):
+        """
+        Wait until a write, by default the latest submitted one, is committed to the database.
+
+        Parameters:
+        seq (int, optional): Sequence number returned by submit.
+        timeout (float, optional): Seconds to wait at most.
+
+        Returns:
+        bool: True if the write is committed.
+        """
+        if seq is None:
+            seq = self.submitted_seq
+        with self._applied:
+            return self._applied.wait_for(lambda: self.applied_seq >= seq, timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                entry = self._queue.get(timeout=1)
+            except queue.Empty:
+                if self._journal_entries >= COMPACT_AFTER_ENTRIES:
+                    with self._lock:
+                        if self._queue.empty():
+                            self._compact()
+                continue
+            batch = []
+            # Whatever queued up while the previous commit was running goes into the next one
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+                if len(batch) >= self.max_batch_size:
+                    break
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                try:
+                    os.fsync(self._journal.fileno())
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error syncing the write-behind journal: {e}")
+                self._apply(batch)
+            except Exception as e:
+                # The writes stay in the journal and are replayed on the next start
+                logger.error(f"Error applying {len(batch)} journaled writes: {e}")
+
+    def _commit(self, entries, seq):
+        """
+        Apply entries in one transaction that records seq as applied. Retries with backoff while the database
+        is locked or busy, and raises any other database error.
+
+        Returns:
+        bool: False if the writer was stopped before the commit succeeded.
+        """
+        delay = RETRY_BASE_DELAY
+        while True:
+            conn = get_connection()
+            try:
+                with conn:
+                    for entry in entries:
+                        OPERATIONS[entry['op']](conn, **entry['args'])
+                    set_last_applied_seq(conn, seq)
+                return True
+            except sqlite3.OperationalError as e:
+                if not _is_transient(e):
+                    raise
+                logger.warning(f"Commit of {len(entries)} writes failed ({e}), retrying in {delay:.1f}s.")
+                if self._stopping.wait(delay):
+                    return False
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    def _apply(self, batch):
+        try:
+            committed = self._commit(batch, batch[-1]['seq'])
+            applied_seq = batch[-1]['seq'] if committed else None
+        except sqlite3.Error as e:
+            logger.error(f"Group commit of {len(batch)} writes failed, applying them one by one: {e}")
+            applied_seq = None
+            for entry in batch:
+                try:
+                    committed = self._commit([entry], entry['seq'])
+                except sqlite3.Error as e:
+                    # The write itself is invalid, so no retry can apply it
+                    logger.error(f"Dropping write {entry}: {e}")
+                    committed = self._commit([], entry['seq'])
+                if not committed:
+                    break
+                applied_seq = entry['seq']
+        if applied_seq is not None:
+            with self._applied:
+                self.applied_seq = applied_seq
+                self._applied.notify_all()
+
+    def _replay(self):
+        last_applied = get_last_applied_seq(get_connection())
+        last_seq = last_applied
+        pending = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        entry = loads(line)
+                    except ValueError:
+                        # Only the last line can be torn, by a crash in the middle of an append
+                        logger.warning(f"Skipping unreadable write-behind journal line: {line!r}")
+                        continue
+                    last_seq = max(last_seq, entry['seq'])
+                    if entry['seq'] > last_applied:
+                        pending.append(entry)
+        if pending:
+            logger.info(f"Replaying {len(pending)} write-behind journal entries.")
+            for start in range(0, len(pending), self.max_batch_size):
+                self._apply(pending[start:start + self.max_batch_size])
+        self.submitted_seq = self.applied_seq = last_seq
+        self._compact()
+
+    def _compact(self):
+        """
+        Empty the journal once everything in it is applied and the database file itself is synced.
+        Called with the lock held.
+        """
+        if self.applied_seq < self.submitted_seq:
+            return
+        # synchronous=NORMAL only syncs at checkpoints, so checkpoint before dropping the journal
+        busy, _, _ = get_connection().execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+        if busy:
+            return
+        if self._journal is not None:
+            self._journal.truncate(0)
+        else:
+            open(self.journal_path, 'w').close()
+        self._journal_entries = 0
+
+
+_database_writer = WriteBehindWriter()
+
+
+def get_database_writer():
+    """
+    Return the process-wide WriteBehindWriter.
+    """
+    return _database_writer
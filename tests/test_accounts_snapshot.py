@@ -0,0 +1,63 @@
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from src.coinbase_api_v2 import CoinbaseWalletAuth, get_euro_balance, get_bitcoin_balance, \
+    invalidate_accounts_snapshot
+
+FIRST_PAGE = {
+    'pagination': {'next_uri': '/v2/accounts?limit=100&starting_after=eth'},
+    'data': [
+        {'type': 'wallet', 'currency': {'code': 'ETH'}, 'balance': {'amount': '1.5'}},
+        {'type': 'wallet', 'currency': {'code': 'EUR'}, 'balance': {'amount': '5.00'}},
+        {'type': 'fiat', 'currency': {'code': 'EUR'}, 'balance': {'amount': '250.00'}},
+    ]
+}
+SECOND_PAGE = {
+    'pagination': {'next_uri': None},
+    'data': [
+        {'type': 'wallet', 'currency': {'code': 'BTC'}, 'balance': {'amount': '0.0123'}},
+    ]
+}
+
+
+def response(body):
+    mock_response = MagicMock()
+    mock_response.content = json.dumps(body)
+    return mock_response
+
+
+class TestAccountsSnapshot(unittest.TestCase):
+    def setUp(self):
+        invalidate_accounts_snapshot()
+        self.auth = CoinbaseWalletAuth('api_key', 'api_secret')
+
+    @patch('src.coinbase_api_v2.http_client.get')
+    def test_balances_share_one_paged_fetch(self, mock_get):
+        mock_get.side_effect = [response(FIRST_PAGE), response(SECOND_PAGE)]
+
+        self.assertEqual(get_euro_balance(self.auth), Decimal('250.00'))
+        self.assertEqual(get_bitcoin_balance(self.auth), Decimal('0.0123'))
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args_list[1][0][0],
+                         'https://api.coinbase.com/v2/accounts?limit=100&starting_after=eth')
+
+    @patch('src.coinbase_api_v2.http_client.get')
+    def test_invalidate_forces_refetch(self, mock_get):
+        mock_get.side_effect = [response(SECOND_PAGE), response(FIRST_PAGE), response(SECOND_PAGE)]
+
+        self.assertEqual(get_bitcoin_balance(self.auth), Decimal('0.0123'))
+        invalidate_accounts_snapshot()
+        self.assertEqual(get_euro_balance(self.auth), Decimal('250.00'))
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch('src.coinbase_api_v2.http_client.get')
+    def test_missing_bitcoin_account(self, mock_get):
+        mock_get.return_value = response({'pagination': {}, 'data': []})
+        self.assertEqual(get_bitcoin_balance(self.auth), 0)
+        self.assertIsNone(get_euro_balance(self.auth))
+
+
+if __name__ == '__main__':
+    unittest.main()
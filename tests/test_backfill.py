@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from src.backfill import backfill_fills, group_fills, transaction_row, _fill_from_json
+from src.database import create_database, get_connection, get_sync_state, get_purchase_totals, log_transaction
+from tests.test_coinbase_advanced_auth import generate_private_key
+
+
+def fill(entry_id, order_id, trade_time, side='BUY', price='50000', size='0.001', commission='0.05'):
+    return {'entry_id': entry_id, 'trade_id': entry_id, 'order_id': order_id, 'product_id': 'BTC-EUR', 'side': side,
+            'price': price, 'size': size, 'commission': commission, 'trade_time': trade_time}
+
+
+class FakeFillsEndpoint:
+    """Serves self.fills newest first, page_size per page, honouring start_sequence_timestamp."""
+
+    def __init__(self, fills):
+        self.fills = fills
+        self.requests = []
+        self.fail_at = None
+
+    def __call__(self, url, params, **kwargs):
+        self.requests.append(dict(params))
+        if self.fail_at is not None and len(self.requests) == self.fail_at:
+            raise RuntimeError('connection lost')
+        rows = sorted((row for row in self.fills
+                       if row['trade_time'] >= params.get('start_sequence_timestamp', '')),
+                      key=lambda row: row['trade_time'], reverse=True)
+        start = int(params.get('cursor', 0))
+        end = start + params['limit']
+        response = MagicMock()
+        response.status_code = 200
+        response.content = json.dumps({'fills': rows[start:end], 'cursor': str(end) if end < len(rows) else ''})
+        return response
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        create_database()
+        self.private_key = generate_private_key()
+        # o-2 has three fills that straddle the page boundary at a page size of 2
+        self.endpoint = FakeFillsEndpoint([
+            fill('f-1', 'o-1', '2024-01-05T01:11:00Z'),
+            fill('f-2', 'o-2', '2024-02-05T01:11:00Z', price='40000'),
+            fill('f-3', 'o-2', '2024-02-05T01:11:01Z', price='40000'),
+            fill('f-4', 'o-2', '2024-02-05T01:11:02Z', price='40000'),
+            fill('f-5', 'o-3', '2024-02-10T09:00:00Z', side='SELL'),
+        ])
+        patcher = patch('src.paginators.http_client.get', side_effect=self.endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def transactions(self):
+        return get_connection().execute(
+            'SELECT order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time FROM transactions '
+            'ORDER BY purchase_time').fetchall()
+
+    def test_orders_are_grouped_across_pages(self):
+        self.assertEqual(backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2), (2, 0))
+
+        rows = self.transactions()
+        self.assertEqual([row[0] for row in rows], ['o-1', 'o-2'])
+        self.assertAlmostEqual(rows[1][1], 120.15)
+        self.assertAlmostEqual(rows[1][2], 0.003)
+        self.assertAlmostEqual(rows[1][3], 40000.0)
+        self.assertEqual(rows[1][4], '2024-02-05T01:11:00Z')
+        self.assertEqual(get_purchase_totals()['purchase_count'], 2)
+
+    def test_logged_orders_are_skipped(self):
+        log_transaction('o-1', 50.0, 0.001, 50000.0, '2024-01-05T01:11:00Z', 'regular')
+
+        self.assertEqual(backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2), (1, 1))
+        self.assertEqual(get_purchase_totals()['purchase_count'], 2)
+
+    def test_interrupted_run_resumes_from_stored_cursor(self):
+        self.endpoint.fail_at = 3
+        with self.assertRaises(RuntimeError):
+            backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2)
+        state = get_sync_state('fills')
+        self.assertEqual(state['cursor'], '4')
+        self.assertEqual([row['entry_id'] for row in json.loads(state['pending'])], ['f-4', 'f-3', 'f-2'])
+
+        self.endpoint.fail_at = None
+        backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2)
+
+        self.assertEqual(self.endpoint.requests[-1]['cursor'], '4')
+        rows = self.transactions()
+        self.assertEqual([row[0] for row in rows], ['o-1', 'o-2'])
+        self.assertAlmostEqual(rows[1][2], 0.003)
+
+    def test_later_runs_start_at_the_watermark(self):
+        backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2)
+        self.assertEqual(get_sync_state('fills'), {'cursor': None, 'watermark': '2024-02-10T09:00:00Z',
+                                                   'run_watermark': None, 'pending': None})
+
+        self.endpoint.fills.append(fill('f-6', 'o-4', '2024-03-05T01:11:00Z'))
+        self.endpoint.requests.clear()
+
+        self.assertEqual(backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2), (1, 0))
+        self.assertEqual(len(self.endpoint.requests), 1)
+        self.assertEqual(self.endpoint.requests[0]['start_sequence_timestamp'], '2024-02-10T09:00:00Z')
+        self.assertEqual(get_sync_state('fills')['watermark'], '2024-03-05T01:11:00Z')
+
+    def test_full_run_discards_an_interrupted_run(self):
+        self.endpoint.fail_at = 3
+        with self.assertRaises(RuntimeError):
+            backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2)
+        self.endpoint.fail_at = None
+        self.endpoint.requests.clear()
+
+        self.assertEqual(backfill_fills('key', self.private_key, 'BTC-EUR', page_size=2, full=True), (2, 0))
+
+        self.assertNotIn('cursor', self.endpoint.requests[0])
+        self.assertEqual([row[0] for row in self.transactions()], ['o-1', 'o-2'])
+        self.assertAlmostEqual(self.transactions()[1][2], 0.003)
+
+    def test_purchase_time_is_the_earliest_fill(self):
+        # As strings '...00.500Z' sorts before '...00Z', although it is half a second later
+        row = transaction_row([_fill_from_json(fill('f-1', 'o-1', '2024-02-05T01:11:00.500Z')),
+                               _fill_from_json(fill('f-2', 'o-1', '2024-02-05T01:11:00Z'))])
+
+        self.assertEqual(row[4], '2024-02-05T01:11:00Z')
+
+    def test_interleaved_fills_are_grouped_by_order(self):
+        self.endpoint.fills = [
+            fill('f-1', 'o-1', '2024-01-05T01:11:00Z'),
+            fill('f-2', 'o-2', '2024-01-05T01:11:01Z', price='40000'),
+            fill('f-3', 'o-1', '2024-01-05T01:11:02Z'),
+            fill('f-4', 'o-2', '2024-01-05T01:11:03Z', price='40000'),
+            fill('f-5', 'o-1', '2024-01-05T01:11:04Z'),
+        ]
+
+        self.assertEqual(backfill_fills('key', self.private_key, 'BTC-EUR', page_size=10), (2, 0))
+
+        rows = self.transactions()
+        self.assertEqual([row[0] for row in rows], ['o-1', 'o-2'])
+        self.assertAlmostEqual(rows[0][2], 0.003)
+        self.assertAlmostEqual(rows[1][2], 0.002)
+
+    def test_group_fills_returns_open_group(self):
+        fills = [MagicMock(order_id=order_id) for order_id in ('a', 'a', 'b', 'c', 'c')]
+
+        groups, carried = group_fills(fills[2:], carried=fills[:2])
+
+        self.assertEqual([[f.order_id for f in group] for group in groups], [['a', 'a'], ['b']])
+        self.assertEqual([f.order_id for f in carried], ['c', 'c'])
+
+    def test_group_fills_merges_interleaved_fills(self):
+        fills = [MagicMock(order_id=order_id) for order_id in ('a', 'b', 'a', 'b', 'c')]
+
+        groups, carried = group_fills(fills[1:], carried=fills[:1])
+
+        self.assertEqual([[f.order_id for f in group] for group in groups], [['a', 'a'], ['b', 'b']])
+        self.assertEqual([f.order_id for f in carried], ['c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
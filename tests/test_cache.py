@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.cache import SingleFlightCache
+
+
+class TestSingleFlightCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SingleFlightCache()
+
+    def test_concurrent_callers_share_one_load(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.cache.get('spot', loader, ttl=10)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_value_expires_after_ttl(self):
+        with patch('src.cache.time.monotonic', return_value=100.0):
+            self.cache.get('spot', lambda: 1, ttl=10)
+            self.assertEqual(self.cache.get('spot', lambda: 2, ttl=10), 1)
+        with patch('src.cache.time.monotonic', return_value=111.0):
+            self.assertEqual(self.cache.get('spot', lambda: 2, ttl=10), 2)
+
+    def test_failure_is_cached_for_failure_ttl(self):
+        calls = []
+
+        def failing_loader():
+            calls.append(1)
+            return None
+
+        with patch('src.cache.time.monotonic', return_value=100.0):
+            self.assertIsNone(self.cache.get('close', failing_loader, failure_ttl=60))
+            self.assertIsNone(self.cache.get('close', failing_loader, failure_ttl=60))
+        self.assertEqual(len(calls), 1)
+        with patch('src.cache.time.monotonic', return_value=161.0):
+            self.assertEqual(self.cache.get('close', lambda: 5, failure_ttl=60), 5)
+
+    def test_max_age_overrides_ttl(self):
+        with patch('src.cache.time.monotonic', return_value=100.0):
+            self.cache.get('spot', lambda: 1, ttl=10)
+        with patch('src.cache.time.monotonic', return_value=150.0):
+            self.assertEqual(self.cache.get('spot', lambda: 2, ttl=10, max_age=120), 1)
+            self.assertEqual(self.cache.get('spot', lambda: 2, ttl=10), 2)
+
+    def test_value_without_ttl_is_kept(self):
+        with patch('src.cache.time.monotonic', return_value=100.0):
+            self.cache.get('2024-01-01', lambda: 1)
+        with patch('src.cache.time.monotonic', return_value=10 ** 9):
+            self.assertEqual(self.cache.get('2024-01-01', lambda: 2), 1)
+
+    def test_failures_are_not_cached(self):
+        self.assertIsNone(self.cache.get('spot', lambda: None, ttl=10))
+        self.assertEqual(self.cache.get('spot', lambda: 3, ttl=10), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
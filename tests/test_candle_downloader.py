@@ -0,0 +1,62 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+from src.candle_downloader import split_windows, download_candles, sync_candles, MAX_CANDLES_PER_REQUEST
+
+
+def fake_candles_endpoint(url, params, **kwargs):
+    """Returns one candle per minute between start and end (inclusive), newest first like the exchange."""
+    start, end = int(params['start']), int(params['end'])
+    mock_response = MagicMock()
+    mock_response.content = json.dumps({'candles': [
+        {'start': str(t), 'open': '1', 'high': '2', 'low': '0.5', 'close': str(t), 'volume': '3'}
+        for t in range(end, start - 1, -60)
+    ]})
+    return mock_response
+
+
+class MemoryCandleStore:
+    def __init__(self, candles=None):
+        self.candles = list(candles or [])
+
+    def last_timestamp(self):
+        return self.candles[-1][0] if self.candles else None
+
+    def append(self, candles):
+        self.candles.extend(candles)
+
+
+class TestCandleDownloader(unittest.TestCase):
+    def test_windows_cover_range_within_request_limit(self):
+        windows = split_windows(0, 60 * 1000, 'ONE_MINUTE')
+        self.assertEqual(windows[0][0], 0)
+        self.assertEqual(windows[-1][1], 60 * 1000)
+        for (start, end), (next_start, _) in zip(windows, windows[1:]):
+            self.assertEqual(end, next_start)
+        for start, end in windows:
+            self.assertLessEqual((end - start) // 60, MAX_CANDLES_PER_REQUEST)
+
+    @patch('src.candle_downloader.http_client.get', side_effect=fake_candles_endpoint)
+    def test_download_is_ordered_and_without_duplicates(self, mock_get):
+        times = [candle[0] for window in download_candles('BTC-EUR', 0, 60 * 2000, 'ONE_MINUTE', max_workers=4)
+                 for candle in window]
+        self.assertEqual(times, list(range(0, 60 * 2000, 60)))
+        self.assertEqual(mock_get.call_count, len(split_windows(0, 60 * 2000, 'ONE_MINUTE')))
+
+    @patch('src.candle_downloader.time.time', return_value=60 * 1000 + 30)
+    @patch('src.candle_downloader.http_client.get', side_effect=fake_candles_endpoint)
+    def test_sync_downloads_only_missing_closed_candles(self, mock_get, mock_time):
+        store = MemoryCandleStore([(t, 1, 2, 0.5, t, 3) for t in range(0, 60 * 500, 60)])
+        added = sync_candles('BTC-EUR', 'ONE_MINUTE', store)
+
+        self.assertEqual(added, 500)
+        self.assertEqual([candle[0] for candle in store.candles], list(range(0, 60 * 1000, 60)))
+        self.assertEqual(int(mock_get.call_args_list[0][1]['params']['start']), 60 * 500)
+
+    def test_sync_empty_store_requires_start(self):
+        with self.assertRaises(ValueError):
+            sync_candles('BTC-EUR', 'ONE_MINUTE', MemoryCandleStore())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.candle_store import CandleStore
+
+
+def candles(times):
+    return [(t, 1.0, 2.0, 0.5, float(t), 3.0) for t in times]
+
+
+class TestCandleStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = CandleStore('BTC-EUR', 'ONE_MINUTE', root=self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_empty_store(self):
+        self.assertEqual(len(self.store), 0)
+        self.assertIsNone(self.store.last_timestamp())
+        self.assertEqual(len(self.store.range(0, 100)['time']), 0)
+
+    def test_append_and_reopen(self):
+        self.store.append(candles(range(0, 600, 60)))
+        reopened = CandleStore('BTC-EUR', 'ONE_MINUTE', root=self.tmp.name)
+        self.assertEqual(len(reopened), 10)
+        self.assertEqual(reopened.last_timestamp(), 540)
+
+    def test_append_skips_candles_already_stored(self):
+        self.store.append(candles(range(0, 600, 60)))
+        self.assertEqual(self.store.append(candles(range(300, 900, 60))), 5)
+        np.testing.assert_array_equal(self.store.columns()['time'], np.arange(0, 900, 60))
+
+    def test_range_returns_views_of_mapped_columns(self):
+        self.store.append(candles(range(0, 6000, 60)))
+        selected = self.store.range(120, 300)
+        np.testing.assert_array_equal(selected['time'], [120, 180, 240])
+        np.testing.assert_array_equal(selected['close'], [120.0, 180.0, 240.0])
+        self.assertIsInstance(selected['close'].base, np.memmap)
+
+    def test_tail_and_frame(self):
+        self.store.append(candles(range(0, 600, 60)))
+        np.testing.assert_array_equal(self.store.tail(2)['time'], [480, 540])
+        frame = self.store.frame(0, 180)
+        self.assertEqual(list(frame['price']), [0.0, 60.0, 120.0])
+
+    def test_interrupted_append_is_repaired(self):
+        self.store.append(candles(range(0, 300, 60)))
+        # Simulate a crash after the data columns were written but before the time column
+        with open(os.path.join(self.store.path, 'close.bin'), 'ab') as close_file:
+            close_file.write(np.asarray([999.0], dtype=np.float64).tobytes())
+
+        self.store.append(candles([300]))
+        np.testing.assert_array_equal(self.store.columns()['close'], [0.0, 60.0, 120.0, 180.0, 240.0, 300.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
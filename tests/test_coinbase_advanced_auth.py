@@ -0,0 +1,53 @@
+import unittest
+import jwt
+from unittest.mock import patch
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from src.coinbase_api import CoinbaseAdvancedAuth, get_auth
+
+
+def generate_private_key():
+    key = ec.generate_private_key(ec.SECP256R1())
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode('utf-8')
+
+
+class TestCoinbaseAdvancedAuth(unittest.TestCase):
+    def setUp(self):
+        CoinbaseAdvancedAuth._jwt_cache.clear()
+        self.private_key = generate_private_key()
+        self.auth = CoinbaseAdvancedAuth('organizations/test/apiKeys/test', self.private_key, reuse_margin=10)
+
+    def test_reuses_token_for_same_request(self):
+        first = self.auth.generate_jwt('GET', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
+        second = self.auth.generate_jwt('GET', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
+        self.assertEqual(first, second)
+
+    def test_different_path_gets_new_token(self):
+        first = self.auth.generate_jwt('GET', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
+        second = self.auth.generate_jwt('POST', 'api.coinbase.com', '/api/v3/brokerage/orders', 'retail_rest_api_proxy')
+        self.assertNotEqual(first, second)
+        payload = jwt.decode(second, options={'verify_signature': False})
+        self.assertEqual(payload['uri'], 'POST api.coinbase.com/api/v3/brokerage/orders')
+
+    def test_token_regenerated_within_margin(self):
+        with patch('src.coinbase_api.time.time', return_value=1000.0):
+            first = self.auth.generate_jwt('GET', 'api.coinbase.com', '/path', 'retail_rest_api_proxy')
+        with patch('src.coinbase_api.time.time', return_value=1051.0):
+            second = self.auth.generate_jwt('GET', 'api.coinbase.com', '/path', 'retail_rest_api_proxy')
+        self.assertNotEqual(first, second)
+
+    def test_private_key_parsed_once(self):
+        with patch('src.coinbase_api.serialization.load_pem_private_key',
+                   wraps=serialization.load_pem_private_key) as load_key:
+            other = CoinbaseAdvancedAuth('organizations/test/apiKeys/other', generate_private_key())
+            other.generate_jwt('GET', 'api.coinbase.com', '/a', 'retail_rest_api_proxy')
+            other.generate_jwt('GET', 'api.coinbase.com', '/b', 'retail_rest_api_proxy')
+            self.assertEqual(load_key.call_count, 1)
+
+    def test_get_auth_returns_shared_instance(self):
+        self.assertIs(get_auth('key', self.private_key), get_auth('key', self.private_key))
+
+
+if __name__ == '__main__':
+    unittest.main()
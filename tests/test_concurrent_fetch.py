@@ -0,0 +1,33 @@
+import time
+import unittest
+from src.concurrent_fetch import fetch_concurrently
+
+
+def failing_source():
+    raise ValueError("source unavailable")
+
+
+class TestConcurrentFetch(unittest.TestCase):
+    def test_sources_run_concurrently(self):
+        start = time.monotonic()
+        results = fetch_concurrently({
+            'a': lambda: time.sleep(0.2) or 1,
+            'b': lambda: time.sleep(0.2) or 2,
+            'c': lambda: time.sleep(0.2) or 3,
+        }, deadline=2)
+        self.assertEqual(results, {'a': 1, 'b': 2, 'c': 3})
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_partial_results_when_source_is_slow_or_fails(self):
+        start = time.monotonic()
+        results = fetch_concurrently({
+            'fast': lambda: 'ok',
+            'slow': lambda: time.sleep(1) or 'late',
+            'broken': failing_source,
+        }, deadline=0.2)
+        self.assertEqual(results, {'fast': 'ok', 'slow': None, 'broken': None})
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
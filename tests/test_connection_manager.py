@@ -0,0 +1,80 @@
+import gc
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from src.database import ConnectionManager
+
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = ConnectionManager(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        self.manager.close_all()
+        self.tmp.cleanup()
+
+    def test_connection_is_reused_within_a_thread(self):
+        self.assertIs(self.manager.connection(), self.manager.connection())
+
+    def test_each_thread_gets_its_own_connection(self):
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.manager.connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], self.manager.connection())
+
+    def test_connection_is_closed_when_its_thread_exits(self):
+        other = []
+        thread = threading.Thread(target=lambda: other.append(self.manager.connection()))
+        thread.start()
+        thread.join()
+        gc.collect()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            other[0].execute('SELECT 1')
+
+    def test_close_all_closes_connections_of_running_threads(self):
+        opened, release = threading.Event(), threading.Event()
+        other = []
+
+        def worker():
+            other.append(self.manager.connection())
+            opened.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertTrue(opened.wait(5))
+        self.manager.close_all()
+        release.set()
+        thread.join()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            other[0].execute('SELECT 1')
+
+    def test_wal_and_pragmas_are_applied(self):
+        conn = self.manager.connection()
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('PRAGMA synchronous').fetchone()[0], 1)
+
+    def test_reader_is_not_blocked_by_an_open_write(self):
+        writer = self.manager.connection()
+        writer.execute('CREATE TABLE prices (price REAL)')
+        writer.execute('INSERT INTO prices VALUES (1)')
+        writer.commit()
+        writer.execute('INSERT INTO prices VALUES (2)')  # Transaction left open
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.extend(
+            self.manager.connection().execute('SELECT price FROM prices').fetchall()))
+        thread.start()
+        thread.join(2)
+        self.assertEqual(seen, [(1.0,)])
+        writer.rollback()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from src import investment_logic
+from src.database import create_database
+from src.investment_logic import get_fear_and_greed_index, get_fear_and_greed_reading, load_fear_and_greed_history
+
+
+def index_response(entries):
+    mock_response = MagicMock()
+    mock_response.content = json.dumps({'name': 'Fear and Greed Index', 'data': entries})
+    return mock_response
+
+
+LATEST = [{'value': '27', 'value_classification': 'Fear', 'timestamp': '1700000000', 'time_until_update': '3600'}]
+
+
+class TestFearAndGreedCache(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        create_database()
+        investment_logic._fear_greed_reading = None
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    @patch('src.investment_logic.http_client.get')
+    def test_value_cached_until_next_update(self, mock_get):
+        mock_get.return_value = index_response(LATEST)
+        self.assertEqual(get_fear_and_greed_index(), 27)
+        self.assertEqual(get_fear_and_greed_index(), 27)
+        self.assertEqual(mock_get.call_count, 1)
+
+        with patch('src.investment_logic.time.time', return_value=10 ** 10):
+            get_fear_and_greed_index()
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('src.investment_logic.http_client.get')
+    def test_value_persisted_across_restarts(self, mock_get):
+        mock_get.return_value = index_response(LATEST)
+        get_fear_and_greed_index()
+
+        investment_logic._fear_greed_reading = None
+        self.assertEqual(get_fear_and_greed_index(), 27)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('src.investment_logic.http_client.get')
+    def test_stale_value_served_when_provider_fails(self, mock_get):
+        mock_get.return_value = index_response(LATEST)
+        get_fear_and_greed_index()
+
+        mock_get.side_effect = requests.exceptions.Timeout("read timed out")
+        with patch('src.investment_logic.time.time', return_value=10 ** 10):
+            reading = get_fear_and_greed_reading()
+        self.assertEqual(reading['value'], 27)
+        self.assertTrue(reading['stale'])
+
+    @patch('src.investment_logic.http_client.get')
+    def test_stale_index_is_logged(self, mock_get):
+        mock_get.return_value = index_response(LATEST)
+        get_fear_and_greed_index()
+
+        mock_get.side_effect = requests.exceptions.Timeout("read timed out")
+        with patch('src.investment_logic.time.time', return_value=10 ** 10), \
+                patch.object(investment_logic.logger, 'warning') as mock_warning:
+            self.assertEqual(get_fear_and_greed_index(), 27)
+        self.assertIn('stale, published 2023-11-14', mock_warning.call_args[0][0])
+
+    @patch('src.investment_logic.http_client.get')
+    def test_history_loaded_into_table(self, mock_get):
+        mock_get.return_value = index_response([
+            {'value': '27', 'value_classification': 'Fear', 'timestamp': '1700086400'},
+            {'value': '55', 'value_classification': 'Greed', 'timestamp': '1700000000'},
+        ])
+        self.assertEqual(load_fear_and_greed_history(), 2)
+
+        conn = sqlite3.connect('trading_app.db')
+        rows = conn.execute('SELECT timestamp, value FROM fear_greed_index ORDER BY timestamp').fetchall()
+        conn.close()
+        self.assertEqual(rows, [(1700000000, 55), (1700086400, 27)])
+
+
+if __name__ == '__main__':
+    unittest.main()
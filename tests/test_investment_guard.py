@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from src import investment
+
+
+def slow_buy(*args, **kwargs):
+    time.sleep(0.2)
+    return MagicMock(success=True, order_id='order-1')
+
+
+@patch('src.investment.wait_for_order_completion', return_value=False)
+@patch('src.investment.log_expected_fill')
+@patch('src.investment.get_euro_balance', return_value=1000)
+@patch('src.investment.adaptive_cost_average_with_market_timing', return_value=10)
+@patch('src.investment.adaptive_average_cost', return_value=10)
+@patch('src.investment.get_bitcoin_price_change_week', return_value=0)
+@patch('src.investment.get_fear_and_greed_index', return_value=50)
+@patch('src.investment.get_last_purchase_date', return_value=None)
+@patch.object(investment.database_writer, 'flush', return_value=True)
+class TestInvestmentGuard(unittest.TestCase):
+    def setUp(self):
+        investment._purchase_claimed_on = None
+
+    @patch('src.investment.buy_bitcoin', side_effect=slow_buy)
+    def test_concurrent_runs_buy_once(self, mock_buy, *mocks):
+        runs = [threading.Thread(target=investment.execute_investment, args=(transaction_type,))
+                for transaction_type in ('extraordinary', 'regular')]
+        for run in runs:
+            run.start()
+        for run in runs:
+            run.join(5)
+
+        mock_buy.assert_called_once()
+
+    @patch('src.investment.buy_bitcoin', return_value=MagicMock(success=False))
+    def test_failed_order_releases_the_day(self, mock_buy, *mocks):
+        investment.execute_investment()
+        investment.execute_investment()
+
+        self.assertEqual(mock_buy.call_count, 2)
+
+    @patch('src.investment.buy_bitcoin')
+    def test_unwritten_purchases_block_trading(self, mock_buy, mock_flush, *mocks):
+        mock_flush.return_value = False
+
+        investment.execute_investment()
+
+        mock_buy.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
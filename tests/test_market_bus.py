@@ -0,0 +1,93 @@
+import time
+import unittest
+import numpy as np
+from unittest.mock import patch
+from src.market_bus import RingBuffer, MarketDataBus, TOPIC_TICKER, TOPIC_CANDLE
+from src.ticker_feed import RestPricePoller, current_price
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_latest_of_empty_buffer_is_none(self):
+        self.assertIsNone(RingBuffer(4, 2).latest())
+
+    def test_last_returns_newest_rows_oldest_first_after_wraparound(self):
+        buffer = RingBuffer(4, 2)
+        for index in range(6):
+            buffer.append((index, index * 10))
+
+        out = np.empty((4, 2))
+        self.assertEqual(buffer.last(3, out), 3)
+        np.testing.assert_array_equal(out[:3], [[3, 30], [4, 40], [5, 50]])
+        self.assertEqual(buffer.latest(), (5, 50))
+        self.assertEqual(len(buffer), 4)
+
+    def test_last_is_limited_to_the_rows_available(self):
+        buffer = RingBuffer(8, 2)
+        buffer.append((1, 100))
+        buffer.append((2, 200))
+
+        out = np.zeros((5, 2))
+        self.assertEqual(buffer.last(5, out), 2)
+        np.testing.assert_array_equal(out[:2], [[1, 100], [2, 200]])
+
+    def test_latest_copies_into_out(self):
+        buffer = RingBuffer(2, 2)
+        buffer.append((1, 100))
+        out = np.zeros(2)
+        self.assertIs(buffer.latest(out), out)
+        np.testing.assert_array_equal(out, [1, 100])
+
+
+class TestMarketDataBus(unittest.TestCase):
+    def setUp(self):
+        self.bus = MarketDataBus()
+
+    def test_publish_reaches_every_subscriber(self):
+        first = self.bus.subscribe(TOPIC_TICKER)
+        second = self.bus.subscribe(TOPIC_TICKER, capacity=1)
+        candles = self.bus.subscribe(TOPIC_CANDLE)
+
+        self.bus.publish(TOPIC_TICKER, (1000, 50000.0))
+
+        self.assertEqual(first.latest(), (1000, 50000.0))
+        self.assertEqual(second.latest(), (1000, 50000.0))
+        self.assertIsNone(candles.latest())
+
+    def test_new_subscription_starts_with_latest_value(self):
+        self.bus.publish(TOPIC_TICKER, (1000, 50000.0))
+        self.bus.publish(TOPIC_TICKER, (1001, 50010.0))
+
+        subscription = self.bus.subscribe(TOPIC_TICKER)
+        self.assertEqual(len(subscription.buffer), 1)
+        self.assertEqual(subscription.latest(), (1001, 50010.0))
+
+    def test_unsubscribed_buffer_stops_receiving(self):
+        subscription = self.bus.subscribe(TOPIC_TICKER)
+        self.bus.unsubscribe(subscription)
+        self.bus.publish(TOPIC_TICKER, (1000, 50000.0))
+        self.assertIsNone(subscription.latest())
+
+    @patch('src.ticker_feed.get_bitcoin_price', return_value=50000.0)
+    def test_stale_price_is_fetched_once_for_all_consumers(self, mock_price):
+        display = self.bus.subscribe(TOPIC_TICKER, capacity=1)
+        bot = self.bus.subscribe(TOPIC_TICKER, capacity=1)
+
+        self.assertEqual(current_price(display, self.bus, 'BTC-EUR', max_age=30), 50000.0)
+        self.assertEqual(current_price(bot, self.bus, 'BTC-EUR', max_age=30), 50000.0)
+        self.assertEqual(mock_price.call_count, 1)
+
+    @patch('src.ticker_feed.fetch_candle_window', return_value=[(time.time() // 60 * 60 - 60, 1, 2, 1, 2, 3)])
+    @patch('src.ticker_feed.get_bitcoin_price', return_value=50000.0)
+    def test_poller_fetches_candles_only_for_subscribers(self, mock_price, mock_candles):
+        poller = RestPricePoller('BTC-EUR', self.bus)
+        poller.poll()
+        mock_candles.assert_not_called()
+
+        candles = self.bus.subscribe(TOPIC_CANDLE)
+        poller.poll()
+        mock_candles.assert_called_once()
+        self.assertIsNotNone(candles.latest())
+
+
+if __name__ == '__main__':
+    unittest.main()
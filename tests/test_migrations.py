@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from src.database import create_database, get_connection, log_transaction, get_transactions, get_purchase_totals, \
+    iso_to_epoch_ms, MIGRATIONS
+
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def create_legacy_database(self):
+        # The schema as created before migrations existed
+        conn = get_connection()
+        with conn:
+            conn.execute('''
+                CREATE TABLE transactions (
+                    id INTEGER PRIMARY KEY,
+                    order_id TEXT,
+                    invested_amount REAL,
+                    bitcoin_purchased REAL,
+                    purchase_price REAL,
+                    purchase_time TEXT,
+                    transaction_type TEXT
+                )
+            ''')
+            conn.executemany('''
+                INSERT INTO transactions (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+                                          transaction_type)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular'),
+                  ('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular'),
+                  ('order-2', 100.0, 0.004, 25000.0, '2024-02-05T01:11:00.123456Z', 'regular')])
+        return conn
+
+    def test_new_database_is_at_latest_version(self):
+        create_database()
+        conn = get_connection()
+
+        self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], len(MIGRATIONS))
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({'idx_transactions_order_id', 'idx_transactions_purchase_time_ms',
+                         'idx_uninvested_balances_month_year'} <= indexes)
+
+    def test_legacy_rows_are_converted_in_place(self):
+        conn = self.create_legacy_database()
+
+        create_database()
+
+        rows = conn.execute('SELECT order_id, purchase_time_ms FROM transactions ORDER BY id').fetchall()
+        self.assertEqual(rows, [('order-1', 1704417060000), ('order-2', 1707095460123)])
+        totals = get_purchase_totals()
+        self.assertEqual(totals['purchase_count'], 2)
+        self.assertAlmostEqual(totals['total_bitcoin'], 0.006)
+
+    def test_duplicate_rows_are_kept_aside(self):
+        conn = self.create_legacy_database()
+
+        create_database()
+
+        duplicates = conn.execute('SELECT id, order_id FROM duplicate_transactions').fetchall()
+        self.assertEqual(duplicates, [(2, 'order-1')])
+
+    def test_migrations_run_once(self):
+        self.create_legacy_database()
+        create_database()
+        create_database()
+
+        self.assertEqual(get_connection().execute('PRAGMA user_version').fetchone()[0], len(MIGRATIONS))
+
+    def test_duplicate_order_is_not_logged_twice(self):
+        create_database()
+
+        log_transaction('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular')
+        log_transaction('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular')
+
+        self.assertEqual(get_purchase_totals()['purchase_count'], 1)
+        self.assertEqual(len(get_transactions()), 1)
+
+    def test_range_query_uses_index(self):
+        create_database()
+        log_transaction('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular')
+        log_transaction('order-2', 100.0, 0.004, 25000.0, '2024-02-05T01:11:00Z', 'regular')
+
+        january = get_transactions(iso_to_epoch_ms('2024-01-01T00:00:00Z'), iso_to_epoch_ms('2024-02-01T00:00:00Z'))
+        self.assertEqual([row[0] for row in january], ['order-1'])
+        self.assertEqual([row[0] for row in get_transactions(start_ms=iso_to_epoch_ms('2024-02-01T00:00:00Z'))],
+                         ['order-2'])
+
+        plan = get_connection().execute(
+            'EXPLAIN QUERY PLAN SELECT order_id FROM transactions WHERE purchase_time_ms >= ? AND purchase_time_ms < ? '
+            'ORDER BY purchase_time_ms', (0, 1)).fetchall()
+        self.assertIn('idx_transactions_purchase_time_ms', plan[0][3])
+
+    def test_iso_to_epoch_ms(self):
+        self.assertEqual(iso_to_epoch_ms('1970-01-01T00:00:01Z'), 1000)
+        self.assertEqual(iso_to_epoch_ms('1970-01-01T00:00:01.5'), 1500)
+        self.assertEqual(iso_to_epoch_ms('1970-01-01T01:00:00+01:00'), 0)
+        self.assertEqual(iso_to_epoch_ms('1970-01-01T00:00:00.123456789Z'), 123)
+        self.assertIsNone(iso_to_epoch_ms(None))
+        self.assertIsNone(iso_to_epoch_ms('yesterday'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from src.coinbase_api import buy_bitcoin, get_order_details
+from src.models import Order, Fill, Candle, Account, OrderResult
+from tests.test_coinbase_advanced_auth import generate_private_key
+
+
+def response(status_code, body):
+    mock_response = MagicMock()
+    mock_response.status_code = status_code
+    mock_response.content = json.dumps(body)
+    return mock_response
+
+
+class TestModels(unittest.TestCase):
+    def test_order_amounts_are_parsed_once(self):
+        order = Order.from_json({'order_id': 'o-1', 'status': 'FILLED', 'filled_size': '0.00123',
+                                 'average_filled_price': '50000.10', 'created_time': '2024-01-01T01:11:00Z'})
+        self.assertEqual(order.filled_size, Decimal('0.00123'))
+        self.assertEqual(order.average_filled_price, Decimal('50000.10'))
+        self.assertIsNone(order.total_fees)
+        self.assertFalse(hasattr(order, '__dict__'))
+
+    def test_fill_candle_and_account(self):
+        fill = Fill.from_json({'entry_id': 'e-1', 'order_id': 'o-1', 'price': '50000', 'size': '0.001',
+                               'commission': '0.3'})
+        self.assertEqual(fill.size * fill.price, Decimal('50.000'))
+
+        candle = Candle.from_json({'start': '1700000000', 'open': '1', 'high': '2', 'low': '0.5', 'close': '1.5',
+                                   'volume': '3'})
+        self.assertEqual(candle.as_tuple(), (1700000000, 1.0, 2.0, 0.5, 1.5, 3.0))
+
+        account = Account.from_json({'id': 'a-1', 'type': 'fiat', 'currency': {'code': 'EUR'},
+                                     'balance': {'amount': '250.00'}})
+        self.assertEqual((account.currency, account.type, account.balance), ('EUR', 'fiat', Decimal('250.00')))
+
+    def test_order_result_from_failure(self):
+        result = OrderResult.from_json({'success': False, 'failure_reason': 'INSUFFICIENT_FUND'})
+        self.assertFalse(result.success)
+        self.assertEqual(result.reason, 'INSUFFICIENT_FUND')
+
+
+class TestOrderEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.private_key = generate_private_key()
+
+    @patch('src.coinbase_api.http_client.post')
+    def test_buy_bitcoin_returns_order_result(self, mock_post):
+        mock_post.return_value = response(200, {'success': True, 'success_response': {'order_id': 'o-1'}})
+        result = buy_bitcoin('key', self.private_key, 'client-1', 'BTC-EUR', 20)
+        self.assertTrue(result.success)
+        self.assertEqual(result.order_id, 'o-1')
+
+    @patch('src.coinbase_api.http_client.post')
+    def test_buy_bitcoin_error_response(self, mock_post):
+        mock_post.return_value = response(400, {'error': 'INVALID_ARGUMENT', 'message': 'bad quote_size'})
+        result = buy_bitcoin('key', self.private_key, 'client-1', 'BTC-EUR', 20)
+        self.assertEqual((result.status, result.reason, result.message),
+                         ('error', 'INVALID_ARGUMENT', 'bad quote_size'))
+
+    @patch('src.coinbase_api.http_client.get')
+    def test_get_order_details_returns_order(self, mock_get):
+        mock_get.return_value = response(200, {'order': {'order_id': 'o-1', 'status': 'FILLED',
+                                                         'filled_size': '0.0004'}})
+        order = get_order_details('key', self.private_key, 'o-1')
+        self.assertEqual((order.status, order.filled_size), ('FILLED', Decimal('0.0004')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import time
+import unittest
+from src.order_book import OrderBook, OrderBookFeed, BID, ASK
+from tests.websocket_stand_in import WebSocketStandIn
+
+
+def l2_message(sequence, event_type, updates, product_id='BTC-EUR'):
+    return {
+        "channel": "l2_data",
+        "sequence_num": sequence,
+        "events": [{"type": event_type, "product_id": product_id, "updates": [
+            {"side": side, "price_level": str(price), "new_quantity": str(size)} for side, price, size in updates
+        ]}]
+    }
+
+
+class TestOrderBook(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook('BTC-EUR')
+        self.book.apply([
+            (BID, 99.0, 1.0), (BID, 100.0, 2.0), (BID, 98.0, 3.0),
+            (ASK, 102.0, 2.0), (ASK, 101.0, 1.0), (ASK, 103.0, 3.0),
+        ], snapshot=True)
+
+    def test_best_prices_and_mid(self):
+        self.assertEqual(self.book.best_bid(), 100.0)
+        self.assertEqual(self.book.best_ask(), 101.0)
+        self.assertEqual(self.book.mid_price(), 100.5)
+        self.assertTrue(self.book.ready)
+
+    def test_updates_change_and_remove_levels(self):
+        self.book.apply([(ASK, 101.0, 0), (BID, 100.5, 1.0), (BID, 99.0, 5.0)])
+        self.assertEqual(self.book.best_ask(), 102.0)
+        self.assertEqual(self.book.best_bid(), 100.5)
+        self.assertEqual(self.book.bids.level(2), (99.0, 5.0))
+
+    def test_depth_to_size(self):
+        self.assertEqual(self.book.depth_to_size(ASK, 2.0), (102.0, (101.0 + 102.0) / 2))
+        self.assertEqual(self.book.depth_to_size(BID, 3.0), (99.0, (200.0 + 99.0) / 3))
+        self.assertIsNone(self.book.depth_to_size(ASK, 10.0))
+
+    def test_expected_fill_price(self):
+        # 101 buys 1.0 at 101, the remaining 102 buys 1.0 at 102
+        self.assertAlmostEqual(self.book.expected_fill_price(203.0), 203.0 / 2.0)
+        self.assertEqual(self.book.expected_fill_price(50.5), 101.0)
+        self.assertIsNone(self.book.expected_fill_price(10000.0))
+
+    def test_levels_far_from_mid_are_dropped(self):
+        book = OrderBook('BTC-EUR', max_levels=2, max_distance=0.1)
+        book.apply([(BID, 100.0, 1.0), (BID, 99.0, 1.0), (BID, 98.0, 1.0), (BID, 50.0, 1.0),
+                    (ASK, 101.0, 1.0), (ASK, 200.0, 1.0)], snapshot=True)
+        self.assertEqual(book.bids.keys, [-100.0, -99.0])
+        self.assertEqual(book.asks.keys, [101.0])
+
+
+class TestOrderBookFeed(unittest.TestCase):
+    def setUp(self):
+        self.server = WebSocketStandIn().start()
+        self.feed = OrderBookFeed('BTC-EUR', url=self.server.url, reconnect_delay=0.1, ping_interval=0)
+        self.feed.start()
+        self.assertTrue(self.feed.connected.wait(5))
+
+    def tearDown(self):
+        self.feed.stop()
+        self.server.stop()
+
+    def wait_for(self, condition):
+        start = time.monotonic()
+        while not condition() and time.monotonic() - start < 5:
+            time.sleep(0.01)
+        return condition()
+
+    def test_snapshot_and_updates_build_the_book(self):
+        self.assertEqual(self.server.received.get(timeout=5)['channel'], 'level2')
+        self.server.send(l2_message(0, 'snapshot', [('bid', 100.0, 1.0), ('offer', 101.0, 1.0)]))
+        self.server.send(l2_message(1, 'update', [('offer', 100.8, 0.5)]))
+        self.assertTrue(self.wait_for(lambda: self.feed.book.best_ask() == 100.8))
+        self.assertEqual(self.feed.book.best_bid(), 100.0)
+
+    def test_sequence_gap_resets_the_book(self):
+        self.server.send(l2_message(0, 'snapshot', [('bid', 100.0, 1.0), ('offer', 101.0, 1.0)]))
+        self.assertTrue(self.wait_for(lambda: self.feed.book.ready))
+        self.server.send(l2_message(5, 'update', [('offer', 100.8, 0.5)]))
+        self.assertTrue(self.wait_for(lambda: not self.feed.book.ready))
+        self.assertTrue(self.feed.connected.wait(5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import time
+import unittest
+from unittest.mock import patch
+from src.coinbase_api import wait_for_order_completion
+from src.models import Order
+from src.order_updates import OrderUpdateStream
+from tests.test_coinbase_advanced_auth import generate_private_key
+from tests.websocket_stand_in import WebSocketStandIn
+
+
+def order_update(order_id, status):
+    return {
+        "channel": "user",
+        "events": [{"type": "update", "orders": [{"order_id": order_id, "status": status}]}]
+    }
+
+
+class TestOrderUpdateStream(unittest.TestCase):
+    def setUp(self):
+        self.server = WebSocketStandIn(acknowledge_subscriptions=True).start()
+        self.stream = OrderUpdateStream('organizations/test/apiKeys/test', generate_private_key(), 'BTC-EUR',
+                                        url=self.server.url, reconnect_delay=0.1, ping_interval=0)
+        self.stream.start()
+        self.assertTrue(self.stream.connected.wait(5))
+
+    def tearDown(self):
+        self.stream.stop()
+        self.server.stop()
+
+    def test_subscribes_to_user_channel(self):
+        subscription = self.server.received.get(timeout=5)
+        self.assertEqual(subscription['channel'], 'user')
+        self.assertEqual(subscription['product_ids'], ['BTC-EUR'])
+        self.assertTrue(subscription['jwt'])
+
+    def test_future_resolves_on_terminal_status(self):
+        future = self.stream.watch('order-1')
+        self.server.send(order_update('order-1', 'OPEN'))
+        self.server.send(order_update('order-1', 'FILLED'))
+        self.assertEqual(future.result(timeout=5), 'FILLED')
+
+    def test_status_seen_before_watch(self):
+        self.server.send(order_update('order-2', 'CANCELLED'))
+        time.sleep(0.2)
+        self.assertEqual(self.stream.watch('order-2').result(timeout=1), 'CANCELLED')
+
+    @patch('src.coinbase_api.get_order_details')
+    def test_wait_uses_pushed_status(self, get_order_details):
+        self.server.send(order_update('order-3', 'FILLED'))
+        start = time.monotonic()
+        self.assertTrue(wait_for_order_completion('key', 'secret', 'order-3', timeout=10, interval=5,
+                                                  order_stream=self.stream))
+        self.assertLess(time.monotonic() - start, 1)
+        get_order_details.assert_not_called()
+
+    def test_rejected_subscription_is_not_connected(self):
+        server = WebSocketStandIn().start()
+        stream = OrderUpdateStream('organizations/test/apiKeys/test', generate_private_key(), 'BTC-EUR',
+                                   url=server.url, reconnect_delay=0.1, ping_interval=0)
+        stream.start()
+        try:
+            server.received.get(timeout=5)
+            server.send({'type': 'error', 'message': 'authentication failure'})
+            self.assertFalse(stream.connected.wait(0.5))
+        finally:
+            stream.stop()
+            server.stop()
+
+    @patch('src.coinbase_api.get_order_details', return_value=Order.from_json({'status': 'FILLED'}))
+    def test_missed_push_is_found_by_final_check(self, get_order_details):
+        self.assertTrue(wait_for_order_completion('key', 'secret', 'order-5', timeout=0.3, interval=0.1,
+                                                  order_stream=self.stream))
+        get_order_details.assert_called_once_with('key', 'secret', 'order-5')
+
+    @patch('src.coinbase_api.get_order_details', return_value=Order.from_json({'status': 'FILLED'}))
+    def test_wait_falls_back_to_polling_when_socket_drops(self, get_order_details):
+        self.stream.reconnect_delay = self.stream._current_delay = 10
+        self.server.drop_clients()
+        for _ in range(50):
+            if not self.stream.connected.is_set():
+                break
+            time.sleep(0.05)
+        self.assertTrue(wait_for_order_completion('key', 'secret', 'order-4', timeout=5, interval=0.1,
+                                                  order_stream=self.stream))
+        get_order_details.assert_called_with('key', 'secret', 'order-4')
+
+
+if __name__ == '__main__':
+    unittest.main()
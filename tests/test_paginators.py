@@ -0,0 +1,64 @@
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+from src.paginators import list_fills, iter_order_pages, stream_concurrently
+from tests.test_coinbase_advanced_auth import generate_private_key
+
+
+def page(body):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.content = json.dumps(body)
+    return mock_response
+
+
+def fills_endpoint(url, params, **kwargs):
+    """Serves fills f-0 .. f-4 two per page, like the exchange ending with an empty cursor."""
+    start = int(params.get('cursor', 0))
+    rows = [{'entry_id': f'f-{i}', 'order_id': f'o-{i // 2}', 'price': '50000', 'size': '0.001'}
+            for i in range(start, min(start + 2, 5))]
+    return page({'fills': rows, 'cursor': str(start + 2) if start + 2 < 5 else ''})
+
+
+class TestPaginators(unittest.TestCase):
+    def setUp(self):
+        self.private_key = generate_private_key()
+
+    @patch('src.paginators.http_client.get', side_effect=fills_endpoint)
+    def test_fills_are_streamed_lazily_as_typed_rows(self, mock_get):
+        fills = list_fills('key', self.private_key, product_id='BTC-EUR', page_size=2)
+
+        first = next(fills)
+        self.assertEqual((first.entry_id, first.size), ('f-0', Decimal('0.001')))
+        self.assertEqual(mock_get.call_count, 1)
+
+        self.assertEqual([fill.entry_id for fill in fills], ['f-1', 'f-2', 'f-3', 'f-4'])
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(mock_get.call_args_list[1][1]['params'],
+                         {'product_ids': 'BTC-EUR', 'limit': 2, 'cursor': '2'})
+
+    @patch('src.paginators.http_client.get')
+    def test_orders_stop_when_has_next_is_false(self, mock_get):
+        mock_get.return_value = page({'orders': [{'order_id': 'o-1', 'status': 'FILLED'}], 'has_next': False,
+                                      'cursor': 'ignored'})
+        pages = list(iter_order_pages('key', self.private_key, order_status=['FILLED']))
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(pages[0][0][0].order_id, 'o-1')
+        self.assertIsNone(pages[0][1])
+
+    def test_stream_concurrently_merges_all_items(self):
+        merged = list(stream_concurrently([iter(range(0, 50)), iter(range(100, 150))], buffer_size=3))
+        self.assertEqual(sorted(merged), list(range(0, 50)) + list(range(100, 150)))
+
+    def test_stream_concurrently_raises_iterator_errors(self):
+        def failing():
+            yield 1
+            raise ValueError('page failed')
+
+        with self.assertRaises(ValueError):
+            list(stream_concurrently([failing(), iter(range(5))]))
+
+
+if __name__ == '__main__':
+    unittest.main()
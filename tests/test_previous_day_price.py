@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from src import coinbase_api
+from src.coinbase_api import get_previous_day_bitcoin_price
+from src.database import create_database
+from tests.test_coinbase_advanced_auth import generate_private_key
+
+
+def candles_response(close):
+    mock_response = MagicMock()
+    mock_response.content = json.dumps({'candles': [
+        {'start': '0', 'open': str(close), 'high': str(close), 'low': str(close), 'close': str(close), 'volume': '1'}
+    ]})
+    return mock_response
+
+
+class TestPreviousDayPrice(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        create_database()
+        coinbase_api._previous_day_closes.invalidate()
+        self.private_key = generate_private_key()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    @patch('src.coinbase_api.http_client.get')
+    def test_close_is_memoized_per_pair(self, mock_get):
+        mock_get.side_effect = [candles_response(50000), candles_response(3000)]
+
+        self.assertEqual(get_previous_day_bitcoin_price('key', self.private_key, 'BTC-EUR'), 50000.0)
+        self.assertEqual(get_previous_day_bitcoin_price('key', self.private_key, 'BTC-EUR'), 50000.0)
+        self.assertEqual(get_previous_day_bitcoin_price('key', self.private_key, 'ETH-EUR'), 3000.0)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('src.coinbase_api.http_client.get')
+    def test_close_survives_restart(self, mock_get):
+        mock_get.return_value = candles_response(50000)
+        get_previous_day_bitcoin_price('key', self.private_key, 'BTC-EUR')
+
+        coinbase_api._previous_day_closes.invalidate()  # Simulates a fresh process
+        self.assertEqual(get_previous_day_bitcoin_price('key', self.private_key, 'BTC-EUR'), 50000.0)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('src.coinbase_api.http_client.get')
+    def test_previous_day_is_a_utc_day(self, mock_get):
+        mock_get.return_value = candles_response(50000)
+        self.addCleanup(time.tzset)
+        self.addCleanup(os.environ.__setitem__, 'TZ', os.environ.get('TZ', 'UTC'))
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+
+        get_previous_day_bitcoin_price('key', self.private_key, 'BTC-EUR')
+
+        params = mock_get.call_args[1]['params']
+        self.assertEqual(int(params['start']) % 86400, 0)
+        self.assertEqual(int(params['end']) - int(params['start']), 86400)
+        self.assertEqual(int(params['start']), (int(time.time()) // 86400 - 1) * 86400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from src import coinbase_api_v2, investment
+from src.investment import PREWARM_LEAD_MINUTES
+from src.http_client import HttpClient
+
+
+class TestPrewarm(unittest.TestCase):
+    def test_warm_counts_reachable_hosts(self):
+        client = HttpClient()
+        client.session = MagicMock()
+        client.session.get.side_effect = [MagicMock(), ConnectionError('unreachable')]
+        self.assertEqual(client.warm(['https://a.example/ping', 'https://b.example/ping']), 1)
+        self.assertEqual(client.session.get.call_count, 2)
+
+    @patch('src.investment.get_bitcoin_price_change_week')
+    @patch('src.investment.get_fear_and_greed_index')
+    @patch('src.investment.get_accounts_snapshot')
+    @patch('src.investment.CoinbaseAdvancedAuth')
+    @patch('src.investment.http_client.warm')
+    def test_prewarm_prepares_the_whole_order_path(self, mock_warm, mock_auth, mock_snapshot, mock_index,
+                                                   mock_price_change):
+        investment.prewarm_investment()
+        mock_warm.assert_called_once_with(investment.PREWARM_URLS)
+        mock_auth.return_value.get_signing_key.assert_called_once()
+        self.assertEqual(mock_snapshot.call_args[1]['max_age'], 0)
+        mock_index.assert_called_once()
+        mock_price_change.assert_called_once()
+
+    @patch('src.coinbase_api_v2._fetch_bitcoin_price', return_value=50000.0)
+    def test_prewarmed_spot_price_is_used_by_the_run(self, mock_historical_price):
+        oracle = MagicMock()
+        oracle.get_price.return_value = 55000.0
+        coinbase_api_v2._price_cache.invalidate()
+        self.addCleanup(coinbase_api_v2._price_cache.invalidate)
+        with patch('src.coinbase_api_v2.get_price_oracle', return_value=oracle):
+            coinbase_api_v2.get_bitcoin_price_change_week()
+            with patch('src.cache.time.monotonic', return_value=time.monotonic() + PREWARM_LEAD_MINUTES * 60):
+                self.assertAlmostEqual(
+                    coinbase_api_v2.get_bitcoin_price_change_week(max_age=investment.PREWARMED_PRICE_MAX_AGE), 10.0)
+
+        oracle.get_price.assert_called_once()
+
+    @patch('src.investment.get_accounts_snapshot', side_effect=ConnectionError('offline'))
+    @patch('src.investment.http_client.warm')
+    def test_prewarm_failure_is_logged_not_raised(self, mock_warm, mock_snapshot):
+        investment.prewarm_investment()
+
+
+if __name__ == '__main__':
+    unittest.main()
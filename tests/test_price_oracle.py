@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+from src.price_oracle import PriceSource, PriceOracle, MIN_LATENCY_SAMPLES
+
+
+class FakeSource(PriceSource):
+    def __init__(self, name, price=None, delay=0.0, error=None):
+        super().__init__(name)
+        self.price = price
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.release = threading.Event()
+
+    def fetch(self, product_id, priority):
+        self.calls += 1
+        self.release.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.price
+
+
+class TestPriceOracle(unittest.TestCase):
+    def test_fast_primary_is_not_hedged(self):
+        primary, secondary = FakeSource('primary', 100.0), FakeSource('secondary', 101.0)
+        oracle = PriceOracle([primary, secondary], deadline=5)
+        self.assertEqual(oracle.get_price('BTC-EUR'), 100.0)
+        self.assertEqual(secondary.calls, 0)
+
+    def test_slow_primary_is_hedged_after_its_p90(self):
+        primary, secondary = FakeSource('primary', 100.0, delay=2), FakeSource('secondary', 101.0)
+        for _ in range(MIN_LATENCY_SAMPLES):
+            primary.record(0.05, failed=False)
+        oracle = PriceOracle([primary, secondary], deadline=5)
+
+        start = time.monotonic()
+        self.assertEqual(oracle.get_price('BTC-EUR'), 101.0)
+        self.assertLess(time.monotonic() - start, 0.5)
+        primary.release.set()
+
+    def test_failure_moves_on_immediately(self):
+        failing = FakeSource('failing', error=ConnectionError('down'))
+        backup = FakeSource('backup', 99.0)
+        oracle = PriceOracle([failing, backup], deadline=5)
+        self.assertEqual(oracle.get_price('BTC-EUR'), 99.0)
+        self.assertGreater(failing.error_rate, 0)
+
+    def test_all_sources_failing_returns_none(self):
+        oracle = PriceOracle([FakeSource('a', error=ValueError()), FakeSource('b', error=ValueError())], deadline=1)
+        self.assertIsNone(oracle.get_price('BTC-EUR'))
+
+    def test_hung_sources_do_not_hold_up_later_calls(self):
+        hung = [FakeSource(f'hung-{number}', 100.0, delay=10) for number in range(2)]
+        healthy = FakeSource('healthy', 101.0)
+        for _ in range(MIN_LATENCY_SAMPLES):
+            for source in hung:
+                source.record(0.01, failed=False)
+            healthy.record(0.02, failed=False)
+        oracle = PriceOracle(hung + [healthy], deadline=5)
+        self.assertEqual(oracle.get_price('BTC-EUR'), 101.0)
+
+        for _ in range(3):
+            start = time.monotonic()
+            self.assertEqual(oracle.get_price('BTC-EUR'), 101.0)
+            self.assertLess(time.monotonic() - start, 0.5)
+
+        self.assertEqual([source.calls for source in hung], [1, 1])
+        self.assertEqual(oracle.ranked_sources()[0], healthy)
+        for source in hung:
+            source.release.set()
+
+    def test_sources_ranked_healthy_then_fastest(self):
+        slow, fast, broken = FakeSource('slow'), FakeSource('fast'), FakeSource('broken')
+        slow.record(0.5, failed=False)
+        fast.record(0.1, failed=False)
+        broken.record(0.01, failed=False)
+        for _ in range(5):
+            broken.record(0, failed=True)
+        oracle = PriceOracle([slow, broken, fast])
+        self.assertEqual([source.name for source in oracle.ranked_sources()], ['fast', 'slow', 'broken'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from src.database import create_database, get_connection, log_transaction, get_average_buy_price, \
+    get_last_transaction_date, get_purchase_totals, rebuild_purchase_aggregates
+
+
+class TestPurchaseAggregates(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        create_database()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def log_purchases(self):
+        log_transaction('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular')
+        log_transaction('order-2', Decimal('100'), Decimal('0.0025'), Decimal('40000'), '2024-02-05T01:11:00Z',
+                        'regular')
+        log_transaction('order-3', 50.0, 0.001, 50000.0, '2024-01-20T09:00:00Z', 'price_drop')
+
+    def test_empty_database(self):
+        self.assertEqual(get_purchase_totals()['purchase_count'], 0)
+        self.assertIsNone(get_average_buy_price())
+        self.assertIsNone(get_last_transaction_date())
+
+    def test_log_transaction_updates_aggregates(self):
+        self.log_purchases()
+
+        totals = get_purchase_totals()
+        self.assertEqual(totals['purchase_count'], 3)
+        self.assertAlmostEqual(totals['total_bitcoin'], 0.0055)
+        self.assertAlmostEqual(totals['total_invested'], 250.0)
+        self.assertEqual(totals['first_purchase_time'], '2024-01-05T01:11:00Z')
+        self.assertEqual(totals['last_purchase_time'], '2024-02-05T01:11:00Z')
+        self.assertEqual(get_last_transaction_date(), '05.02.2024')
+
+    def test_average_matches_full_scan(self):
+        self.log_purchases()
+
+        expected = get_connection().execute(
+            'SELECT SUM(bitcoin_purchased * purchase_price) / SUM(bitcoin_purchased) FROM transactions').fetchone()[0]
+        self.assertEqual(get_average_buy_price(), "{:.2f}".format(expected))
+
+    def test_purchase_times_are_ordered_as_instants(self):
+        # As text '...00.500Z' sorts before '...00Z', although it is half a second later
+        log_transaction('order-1', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00Z', 'regular')
+        log_transaction('order-2', 100.0, 0.002, 50000.0, '2024-01-05T01:11:00.500Z', 'regular')
+        running = get_purchase_totals()
+
+        get_connection().execute('DELETE FROM purchase_aggregates')
+        rebuild_purchase_aggregates()
+
+        for totals in (running, get_purchase_totals()):
+            self.assertEqual(totals['first_purchase_time'], '2024-01-05T01:11:00Z')
+            self.assertEqual(totals['last_purchase_time'], '2024-01-05T01:11:00.500Z')
+
+    def test_rebuild_matches_running_totals(self):
+        self.log_purchases()
+        running = get_purchase_totals()
+
+        get_connection().execute('DELETE FROM purchase_aggregates')
+        self.assertEqual(rebuild_purchase_aggregates(), 3)
+
+        rebuilt = get_purchase_totals()
+        for key, value in running.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(rebuilt[key], value)
+            else:
+                self.assertEqual(rebuilt[key], value)
+
+    def test_existing_history_is_aggregated_on_startup(self):
+        conn = get_connection()
+        with conn:
+            conn.execute('DELETE FROM purchase_aggregates')
+            conn.execute('''
+                INSERT INTO transactions (order_id, invested_amount, bitcoin_purchased, purchase_price, purchase_time,
+                                          transaction_type)
+                VALUES ('old', 100.0, 0.004, 25000.0, '2023-06-05T01:11:00Z', 'regular')
+            ''')
+
+        create_database()
+
+        self.assertEqual(get_purchase_totals()['purchase_count'], 1)
+        self.assertEqual(get_average_buy_price(), '25000.00')
+
+
+if __name__ == '__main__':
+    unittest.main()
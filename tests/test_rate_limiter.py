@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src import rate_limiter
+from src.rate_limiter import RateLimiter, TokenBucket, PRIORITY_ORDER, PRIORITY_DISPLAY
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.consume(), 0)
+        self.assertEqual(bucket.consume(), 0)
+        self.assertGreater(bucket.consume(), 0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_are_spread_to_the_budget(self):
+        limiter = RateLimiter({'public': 20})
+        start = time.monotonic()
+        for _ in range(30):
+            limiter.acquire('public')
+        # 20 requests fit in the initial burst, the remaining 10 need half a second of refill
+        self.assertGreaterEqual(time.monotonic() - start, 0.45)
+
+    def test_budgets_are_independent(self):
+        limiter = RateLimiter({'public': 1, 'private': 100})
+        limiter.acquire('public')
+        start = time.monotonic()
+        limiter.acquire('private')
+        self.assertLess(time.monotonic() - start, 0.05)
+
+    def test_order_priority_served_first(self):
+        limiter = RateLimiter({'private': 5})
+        for _ in range(5):
+            limiter.acquire('private')
+
+        served = []
+
+        def request(name, priority):
+            limiter.acquire('private', priority)
+            served.append(name)
+
+        display = threading.Thread(target=request, args=('display', PRIORITY_DISPLAY))
+        display.start()
+        time.sleep(0.05)
+        order = threading.Thread(target=request, args=('order', PRIORITY_ORDER))
+        order.start()
+        display.join(2)
+        order.join(2)
+        self.assertEqual(served, ['order', 'display'])
+
+    def test_wait_stats_per_caller(self):
+        limiter = RateLimiter({'private': 1})
+        limiter.acquire('private', caller='get_order_details')
+        limiter.acquire('private', caller='get_order_details')
+        stats = limiter.wait_stats()['get_order_details']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['total_wait'], 0.5)
+        self.assertAlmostEqual(stats['max_wait'], stats['total_wait'], places=2)
+
+    def test_wait_stats_are_logged_longest_first(self):
+        limiter = RateLimiter({'public': 1})
+        limiter.acquire('public', caller='get_bitcoin_price')
+        limiter.acquire('public', caller='fetch_candle_window')
+
+        with patch.object(rate_limiter, 'get_rate_limiter', return_value=limiter), \
+                patch.object(rate_limiter.logger, 'info') as mock_info:
+            rate_limiter.log_wait_stats()
+
+        lines = [call.args[0] for call in mock_info.call_args_list]
+        self.assertEqual(len(lines), 2)
+        self.assertIn('fetch_candle_window: 1 requests', lines[0])
+        self.assertIn('get_bitcoin_price', lines[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
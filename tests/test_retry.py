@@ -0,0 +1,62 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+import requests
+from src.coinbase_api import buy_bitcoin
+from src.retry import RetryPolicy, call_with_retry
+from tests.test_coinbase_advanced_auth import generate_private_key
+
+FAST = RetryPolicy(max_attempts=4, base_delay=0.01, max_delay=0.05, deadline=5)
+
+
+def response(status_code, body=None, headers=None):
+    mock_response = MagicMock()
+    mock_response.status_code = status_code
+    mock_response.headers = headers or {}
+    mock_response.content = json.dumps(body or {})
+    return mock_response
+
+
+class TestCallWithRetry(unittest.TestCase):
+    def test_retryable_statuses_and_network_errors_are_retried(self):
+        send = MagicMock(side_effect=[response(503), requests.ConnectionError('reset'), response(200)])
+        self.assertEqual(call_with_retry(send, FAST).status_code, 200)
+        self.assertEqual(send.call_count, 3)
+
+    def test_client_errors_are_not_retried(self):
+        send = MagicMock(return_value=response(400))
+        self.assertEqual(call_with_retry(send, FAST).status_code, 400)
+        self.assertEqual(send.call_count, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        send = MagicMock(side_effect=requests.Timeout('slow'))
+        with self.assertRaises(requests.Timeout):
+            call_with_retry(send, FAST)
+        self.assertEqual(send.call_count, 4)
+
+    def test_retry_after_is_honoured_within_the_deadline(self):
+        sleeps = []
+        send = MagicMock(side_effect=[response(429, headers={'Retry-After': '2'}), response(200)])
+        call_with_retry(send, RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05, deadline=5),
+                        sleep=sleeps.append)
+        self.assertEqual(sleeps, [2.0])
+
+        send = MagicMock(return_value=response(429, headers={'Retry-After': '60'}))
+        self.assertEqual(call_with_retry(send, FAST, sleep=sleeps.append).status_code, 429)
+        self.assertEqual(send.call_count, 1)
+
+
+class TestOrderRetry(unittest.TestCase):
+    @patch('src.coinbase_api.http_client.post')
+    def test_buy_retries_with_the_same_client_order_id(self, mock_post):
+        mock_post.side_effect = [requests.ConnectionError('reset'), response(502),
+                                 response(200, {'success': True, 'success_response': {'order_id': 'o-1'}})]
+        result = buy_bitcoin('key', generate_private_key(), 'client-1', 'BTC-EUR', 20)
+
+        self.assertTrue(result.success)
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual({call[1]['json']['client_order_id'] for call in mock_post.call_args_list}, {'client-1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
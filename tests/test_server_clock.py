@@ -0,0 +1,67 @@
+import json
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import jwt
+from src.coinbase_api import CoinbaseAdvancedAuth
+from src.server_clock import ServerClock, MAX_SKIPPED_SAMPLES
+from tests.test_coinbase_advanced_auth import generate_private_key
+
+
+def time_response(epoch_seconds):
+    mock_response = MagicMock()
+    mock_response.content = json.dumps({'epochMillis': str(int(epoch_seconds * 1000))})
+    return mock_response
+
+
+class TestServerClock(unittest.TestCase):
+    @patch('src.server_clock.http_client.get')
+    def test_offset_is_estimated_from_samples(self, mock_get):
+        clock = ServerClock()
+        mock_get.side_effect = lambda *args, **kwargs: time_response(time.time() + 30)
+        for _ in range(3):
+            self.assertTrue(clock.sample())
+        self.assertAlmostEqual(clock.offset, 30, delta=0.1)
+        self.assertAlmostEqual(clock.now(), time.time() + 30, delta=0.1)
+        self.assertEqual(clock.metrics()['samples'], 3)
+
+    @patch('src.server_clock.http_client.get')
+    def test_slow_samples_are_skipped(self, mock_get):
+        clock = ServerClock()
+        mock_get.side_effect = lambda *args, **kwargs: time_response(time.time() + 2)
+        clock.sample()
+
+        def slow_response(*args, **kwargs):
+            time.sleep(0.2)
+            return time_response(time.time() + 100)
+
+        mock_get.side_effect = slow_response
+        self.assertFalse(clock.sample())
+        self.assertAlmostEqual(clock.offset, 2, delta=0.1)
+
+    @patch('src.server_clock.http_client.get')
+    def test_lasting_rise_in_round_trip_is_adopted(self, mock_get):
+        clock = ServerClock()
+        mock_get.side_effect = lambda *args, **kwargs: time_response(time.time())
+        clock.sample()
+
+        def slow_response(*args, **kwargs):
+            time.sleep(0.2)
+            return time_response(time.time() + 4)
+
+        mock_get.side_effect = slow_response
+        used = [clock.sample() for _ in range(8)]
+
+        self.assertEqual(used, [False] * MAX_SKIPPED_SAMPLES + [True] * (8 - MAX_SKIPPED_SAMPLES))
+        self.assertGreater(clock.offset, 3)
+        self.assertGreater(clock.rtt, 0.15)
+
+    @patch('src.coinbase_api.server_time', side_effect=lambda: time.time() - 120)
+    def test_jwt_is_stamped_with_exchange_time(self, mock_server_time):
+        auth = CoinbaseAdvancedAuth('organizations/x/apiKeys/clock', generate_private_key())
+        token = auth.generate_jwt('GET', 'api.coinbase.com', '/api/v3/brokerage/clock-test', 'retail_rest_api_proxy')
+        claims = jwt.decode(token, options={'verify_signature': False})
+        self.assertAlmostEqual(claims['nbf'], time.time() - 120, delta=2)
+
+if __name__ == '__main__':
+    unittest.main()
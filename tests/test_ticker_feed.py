@@ -0,0 +1,93 @@
+import queue
+from datetime import datetime, timezone
+import time
+import unittest
+from unittest.mock import patch
+from src import investment
+from src.market_bus import MarketDataBus, TOPIC_CANDLE
+from src.ticker_feed import TickerFeed
+from tests.websocket_stand_in import WebSocketStandIn
+
+
+def ticker(product_id, price, timestamp=None):
+    return {
+        "channel": "ticker",
+        "timestamp": timestamp or datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        "events": [{"type": "update", "tickers": [{"type": "ticker", "product_id": product_id, "price": str(price)}]}]
+    }
+
+
+class TestTickerFeed(unittest.TestCase):
+    def setUp(self):
+        self.server = WebSocketStandIn().start()
+        self.feed = TickerFeed('BTC-EUR', url=self.server.url, reconnect_delay=0.1, ping_interval=0)
+        self.prices = queue.Queue()
+        self.feed.add_listener(lambda price, timestamp: self.prices.put(price))
+        self.feed.start()
+        self.assertTrue(self.feed.connected.wait(5))
+
+    def tearDown(self):
+        self.feed.stop()
+        self.server.stop()
+
+    def test_subscribes_and_tracks_latest_price(self):
+        self.assertEqual(self.server.received.get(timeout=5)['channel'], 'ticker')
+        self.server.send(ticker('ETH-EUR', 3000))
+        self.server.send(ticker('BTC-EUR', 50000))
+        self.assertEqual(self.prices.get(timeout=5), 50000.0)
+        self.assertEqual(self.feed.latest_price, 50000.0)
+
+    @patch('src.ticker_feed.download_candles', return_value=iter([[(1700000000, 1.0, 2.0, 41000.0, 1.5, 3.0)]]))
+    def test_gap_is_backfilled_after_reconnect(self, mock_download):
+        self.feed.bus = MarketDataBus()
+        candles = self.feed.bus.subscribe(TOPIC_CANDLE)
+        self.server.send(ticker('BTC-EUR', 50000))
+        self.assertEqual(self.prices.get(timeout=5), 50000.0)
+
+        self.server.drop_clients()
+        start = time.monotonic()
+        while candles.latest() is None and time.monotonic() - start < 5:
+            time.sleep(0.01)
+
+        self.assertEqual(candles.latest()[3], 41000.0)
+        self.assertEqual(mock_download.call_args[0][0], 'BTC-EUR')
+        self.assertEqual(mock_download.call_args[0][3], 'ONE_MINUTE')
+        # Historical lows are not acted on as if they were the current price
+        self.assertTrue(self.prices.empty())
+
+    def test_ticks_carry_the_exchange_send_time(self):
+        timestamps = queue.Queue()
+        self.feed.add_listener(lambda price, timestamp: timestamps.put(timestamp))
+
+        self.server.send(ticker('BTC-EUR', 50000, timestamp='2024-01-05T01:11:00.123456789Z'))
+
+        self.assertAlmostEqual(timestamps.get(timeout=5), 1704417060.123, places=3)
+
+    @patch('src.investment.execute_investment')
+    @patch('src.investment.get_previous_day_bitcoin_price', return_value=50000.0)
+    def test_stale_prices_do_not_trigger_investment(self, mock_previous_price, mock_execute):
+        investment._price_drop_triggered_on = None
+        investment.check_price_drop_on_tick(1000.0, time.time() - 120)
+        mock_execute.assert_not_called()
+        mock_previous_price.assert_not_called()
+
+    @patch('src.investment.execute_investment')
+    @patch('src.investment.get_previous_day_bitcoin_price', return_value=50000.0)
+    def test_replayed_crash_triggers_investment_once(self, mock_previous_price, mock_execute):
+        investment._price_drop_triggered_on = None
+        self.feed.add_listener(investment.check_price_drop_on_tick)
+        crash = [50000, 49000, 48000, 50000 * (1 - investment.DROP_THRESHOLD / 100) - 1, 40000, 39000]
+
+        for price in crash:
+            self.server.send(ticker('BTC-EUR', price))
+        start = time.monotonic()
+        while not mock_execute.called and time.monotonic() - start < 1:
+            time.sleep(0.01)
+
+        self.assertTrue(mock_execute.called)
+        time.sleep(0.2)
+        mock_execute.assert_called_once_with("extraordinary")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from src import write_behind
+from src.database import create_database, get_connection, get_last_applied_seq, get_last_purchase_date, \
+    get_purchase_totals
+from src.write_behind import WriteBehindWriter
+
+
+def transaction(order_id, purchase_time='2024-01-05T01:11:00Z'):
+    return {'order_id': order_id, 'invested_amount': Decimal('100'), 'bitcoin_purchased': Decimal('0.002'),
+            'purchase_price': Decimal('50000'), 'purchase_time': purchase_time, 'transaction_type': 'regular'}
+
+
+class TestWriteBehindWriter(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        create_database()
+        self.writer = WriteBehindWriter('test.journal')
+
+    def tearDown(self):
+        self.writer.stop()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def count(self, table):
+        return get_connection().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def test_flush_waits_for_commit(self):
+        self.writer.start()
+        for number in range(50):
+            self.writer.submit('log_transaction', **transaction(f'order-{number}'))
+        seq = self.writer.submit('update_last_purchase_date', date='2024-01-05')
+
+        self.assertTrue(self.writer.flush(seq, timeout=5))
+        self.assertEqual(self.count('transactions'), 50)
+        self.assertEqual(get_purchase_totals()['purchase_count'], 50)
+        self.assertEqual(get_last_purchase_date(), '2024-01-05')
+        self.assertEqual(get_last_applied_seq(get_connection()), seq)
+
+    def test_writes_are_journaled_before_they_are_applied(self):
+        self.writer.start()
+        self.writer.submit('log_uninvested_balance', month_year='01-2024', investment_date='2024-01-05',
+                           uninvested_amount=Decimal('12.5'))
+
+        with open('test.journal') as journal:
+            entry = json.loads(journal.readline())
+        self.assertEqual(entry['op'], 'log_uninvested_balance')
+        self.assertEqual(entry['args']['uninvested_amount'], 12.5)
+
+    def test_unapplied_entries_are_replayed_on_start(self):
+        with open('test.journal', 'w') as journal:
+            journal.write(json.dumps({'seq': 1, 'op': 'log_transaction', 'args': transaction('order-1')},
+                                     default=float) + '\n')
+            journal.write(json.dumps({'seq': 2, 'op': 'update_last_purchase_date',
+                                      'args': {'date': '2024-01-05'}}) + '\n')
+            # Torn by a crash in the middle of the append
+            journal.write('{"seq": 3, "op": "log_trans')
+
+        self.writer.start()
+
+        self.assertEqual(self.count('transactions'), 1)
+        self.assertEqual(get_last_purchase_date(), '2024-01-05')
+        self.assertEqual(os.path.getsize('test.journal'), 0)
+        self.assertEqual(self.writer.submit('update_last_purchase_date', date='2024-01-06'), 3)
+
+    def test_applied_entries_are_not_replayed(self):
+        self.writer.start()
+        self.writer.submit('update_last_purchase_date', date='2024-01-05')
+        self.writer.flush(timeout=5)
+        # A crash right after the commit leaves the applied entry in the journal
+        with open('test.journal') as journal:
+            lines = journal.read()
+        self.writer.stop()
+        with open('test.journal', 'w') as journal:
+            journal.write(lines)
+
+        restarted = WriteBehindWriter('test.journal')
+        restarted.start()
+        restarted.stop()
+
+        self.assertEqual(self.count('last_purchase'), 1)
+
+    def test_locked_database_is_retried_not_dropped(self):
+        failures = [sqlite3.OperationalError('database is locked')] * 2
+        original = write_behind.set_last_applied_seq
+
+        def set_last_applied_seq(conn, seq):
+            if failures:
+                raise failures.pop()
+            original(conn, seq)
+
+        self.writer.start()
+        with patch('src.write_behind.set_last_applied_seq', side_effect=set_last_applied_seq):
+            seq = self.writer.submit('log_transaction', **transaction('order-1'))
+            self.assertTrue(self.writer.flush(seq, timeout=5))
+
+        self.assertEqual(self.count('transactions'), 1)
+        self.assertEqual(get_last_applied_seq(get_connection()), seq)
+
+    def test_permanent_database_error_drops_the_write(self):
+        def insert_transaction(conn, **arguments):
+            if arguments['order_id'] == 'order-1':
+                raise sqlite3.OperationalError('no such table: transactions')
+            original(conn, **arguments)
+
+        original = write_behind.OPERATIONS['log_transaction']
+        self.writer.start()
+        with patch.dict(write_behind.OPERATIONS, log_transaction=insert_transaction):
+            self.writer.submit('log_transaction', **transaction('order-1'))
+            seq = self.writer.submit('log_transaction', **transaction('order-2'))
+            self.assertTrue(self.writer.flush(seq, timeout=5))
+
+        self.assertEqual(self.count('transactions'), 1)
+        self.assertEqual(get_last_applied_seq(get_connection()), seq)
+
+    def test_writer_survives_unexpected_errors(self):
+        self.writer.start()
+        with patch.object(self.writer, '_apply', side_effect=RuntimeError('boom')):
+            seq = self.writer.submit('update_last_purchase_date', date='2024-01-05')
+            self.assertFalse(self.writer.flush(seq, timeout=0.5))
+
+        self.assertTrue(self.writer.running())
+        self.assertTrue(self.writer.flush(self.writer.submit('update_last_purchase_date', date='2024-01-06'),
+                                          timeout=5))
+
+    def test_submit_before_start_writes_through(self):
+        self.writer.submit('log_transaction', **transaction('order-1'))
+
+        self.assertEqual(self.count('transactions'), 1)
+        self.assertTrue(self.writer.flush(timeout=0))
+
+    def test_unknown_operation_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.writer.submit('drop_table', table='transactions')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import json
+import queue
+import socket
+import struct
+import threading
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class WebSocketStandIn:
+    """
+    Minimal local WebSocket server used in place of the exchange feeds in tests.
+
+    Messages sent by clients are decoded from JSON and put on the `received` queue; send() pushes a
+    JSON message to every connected client and drop_clients() simulates the exchange closing the socket.
+    With acknowledge_subscriptions, every subscribe message is confirmed like the exchange does.
+    """
+
+    def __init__(self, acknowledge_subscriptions=False):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen()
+        self.url = f"ws://127.0.0.1:{self.server.getsockname()[1]}"
+        self.received = queue.Queue()
+        self.connections = queue.Queue()
+        self._clients = []
+        self._lock = threading.Lock()
+        self._running = True
+        self.acknowledge_subscriptions = acknowledge_subscriptions
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.drop_clients()
+        self.server.close()
+
+    def send(self, message):
+        frame = self._frame(json.dumps(message).encode('utf-8'), opcode=0x1)
+        with self._lock:
+            for client in list(self._clients):
+                client.sendall(frame)
+
+    def drop_clients(self):
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    def _accept(self):
+        while self._running:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    def _serve(self, client):
+        try:
+            response = self._handshake(client)
+            # Register before the client can see the connection open, so no message sent after that is missed
+            with self._lock:
+                self._clients.append(client)
+                client.sendall(response)
+            self.connections.put(client)
+            while True:
+                opcode, payload = self._read_frame(client)
+                if opcode == 0x8:
+                    break
+                if opcode == 0x9:
+                    client.sendall(self._frame(payload, opcode=0xA))
+                elif opcode == 0x1:
+                    message = json.loads(payload.decode('utf-8'))
+                    self.received.put(message)
+                    if self.acknowledge_subscriptions and message.get('type') == 'subscribe':
+                        client.sendall(self._frame(json.dumps({
+                            'channel': 'subscriptions',
+                            'events': [{'subscriptions': {message['channel']: message.get('product_ids', [])}}],
+                        }).encode('utf-8'), opcode=0x1))
+        except (OSError, ConnectionError):
+            pass
+        finally:
+            with self._lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            client.close()
+
+    def _handshake(self, client):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = client.recv(1024)
+            if not chunk:
+                raise ConnectionError("Client closed during handshake")
+            request += chunk
+        headers = dict(line.split(': ', 1) for line in request.decode('latin-1').split('\r\n')[1:] if ': ' in line)
+        key = next(value for name, value in headers.items() if name.lower() == 'sec-websocket-key')
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        return ('HTTP/1.1 101 Switching Protocols\r\n'
+                'Upgrade: websocket\r\n'
+                'Connection: Upgrade\r\n'
+                f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode()
+
+    def _read_frame(self, client):
+        first, second = self._recv_exact(client, 2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._recv_exact(client, 2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._recv_exact(client, 8))[0]
+        mask = self._recv_exact(client, 4) if second & 0x80 else None
+        payload = self._recv_exact(client, length)
+        if mask:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return first & 0x0F, payload
+
+    @staticmethod
+    def _recv_exact(client, size):
+        data = b''
+        while len(data) < size:
+            chunk = client.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("Client closed the connection")
+            data += chunk
+        return data
+
+    @staticmethod
+    def _frame(payload, opcode):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        elif len(payload) < 65536:
+            header += bytes([126]) + struct.pack('!H', len(payload))
+        else:
+            header += bytes([127]) + struct.pack('!Q', len(payload))
+        return header + payload